@@ -0,0 +1,176 @@
+import asyncio
+import queue
+import random
+from contextlib import asynccontextmanager
+
+import httpx
+
+from http_session import (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT, THROTTLE_STATUS, classify_status,
+                          parse_retry_after)
+
+DEFAULT_BODY_BUFFER = 8
+
+# Marks the end of a StreamedBody
+_END = object()
+
+
+class AsyncRetryingSession:
+    """asyncio counterpart of RetryingSession, on an httpx.AsyncClient.
+
+    Same timeouts, retry and backoff rules and the same shared TokenBucket,
+    but every wait is an asyncio.sleep, so one event loop can keep many
+    requests in flight. The client is created on first use, inside the
+    loop that runs the requests; aclose() must be awaited on that loop too.
+    """
+
+    def __init__(self, pool_size=4, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT, max_retries=5,
+                 base_delay=2.0, max_delay=120.0, limiter=None):
+        self.timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.limiter = limiter
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits,
+                                             headers={"User-Agent": "motorcycle-shops-fetcher/1.0"})
+        return self._client
+
+    def backoff(self, attempt):
+        # Full jitter: uniform over [0, min(max_delay, base * 2^attempt)]
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    async def _acquire(self):
+        if not self.limiter:
+            return
+        while True:
+            wait = self.limiter.try_acquire()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    @asynccontextmanager
+    async def stream(self, method, url, **kwargs):
+        """Send a request, retrying like RetryingSession, and yield the streamed response."""
+        attempt = 0
+        while True:
+            await self._acquire()
+            try:
+                response = await self.client.send(self.client.build_request(method, url, **kwargs), stream=True)
+            except httpx.TransportError as e:
+                # Connection failures and timeouts
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.backoff(attempt)
+                print(f"   ↻ {type(e).__name__}, retrying in {delay:.1f}s")
+            else:
+                kind = classify_status(response.status_code)
+                if kind == "ok":
+                    try:
+                        yield response
+                    finally:
+                        await response.aclose()
+                    return
+                if kind == "fatal" or attempt >= self.max_retries:
+                    await response.aread()
+                    await response.aclose()
+                    response.raise_for_status()
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                delay = min(self.max_delay, retry_after) if retry_after is not None else self.backoff(attempt)
+                if response.status_code in THROTTLE_STATUS and self.limiter:
+                    self.limiter.pause(delay)
+                print(f"   ↻ HTTP {response.status_code}, retrying in {delay:.1f}s")
+                await response.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class StreamedBody:
+    """A response body downloaded on the event loop and read from a worker thread.
+
+    open() sends the request through session.stream() (so with its retries)
+    and returns once the response is in; HTTP and connection errors up to
+    then are raised there. The body then downloads in a task on the loop,
+    at most `buffer` chunks ahead of the reader. Iterating blocks the
+    reading thread, never the loop, and raises any error of the download.
+    The download stops on close() (from any thread) or when the task that
+    opened it finishes.
+    """
+
+    def __init__(self, session, method, url, chunk_size, buffer=DEFAULT_BODY_BUFFER, **kwargs):
+        self.session = session
+        self.method = method
+        self.url = url
+        self.chunk_size = chunk_size
+        self.buffer = buffer
+        self.kwargs = kwargs
+        self._chunks = queue.Queue()
+        self._credits = None
+        self._loop = None
+        self._task = None
+
+    async def open(self):
+        self._loop = asyncio.get_running_loop()
+        self._credits = asyncio.Semaphore(max(1, self.buffer))
+        opened = self._loop.create_future()
+        self._task = asyncio.create_task(self._download(opened))
+        try:
+            await opened
+        except BaseException:
+            self._task.cancel()
+            raise
+        owner = asyncio.current_task()
+        if owner is not None:
+            owner.add_done_callback(lambda _: self.close())
+        return self
+
+    async def _download(self, opened):
+        try:
+            async with self.session.stream(self.method, self.url, **self.kwargs) as response:
+                opened.set_result(None)
+                async for chunk in response.aiter_bytes(self.chunk_size):
+                    await self._credits.acquire()
+                    self._chunks.put(chunk)
+            self._chunks.put(_END)
+        except asyncio.CancelledError:
+            if not opened.done():
+                opened.cancel()
+            # Wake a reader that is still waiting
+            self._chunks.put(ConnectionAbortedError("download stopped"))
+            raise
+        except Exception as e:
+            if opened.done():
+                self._chunks.put(e)
+            else:
+                opened.set_exception(e)
+
+    def _call_soon(self, callback):
+        try:
+            self._loop.call_soon_threadsafe(callback)
+        except RuntimeError:
+            # The loop already finished
+            pass
+
+    def __iter__(self):
+        while True:
+            item = self._chunks.get()
+            if item is _END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            self._call_soon(self._credits.release)
+            yield item
+
+    def close(self):
+        if self._task is not None and not self._task.done():
+            self._call_soon(self._task.cancel)
@@ -0,0 +1,216 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pipeline import CountryResult, StageStats
+
+# Marks the end of run()'s results
+_DONE = object()
+
+
+def _skip(elements, count):
+    next(islice(elements, count, count), None)
+
+
+class _Budget:
+    """What is left of one country's timeout; only time spent in spend() counts."""
+
+    def __init__(self, seconds):
+        self.left = seconds
+
+    async def spend(self, awaitable):
+        if self.left is None:
+            return await awaitable
+        started = time.monotonic()
+        try:
+            return await asyncio.wait_for(awaitable, max(self.left, 0))
+        finally:
+            self.left -= time.monotonic() - started
+
+
+class AsyncPipeline:
+    """Fetch → format → upsert stages driven by one asyncio event loop.
+
+    Same contract as Pipeline, except that `fetch(code)` is a coroutine
+    function returning an iterable of raw elements (like ElementStream,
+    optionally with `meta`). Every in-flight download shares one event
+    loop thread. Parsing, formatting and the blocking sink calls run in
+    worker threads so they don't stall it. A thread parsing a streamed
+    body waits for the download, so `parse_workers` should cover every
+    body that can be parsed at once (default: one per fetch worker).
+
+    At most `fetch_workers` countries are fetched at once and at most
+    `sink_workers` batches are being stored; a country waits for a free
+    upsert slot before formatting more, which bounds memory. A country
+    that spends longer than `country_timeout` seconds fetching and
+    formatting fails with a TimeoutError; waiting for an upsert slot
+    doesn't count, so a slow sink can't time out a healthy download. cancel() (Ctrl-C) stops every download,
+    but batches already being stored still finish and are checkpointed.
+
+    run() is a plain generator of CountryResults, so callers drive both
+    pipelines the same way; the loop runs on its own thread.
+    """
+
+    def __init__(self, fetch, transform, sink, fetch_workers=1, sink_workers=1, batch_size=100,
+                 country_timeout=None, on_fetch_error=None, on_progress=None, on_close=None,
+                 parse_workers=None):
+        self.fetch = fetch
+        self.transform = transform
+        self.sink = sink
+        self.fetch_workers = max(1, fetch_workers)
+        self.sink_workers = max(1, sink_workers)
+        self.parse_workers = max(self.fetch_workers, parse_workers or 0)
+        self.batch_size = batch_size
+        self.country_timeout = country_timeout
+        self.on_fetch_error = on_fetch_error
+        self.on_progress = on_progress
+        self.on_close = on_close
+        self.stats = [StageStats("fetch"), StageStats("format"), StageStats("upsert")]
+        self.results = queue.Queue()
+
+        self._state = {}
+        self._storing = {}
+        self._tasks = []
+        self._loop = None
+        self._cancelled = threading.Event()
+
+    # ---------- bookkeeping (event loop thread only) ----------
+    def _stored(self, code, batch):
+        result = self._state[code]
+        if result.error is not None:
+            return
+        offset, size = batch
+        result.done_ranges[offset] = size
+        before = result.committed
+        while result.committed in result.done_ranges:
+            result.committed += result.done_ranges.pop(result.committed)
+        if result.committed != before and self.on_progress:
+            self.on_progress(code, result.committed)
+
+    def _fail(self, code, error):
+        result = self._state[code]
+        if result.error is None:
+            result.error = error
+
+    # ---------- stages ----------
+    async def _store(self, code, batch, records, slots):
+        try:
+            started = time.monotonic()
+            await asyncio.to_thread(self.sink, code, records)
+            self.stats[2].record(len(records), time.monotonic() - started)
+            self._state[code].inserted += len(records)
+            self._stored(code, batch)
+        except Exception as e:
+            self._fail(code, e)
+        finally:
+            slots.release()
+
+    async def _fetch(self, code, slots, budget):
+        result = self._state[code]
+        started = time.monotonic()
+        source = await budget.spend(self.fetch(code))
+        elements = iter(source)
+        # Resume after elements a previous run already stored
+        offset = result.committed
+        if offset:
+            await budget.spend(asyncio.to_thread(_skip, elements, offset))
+        while result.error is None:
+            batch = await budget.spend(asyncio.to_thread(list, islice(elements, self.batch_size)))
+            if not batch:
+                break
+            self.stats[0].record(len(batch), time.monotonic() - started)
+
+            started = time.monotonic()
+            records = await budget.spend(asyncio.to_thread(self.transform, code, batch))
+            self.stats[1].record(len(records), time.monotonic() - started)
+            if records:
+                await slots.acquire()
+                task = asyncio.create_task(self._store(code, (offset, len(batch)), records, slots))
+                self._storing[code].add(task)
+                task.add_done_callback(self._storing[code].discard)
+            else:
+                self._stored(code, (offset, len(batch)))
+            offset += len(batch)
+            started = time.monotonic()
+        result.fetched = True
+        result.meta = getattr(source, "meta", {})
+
+    async def _country(self, code, countries, slots):
+        try:
+            async with countries:
+                try:
+                    await self._fetch(code, slots, _Budget(self.country_timeout))
+                except asyncio.TimeoutError:
+                    self._fail(code, TimeoutError(f"gave up after {self.country_timeout:g}s"))
+                except Exception as e:
+                    if self.on_fetch_error:
+                        self.on_fetch_error(code, e)
+                    self._fail(code, e)
+        finally:
+            # Even when cancelled: batches already being stored get to finish
+            if self._storing[code]:
+                await asyncio.shield(asyncio.gather(*self._storing[code], return_exceptions=True))
+        self.results.put(self._state[code])
+
+    async def _main(self, countries):
+        self._loop = asyncio.get_running_loop()
+        # Enough threads that parsing never waits behind blocking upserts
+        self._loop.set_default_executor(ThreadPoolExecutor(max_workers=self.parse_workers + self.sink_workers))
+        fetch_slots = asyncio.Semaphore(self.fetch_workers)
+        sink_slots = asyncio.Semaphore(self.sink_workers)
+        try:
+            if not self._cancelled.is_set():
+                self._tasks = [asyncio.create_task(self._country(code, fetch_slots, sink_slots))
+                               for code in countries]
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+        finally:
+            if self.on_close:
+                await self.on_close()
+
+    def _run_loop(self, countries):
+        try:
+            asyncio.run(self._main(countries))
+        finally:
+            self.results.put(_DONE)
+
+    def _cancel_tasks(self):
+        for task in self._tasks:
+            task.cancel()
+
+    def cancel(self):
+        """Stop every download; batches already being stored still finish."""
+        self._cancelled.set()
+        loop = self._loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self._cancel_tasks)
+            except RuntimeError:
+                # The loop already finished
+                pass
+
+    # ---------- driving ----------
+    def run(self, countries, start_offsets=None):
+        """Process `countries`, yielding a CountryResult as each one finishes."""
+        start_offsets = start_offsets or {}
+        for code in countries:
+            result = CountryResult(code)
+            result.committed = start_offsets.get(code, 0)
+            self._state[code] = result
+            self._storing[code] = set()
+
+        thread = threading.Thread(target=self._run_loop, args=(list(countries),), daemon=True)
+        thread.start()
+        try:
+            while True:
+                result = self.results.get()
+                if result is _DONE:
+                    return
+                yield result
+        except BaseException:
+            # Ctrl-C or the consumer gave up: wind down instead of finishing everything
+            self.cancel()
+            raise
+        finally:
+            thread.join()
@@ -0,0 +1,154 @@
+import os
+import json
+import time
+import argparse
+from pipeline import Pipeline, percentile
+from async_pipeline import AsyncPipeline
+from async_http import AsyncRetryingSession
+from rate_limiter import TokenBucket
+from http_session import RetryingSession
+from sinks import PostgrestSink, AdaptiveSink, AdaptiveBatchSize
+from mock_servers import (MockOverpass, MockPostgrest, add_fault_arguments, add_overpass_arguments,
+                          add_postgrest_arguments)
+from fetch_osm_data import (EU_COUNTRIES, DEFAULT_WORKERS, DEFAULT_UPSERT_WORKERS, DEFAULT_BATCH_SIZE,
+                            MIN_BATCH_SIZE, DEFAULT_MAX_BATCH_SIZE, DEFAULT_TARGET_LATENCY,
+                            DEFAULT_QUEUE_SIZE, DEFAULT_TILE_SIZE, DEFAULT_TILE_WORKERS, make_stages)
+
+# The mocks answer instantly unless told otherwise; don't let the client throttle the benchmark
+DEFAULT_RATE = 1000.0
+PERCENTILES = (0.5, 0.99)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the fetch → format → upsert pipeline against local Overpass/PostgREST stand-ins")
+    parser.add_argument("--countries", nargs="+", default=EU_COUNTRIES, metavar="CODE",
+                        help="Countries to fetch (default: all 27)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Max countries in flight at once (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--upsert-workers", type=int, default=DEFAULT_UPSERT_WORKERS,
+                        help=f"Upsert batches submitted in parallel (default: {DEFAULT_UPSERT_WORKERS})")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE,
+                        help=f"Client-side Overpass requests per second (default: {DEFAULT_RATE})")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Initial rows per upsert request (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                        help=f"Upper bound for the adaptive batch size (default: {DEFAULT_MAX_BATCH_SIZE})")
+    parser.add_argument("--target-latency", type=float, default=DEFAULT_TARGET_LATENCY,
+                        help=f"Target seconds per upsert batch (default: {DEFAULT_TARGET_LATENCY})")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help=f"Batches buffered between stages (default: {DEFAULT_QUEUE_SIZE})")
+    parser.add_argument("--tile", nargs="+", default=[], metavar="CODE",
+                        help="Fetch these countries as bbox tiles (`all` for every country)")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Benchmark the asyncio engine instead of the threaded pipeline")
+    parser.add_argument("--country-timeout", type=float,
+                        help="With --async: give up on a country that spends longer than this many seconds "
+                             "fetching and formatting")
+    parser.add_argument("--retries", type=int, default=5, help="Retries per request (default: 5)")
+    parser.add_argument("--retry-delay", type=float, default=0.2,
+                        help="Base backoff in seconds for 5xx retries (default: 0.2)")
+    add_overpass_arguments(parser)
+    add_postgrest_arguments(parser)
+    overpass_faults = add_fault_arguments(parser, "overpass", 0.2)
+    upsert_faults = add_fault_arguments(parser, "upsert", 0.02, per_row=0.0001)
+    parser.add_argument("--out", help="Also write the results as JSON to this file")
+    return parser.parse_args(), overpass_faults, upsert_faults
+
+
+def main():
+    args, overpass_faults, upsert_faults = parse_args()
+    countries = [code.upper() for code in args.countries]
+    tiled = {code.upper() for code in args.tile}
+    if "ALL" in tiled:
+        tiled = set(countries)
+
+    overpass = MockOverpass(overpass_faults(args, args.seed), args.fixtures, args.replay_cache,
+                            args.elements, args.seed).start()
+    postgrest = MockPostgrest(upsert_faults(args, args.seed + 1), args.max_rows,
+                              statement_timeout=args.statement_timeout).start()
+
+    limiter = TokenBucket(args.rate, max(1, args.workers))
+    session_class = AsyncRetryingSession if args.use_async else RetryingSession
+    session = session_class(pool_size=max(1, args.workers * DEFAULT_TILE_WORKERS), max_retries=args.retries,
+                            base_delay=args.retry_delay, limiter=limiter)
+    batch_size = AdaptiveBatchSize(initial=args.batch_size, minimum=MIN_BATCH_SIZE,
+                                   maximum=args.max_batch_size, target_latency=args.target_latency)
+    sink = AdaptiveSink(PostgrestSink(postgrest.endpoint, pool_size=args.upsert_workers,
+                                      retry_delay=args.retry_delay), batch_size)
+    fetch, transform, upsert = make_stages(sink, session, dict.fromkeys(countries), tiled=tiled,
+                                           tile_size=DEFAULT_TILE_SIZE, tile_workers=DEFAULT_TILE_WORKERS,
+                                           overpass_url=overpass.endpoint)
+    if args.use_async:
+        pipeline = AsyncPipeline(fetch, transform, upsert, fetch_workers=args.workers,
+                                 sink_workers=args.upsert_workers, batch_size=args.max_batch_size,
+                                 country_timeout=args.country_timeout,
+                                 parse_workers=args.workers * DEFAULT_TILE_WORKERS, on_close=session.aclose)
+    else:
+        pipeline = Pipeline(fetch, transform, upsert, fetch_workers=args.workers,
+                            sink_workers=args.upsert_workers, batch_size=args.max_batch_size,
+                            queue_size=args.queue_size)
+
+    print(f"📍 Benchmarking {len(countries)} countries ({'asyncio' if args.use_async else 'threads'}) against {overpass.url} and {postgrest.url}")
+    print("")
+    country_latencies = []
+    failed = []
+    rows = 0
+    started = time.monotonic()
+    for result in pipeline.run(countries):
+        country_latencies.append(time.monotonic() - started)
+        if result.error is not None:
+            print(f"❌ {result.code}: {result.error}")
+            failed.append(result.code)
+            continue
+        rows += result.inserted
+    elapsed = time.monotonic() - started
+
+    if not args.use_async:
+        session.close()
+    sink.close()
+    overpass.stop()
+    postgrest.stop()
+
+    done = len(countries) - len(failed)
+    report = {
+        "countries": done,
+        "failed": failed,
+        "rows": rows,
+        "elapsed": round(elapsed, 3),
+        "countries_per_second": round(done / elapsed, 3) if elapsed else 0.0,
+        "rows_per_second": round(rows / elapsed, 1) if elapsed else 0.0,
+        "country_finished_after": {f"p{int(p * 100)}": round(percentile(country_latencies, p), 4)
+                                   for p in PERCENTILES},
+        "stages": {stats.name: {"items": stats.items, "batches": stats.batches, "busy": round(stats.busy, 3),
+                                **{f"p{int(p * 100)}": round(stats.percentile(p), 4) for p in PERCENTILES}}
+                   for stats in pipeline.stats},
+        "final_batch_size": batch_size.size,
+        "overpass": overpass.stats.to_json(),
+        "postgrest": postgrest.stats.to_json(),
+        "settings": {key: value for key, value in vars(args).items() if key != "out"},
+    }
+
+    # ---------- Summary ----------
+    print("")
+    print("=" * 60)
+    print(f"✅ {done}/{len(countries)} countries, {rows} rows in {elapsed:.2f}s")
+    print(f"   {report['countries_per_second']:.2f} countries/s, {report['rows_per_second']:.0f} rows/s")
+    print(f"   {'stage':<7} {'p50':>9} {'p99':>9}  batches")
+    for name, stage in report["stages"].items():
+        print(f"   {name:<7} {stage['p50'] * 1000:7.1f}ms {stage['p99'] * 1000:7.1f}ms  {stage['batches']}")
+    print(f"   Final upsert batch size: {batch_size.size}")
+    print(f"   Overpass requests: {report['overpass']['statuses']}")
+    print(f"   PostgREST requests: {report['postgrest']['statuses']}")
+
+    if args.out:
+        directory = os.path.dirname(args.out)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Saved results to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
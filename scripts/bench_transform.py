@@ -0,0 +1,192 @@
+import gc
+import io
+import os
+import glob
+import json
+import time
+import platform
+import argparse
+import tempfile
+import subprocess
+import tracemalloc
+from datetime import datetime, timezone
+from csv_records import iter_csv_rows
+from normalize_csv import normalize_table, read_columns
+from overpass_stream import ElementStream, iter_file_chunks
+from synthetic import synthetic_elements, overpass_body, write_synthetic_csv
+from upload_to_supabase import transform as csv_transform
+from fetch_osm_data import STATE_DIR, format_records, iter_records
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+DEFAULT_REPEAT = 3
+DEFAULT_RESULTS_DIR = os.path.join(STATE_DIR, "bench")
+# Slower or hungrier than the previous run by more than this counts as a regression
+REGRESSION = 0.10
+
+
+def _serialize(records):
+    # The request body PostgrestSink sends
+    return json.dumps(records, separators=(",", ":")).encode("utf-8")
+
+
+def _osm_elements(size, seed):
+    return synthetic_elements("DE", size, seed)
+
+
+# ---------- Cases ----------
+# Each case is (name, setup, run): setup(size, seed, workdir) builds the input
+# outside the measurement, run(input) is what gets timed and traced.
+CASES = [
+    ("osm.parse",
+     lambda size, seed, workdir: overpass_body(_osm_elements(size, seed)),
+     lambda body: list(ElementStream(iter_file_chunks(io.BytesIO(body))))),
+    ("osm.format",
+     lambda size, seed, workdir: {"elements": _osm_elements(size, seed)},
+     lambda data: format_records(data, "DE")),
+    ("osm.records",
+     lambda size, seed, workdir: _osm_elements(size, seed),
+     lambda elements: list(iter_records(elements, "DE"))),
+    ("osm.serialize",
+     lambda size, seed, workdir: format_records({"elements": _osm_elements(size, seed)}, "DE"),
+     _serialize),
+    ("csv.records",
+     lambda size, seed, workdir: _csv_file(workdir, size, seed),
+     lambda path: csv_transform(path, iter_csv_rows(path))),
+    ("csv.normalize",
+     lambda size, seed, workdir: _csv_file(workdir, size, seed),
+     lambda path: normalize_table(read_columns(path))),
+    ("csv.serialize",
+     lambda size, seed, workdir: csv_transform(None, iter_csv_rows(_csv_file(workdir, size, seed))),
+     _serialize),
+]
+
+
+def _csv_file(workdir, size, seed):
+    path = os.path.join(workdir, f"shops-{size}-{seed}.csv")
+    if not os.path.exists(path):
+        write_synthetic_csv(path, size, seed)
+    return path
+
+
+def measure(run, data, repeat):
+    """(best wall time over `repeat` runs, peak traced MB of one more run)."""
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        result = run(data)
+        seconds = time.perf_counter() - started
+        del result
+        best = seconds if best is None else min(best, seconds)
+    # Tracing slows everything down, so memory gets its own run
+    gc.collect()
+    tracemalloc.start()
+    result = run(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return best, peak / (1024 * 1024)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def latest_results(directory):
+    paths = sorted(glob.glob(os.path.join(directory, "transform-*.json")))
+    return paths[-1] if paths else None
+
+
+def compare(results, baseline):
+    """Lines describing how `results` moved against an earlier run."""
+    before = {(row["case"], row["size"]): row for row in baseline["results"]}
+    lines = []
+    for row in results:
+        old = before.get((row["case"], row["size"]))
+        if not old:
+            continue
+        time_change = row["seconds"] / old["seconds"] - 1 if old["seconds"] else 0.0
+        memory_change = row["peak_mb"] / old["peak_mb"] - 1 if old["peak_mb"] else 0.0
+        flag = "⚠️ " if time_change > REGRESSION or memory_change > REGRESSION else "  "
+        lines.append(f"{flag} {row['case']:<14} {row['size']:>9}  time {time_change:+7.1%}  "
+                     f"memory {memory_change:+7.1%}")
+    return lines
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Time and trace peak memory of OSM formatting and CSV ingestion on synthetic data")
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES,
+                        help=f"Input sizes in elements/rows (default: {' '.join(map(str, DEFAULT_SIZES))})")
+    parser.add_argument("--cases", nargs="+", choices=[name for name, _, _ in CASES],
+                        help="Only run these cases (default: all)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help=f"Timed runs per case; the fastest counts (default: {DEFAULT_REPEAT})")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic data (default: 0)")
+    parser.add_argument("--results-dir", default=DEFAULT_RESULTS_DIR,
+                        help=f"Where results are saved as JSON (default: {DEFAULT_RESULTS_DIR})")
+    parser.add_argument("--compare",
+                        help="Results file to compare against (default: the latest one in --results-dir)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    cases = [case for case in CASES if not args.cases or case[0] in args.cases]
+    previous = args.compare or latest_results(args.results_dir)
+    if args.compare and not os.path.exists(args.compare):
+        print(f"❌ File not found: {args.compare}")
+        exit(1)
+
+    print(f"📍 {len(cases)} cases x {len(args.sizes)} sizes, best of {args.repeat}")
+    print("")
+    print(f"   {'case':<14} {'size':>9} {'seconds':>9} {'rows/s':>11} {'peak MB':>9}")
+    results = []
+    started = time.monotonic()
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            for name, setup, run in cases:
+                data = setup(size, args.seed, workdir)
+                seconds, peak_mb = measure(run, data, max(1, args.repeat))
+                del data
+                row = {"case": name, "size": size, "seconds": round(seconds, 4),
+                       "rows_per_second": round(size / seconds) if seconds else None,
+                       "peak_mb": round(peak_mb, 1)}
+                results.append(row)
+                print(f"   {name:<14} {size:>9} {seconds:>9.3f} {row['rows_per_second']:>11} {peak_mb:>9.1f}",
+                      flush=True)
+
+    os.makedirs(args.results_dir, exist_ok=True)
+    created = datetime.now(timezone.utc)
+    commit = git_commit()
+    path = os.path.join(args.results_dir,
+                        f"transform-{created:%Y%m%dT%H%M%SZ}{'-' + commit if commit else ''}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "created": created.isoformat(timespec="seconds"),
+            "commit": commit,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "results": results,
+        }, f, indent=2)
+
+    print("")
+    print(f"✅ Saved results to {path} ({time.monotonic() - started:.1f}s)")
+    if previous:
+        with open(previous, encoding="utf-8") as f:
+            baseline = json.load(f)
+        lines = compare(results, baseline)
+        if lines:
+            print(f"🔍 Compared with {previous} (commit {baseline.get('commit') or 'unknown'}):")
+            for line in lines:
+                print(f"   {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import os
+import json
+import time
+import shutil
+import argparse
+from datetime import datetime, timezone
+from dataset import dataset_from_args, add_dataset_arguments
+from tiling import project, unproject, tile_of
+
+DEFAULT_OUT_DIR = os.path.join("public", "data", "clusters")
+DEFAULT_MIN_ZOOM = 0
+DEFAULT_MAX_ZOOM = 12
+# Cluster radius in pixels, on tiles of DEFAULT_EXTENT pixels (Leaflet's size)
+DEFAULT_RADIUS = 60
+DEFAULT_EXTENT = 256
+
+
+class Cluster:
+    """A point on one zoom level: a single shop or a group of them."""
+
+    __slots__ = ("x", "y", "count", "shop")
+
+    def __init__(self, x, y, count=1, shop=None):
+        self.x = x
+        self.y = y
+        self.count = count
+        self.shop = shop
+
+    def to_json(self):
+        lat, lon = unproject(self.x, self.y)
+        if self.shop is not None:
+            return dict(self.shop, lat=round(lat, 6), lon=round(lon, 6))
+        return {"lat": round(lat, 5), "lon": round(lon, 5), "count": self.count}
+
+
+def cluster_level(points, radius):
+    """Greedily merge points closer than `radius` (world units) into weighted centroids.
+
+    Same idea as supercluster: walk the points, absorb every neighbour that
+    isn't already taken, and replace the group with its centroid.
+    """
+    cells = {}
+    for index, point in enumerate(points):
+        cells.setdefault((int(point.x / radius), int(point.y / radius)), []).append(index)
+
+    taken = [False] * len(points)
+    result = []
+    radius_sq = radius * radius
+    for index, point in enumerate(points):
+        if taken[index]:
+            continue
+        taken[index] = True
+        cx, cy = int(point.x / radius), int(point.y / radius)
+        group = [point]
+        for gx in (cx - 1, cx, cx + 1):
+            for gy in (cy - 1, cy, cy + 1):
+                for other in cells.get((gx, gy), ()):
+                    if taken[other]:
+                        continue
+                    neighbour = points[other]
+                    if (neighbour.x - point.x) ** 2 + (neighbour.y - point.y) ** 2 <= radius_sq:
+                        taken[other] = True
+                        group.append(neighbour)
+        if len(group) == 1:
+            result.append(point)
+            continue
+        count = sum(p.count for p in group)
+        result.append(Cluster(sum(p.x * p.count for p in group) / count,
+                              sum(p.y * p.count for p in group) / count, count))
+    return result
+
+
+def shop_points(records):
+    shops = {}
+    for record in records:
+        lat, lon = record.get("lat"), record.get("lon")
+        if not isinstance(lat, (int, float)) or not isinstance(lon, (int, float)):
+            continue
+        shops[record["id"]] = (lat, lon, {
+            "id": record["id"],
+            "name": record.get("name"),
+            "city": (record.get("address") or {}).get("city"),
+            "country_code": record.get("country_code") or record.get("source_country"),
+        })
+    points = []
+    for shop_id in sorted(shops):
+        lat, lon, shop = shops[shop_id]
+        x, y = project(lat, lon)
+        points.append(Cluster(x, y, shop={key: value for key, value in shop.items() if value is not None}))
+    return points
+
+
+def build_pyramid(points, min_zoom, max_zoom, radius=DEFAULT_RADIUS, extent=DEFAULT_EXTENT):
+    """{zoom: [Cluster, ...]} from max_zoom + 1 (every shop) down to min_zoom."""
+    levels = {max_zoom + 1: points}
+    for zoom in range(max_zoom, min_zoom - 1, -1):
+        levels[zoom] = cluster_level(levels[zoom + 1], radius / (extent * (1 << zoom)))
+    return levels
+
+
+def write_tiles(levels, out_dir):
+    tiles = {}
+    for zoom, points in levels.items():
+        for point in points:
+            tiles.setdefault((zoom, *tile_of(point.x, point.y, zoom)), []).append(point)
+
+    # Tiles from an earlier build would outlive shops that moved or went away
+    if os.path.exists(os.path.join(out_dir, "index.json")):
+        for name in os.listdir(out_dir):
+            if name.isdigit():
+                shutil.rmtree(os.path.join(out_dir, name))
+
+    total_bytes = 0
+    for (zoom, x, y), points in tiles.items():
+        directory = os.path.join(out_dir, str(zoom), str(x))
+        os.makedirs(directory, exist_ok=True)
+        body = json.dumps([point.to_json() for point in points], ensure_ascii=False, separators=(",", ":"))
+        with open(os.path.join(directory, f"{y}.json"), "w", encoding="utf-8") as f:
+            f.write(body)
+        total_bytes += len(body.encode("utf-8"))
+    return tiles, total_bytes
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Precompute per-zoom marker clusters as z/x/y JSON tiles")
+    add_dataset_arguments(parser)
+    parser.add_argument("--out", default=DEFAULT_OUT_DIR,
+                        help=f"Output directory (default: {DEFAULT_OUT_DIR})")
+    parser.add_argument("--min-zoom", type=int, default=DEFAULT_MIN_ZOOM,
+                        help=f"Lowest zoom level (default: {DEFAULT_MIN_ZOOM})")
+    parser.add_argument("--max-zoom", type=int, default=DEFAULT_MAX_ZOOM,
+                        help=f"Highest clustered zoom; the level above it has every shop (default: {DEFAULT_MAX_ZOOM})")
+    parser.add_argument("--radius", type=float, default=DEFAULT_RADIUS,
+                        help=f"Cluster radius in pixels (default: {DEFAULT_RADIUS})")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not 0 <= args.min_zoom <= args.max_zoom:
+        print("❌ Need 0 <= --min-zoom <= --max-zoom")
+        exit(1)
+
+    started = time.monotonic()
+    points = shop_points(dataset_from_args(args))
+    levels = build_pyramid(points, args.min_zoom, args.max_zoom, args.radius)
+    os.makedirs(args.out, exist_ok=True)
+    tiles, total_bytes = write_tiles(levels, args.out)
+
+    index = {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "min_zoom": args.min_zoom,
+        "max_zoom": args.max_zoom + 1,
+        "radius": args.radius,
+        "extent": DEFAULT_EXTENT,
+        "total": len(points),
+        "zooms": {str(zoom): {"points": len(levels[zoom]),
+                              "tiles": sum(1 for key in tiles if key[0] == zoom)}
+                  for zoom in sorted(levels)},
+    }
+    with open(os.path.join(args.out, "index.json"), "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    elapsed = time.monotonic() - started
+
+    print(f"✅ Clustered {len(points)} shops into {len(tiles)} tiles "
+          f"({total_bytes / 1024:.0f} KB) in {args.out} in {elapsed:.2f}s")
+    for zoom in sorted(levels):
+        entry = index["zooms"][str(zoom)]
+        print(f"   z{zoom:<2} {entry['points']:>6} points in {entry['tiles']:>5} tiles")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import os
+import json
+import time
+import argparse
+from datetime import datetime, timezone
+from dataset import dataset_from_args, add_dataset_arguments
+from opening_hours import OpeningHoursTable
+
+DEFAULT_OUT = os.path.join("public", "data", "opening_hours.json")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Precompute weekly opening-hours bitmaps for every shop")
+    add_dataset_arguments(parser)
+    parser.add_argument("--out", default=DEFAULT_OUT,
+                        help=f"Output file (default: {DEFAULT_OUT})")
+    parser.add_argument("--at", metavar="ISO_TIME",
+                        help="After building, count the shops open at this time, e.g. 2025-06-02T10:00+02:00 "
+                             "(default: now)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    when = datetime.now(timezone.utc)
+    if args.at:
+        try:
+            when = datetime.fromisoformat(args.at)
+        except ValueError:
+            print(f"❌ Not an ISO time: {args.at}")
+            exit(1)
+        if when.tzinfo is None:
+            when = when.astimezone()
+
+    started = time.monotonic()
+    records = list(dataset_from_args(args))
+    table = OpeningHoursTable.build(records)
+    out_dir = os.path.dirname(args.out)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(table.to_json(), f, separators=(",", ":"))
+    elapsed = time.monotonic() - started
+    print(f"✅ Opening hours for {len(table)} of {len(records)} shops -> {args.out} "
+          f"({os.path.getsize(args.out) / 1024:.0f} KB) in {elapsed:.2f}s")
+
+    started = time.perf_counter()
+    open_now = table.open_at(when)
+    took = (time.perf_counter() - started) * 1000
+    print(f"🕒 {len(open_now)} shops open at {when.isoformat(timespec='minutes')} [{took:.2f} ms]")
+
+
+if __name__ == "__main__":
+    main()
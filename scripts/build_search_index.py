@@ -0,0 +1,54 @@
+import os
+import time
+import argparse
+from dataset import dataset_from_args, add_dataset_arguments
+from csv_records import COUNTRY_CODES
+from search_index import SearchIndex
+
+DEFAULT_OUT = os.path.join("public", "data", "search_index.json.gz")
+
+
+def country_names():
+    # First name listed per code ("Czech Republic" before "Czechia")
+    names = {}
+    for name, code in COUNTRY_CODES.items():
+        names.setdefault(code, name)
+    return names
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build a full-text search index over shop name, city and street")
+    add_dataset_arguments(parser)
+    parser.add_argument("--out", default=DEFAULT_OUT,
+                        help=f"Index file (default: {DEFAULT_OUT})")
+    parser.add_argument("--query",
+                        help="After building, run this search and list the top matches")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    started = time.monotonic()
+    records = list(dataset_from_args(args))
+    index = SearchIndex.build(records, country_names())
+    out_dir = os.path.dirname(args.out)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    index.save(args.out)
+    elapsed = time.monotonic() - started
+    print(f"✅ Indexed {len(index)} shops, {len(index.terms)} terms into {args.out} "
+          f"({os.path.getsize(args.out) / 1024:.0f} KB) in {elapsed:.2f}s")
+
+    if args.query:
+        index = SearchIndex.load(args.out)
+        names = {record["id"]: record.get("name") for record in records}
+        started = time.perf_counter()
+        hits = index.search(args.query)
+        took = (time.perf_counter() - started) * 1000
+        print(f"🔍 {len(hits)} matches for {args.query!r} [{took:.2f} ms]")
+        for shop_id, score in hits[:10]:
+            print(f"   {score:5.1f}  {names.get(shop_id)}")
+
+
+if __name__ == "__main__":
+    main()
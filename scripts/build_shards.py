@@ -0,0 +1,98 @@
+import os
+import gzip
+import json
+import time
+import argparse
+from datetime import datetime, timezone
+from dataset import dataset_from_args, add_dataset_arguments, record_country, compact
+
+DEFAULT_OUT_DIR = os.path.join("public", "data", "shards")
+# Shard for records whose country couldn't be determined
+UNKNOWN_COUNTRY = "XX"
+
+
+def shard_record(record, with_tags=False):
+    # The browser only needs what MotorcycleShops renders
+    shop = {
+        "id": record["id"],
+        "name": record.get("name"),
+        "lat": record.get("lat"),
+        "lon": record.get("lon"),
+        "country_code": record_country(record),
+        "address": record.get("address"),
+        "contact": record.get("contact"),
+    }
+    if with_tags:
+        shop["shop_tags"] = record.get("shop_tags")
+    return compact(shop)
+
+
+def write_shard(path, shops):
+    body = json.dumps(shops, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    # mtime=0 keeps the output byte-identical when the data hasn't changed
+    with open(path, "wb") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=9, mtime=0) as f:
+            f.write(body)
+    return len(body), os.path.getsize(path)
+
+
+def build_shards(records, out_dir, with_tags=False):
+    by_country = {}
+    for record in records:
+        shop = shard_record(record, with_tags)
+        by_country.setdefault(shop.get("country_code") or UNKNOWN_COUNTRY, {})[shop["id"]] = shop
+
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "total": 0,
+        "countries": {},
+    }
+    for code in sorted(by_country):
+        shops = sorted(by_country[code].values(), key=lambda shop: shop["id"])
+        filename = f"{code}.json.gz"
+        raw_bytes, gz_bytes = write_shard(os.path.join(out_dir, filename), shops)
+        manifest["countries"][code] = {
+            "file": filename,
+            "count": len(shops),
+            "bytes": gz_bytes,
+            "raw_bytes": raw_bytes,
+        }
+        manifest["total"] += len(shops)
+
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    # A country that dropped out of the data would otherwise keep its old shard
+    written = {entry["file"] for entry in manifest["countries"].values()}
+    for filename in os.listdir(out_dir):
+        if filename.endswith(".json.gz") and filename not in written:
+            os.remove(os.path.join(out_dir, filename))
+    return manifest
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Split the shop dataset into per-country gzip JSON shards")
+    add_dataset_arguments(parser)
+    parser.add_argument("--out", default=DEFAULT_OUT_DIR,
+                        help=f"Output directory (default: {DEFAULT_OUT_DIR})")
+    parser.add_argument("--with-tags", action="store_true",
+                        help="Keep shop_tags in the shards (left out by default to save bytes)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    started = time.monotonic()
+    manifest = build_shards(dataset_from_args(args), args.out, args.with_tags)
+    elapsed = time.monotonic() - started
+
+    total_bytes = sum(entry["bytes"] for entry in manifest["countries"].values())
+    print(f"✅ Wrote {len(manifest['countries'])} shards with {manifest['total']} shops "
+          f"({total_bytes / 1024:.0f} KB gzipped) to {args.out} in {elapsed:.2f}s")
+    for code, entry in manifest["countries"].items():
+        print(f"   {code}: {entry['count']:>6} shops, {entry['bytes'] / 1024:7.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
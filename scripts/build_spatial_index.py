@@ -0,0 +1,54 @@
+import os
+import time
+import argparse
+from dataset import dataset_from_args, add_dataset_arguments
+from spatial_index import SpatialIndex, DEFAULT_NODE_SIZE
+
+DEFAULT_OUT = os.path.join(".osm", "shops.rtree")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build a spatial index over the shop dataset")
+    add_dataset_arguments(parser)
+    parser.add_argument("--out", default=DEFAULT_OUT,
+                        help=f"Index file (default: {DEFAULT_OUT})")
+    parser.add_argument("--node-size", type=int, default=DEFAULT_NODE_SIZE,
+                        help=f"Entries per R-tree node (default: {DEFAULT_NODE_SIZE})")
+    parser.add_argument("--near", nargs=2, type=float, metavar=("LAT", "LON"),
+                        help="After building, list the shops near this point")
+    parser.add_argument("--radius", type=float, default=25.0,
+                        help="Radius in km for --near (default: 25)")
+    parser.add_argument("-k", type=int, default=5,
+                        help="Nearest shops to list for --near (default: 5)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    started = time.monotonic()
+    index = SpatialIndex.build(dataset_from_args(args), args.node_size)
+    out_dir = os.path.dirname(args.out)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    index.save(args.out)
+    elapsed = time.monotonic() - started
+    print(f"✅ Indexed {len(index)} shops into {args.out} "
+          f"({os.path.getsize(args.out) / 1024:.0f} KB, {len(index.levels)} levels) in {elapsed:.2f}s")
+
+    if args.near:
+        lat, lon = args.near
+        index = SpatialIndex.load(args.out)
+        started = time.perf_counter()
+        hits = index.within_radius(lat, lon, args.radius)
+        radius_ms = (time.perf_counter() - started) * 1000
+        started = time.perf_counter()
+        nearest = index.nearest(lat, lon, args.k)
+        nearest_ms = (time.perf_counter() - started) * 1000
+        print(f"📍 {len(hits)} shops within {args.radius:g} km of ({lat}, {lon}) [{radius_ms:.2f} ms]")
+        print(f"📍 Nearest {len(nearest)} [{nearest_ms:.2f} ms]:")
+        for shop_id, distance in nearest:
+            print(f"   {shop_id:>20}  {distance:7.2f} km")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+import os
+import gzip
+import json
+import time
+import shutil
+import sqlite3
+import argparse
+from dataset import dataset_from_args, add_dataset_arguments, record_country
+from tiling import project
+
+DEFAULT_OUT = os.path.join("public", "data", "tiles")
+DEFAULT_MIN_ZOOM = 0
+DEFAULT_MAX_ZOOM = 14
+LAYER_NAME = "shops"
+# Tile coordinate space and how far past the edge points are repeated, so
+# markers on a tile border are not cut off
+EXTENT = 4096
+BUFFER = 64
+# Below the highest zoom, keep one shop per cell of this many screen pixels
+# (tiles are drawn 256 px wide), so low-zoom tiles don't carry every shop
+DEFAULT_SPACING = 2
+
+
+# ---------- Protocol buffers (just what vector_tile.proto needs) ----------
+def _varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _zigzag(value):
+    return (value << 1) ^ (value >> 63)
+
+
+def _field(number, wire_type, payload):
+    key = _varint((number << 3) | wire_type)
+    if wire_type == 0:
+        return key + _varint(payload)
+    return key + _varint(len(payload)) + payload
+
+
+def _packed(number, values):
+    return _field(number, 2, b"".join(_varint(value) for value in values))
+
+
+def _value(value):
+    if isinstance(value, int):
+        # sint_value: zigzag keeps the negative Google-derived ids short
+        return _field(6, 0, _zigzag(value))
+    return _field(1, 2, value.encode("utf-8"))
+
+
+def encode_tile(features):
+    """One MVT layer of point features: [(x, y, properties), ...] in tile coordinates."""
+    keys, values = {}, {}
+    encoded = []
+    for x, y, properties in features:
+        tags = []
+        for key, value in properties.items():
+            tags.append(keys.setdefault(key, len(keys)))
+            tags.append(values.setdefault(value, len(values)))
+        # MoveTo(1) with a single point, relative to the cursor at (0, 0)
+        geometry = [(1 << 3) | 1, _zigzag(x), _zigzag(y)]
+        encoded.append(_field(2, 2, _packed(2, tags) + _field(3, 0, 1) + _packed(4, geometry)))
+
+    layer = _field(15, 0, 2) + _field(1, 2, LAYER_NAME.encode("utf-8"))
+    layer += b"".join(encoded)
+    layer += b"".join(_field(3, 2, key.encode("utf-8")) for key in keys)
+    layer += b"".join(_field(4, 2, _value(value)) for value in values)
+    layer += _field(5, 0, EXTENT)
+    return _field(3, 2, layer)
+
+
+# ---------- Tiling ----------
+def shop_features(records):
+    shops = {}
+    for record in records:
+        lat, lon = record.get("lat"), record.get("lon")
+        if not isinstance(lat, (int, float)) or not isinstance(lon, (int, float)):
+            continue
+        properties = {
+            "id": record["id"],
+            "name": record.get("name"),
+            "city": (record.get("address") or {}).get("city"),
+            "country": record_country(record),
+        }
+        x, y = project(lat, lon)
+        shops[record["id"]] = (x, y, {key: value for key, value in properties.items() if value})
+    return [shops[shop_id] for shop_id in sorted(shops)]
+
+
+def build_tiles(features, min_zoom, max_zoom, spacing=DEFAULT_SPACING):
+    """Yield (z, x, y, tile bytes) for every tile with at least one shop."""
+    cell = spacing * EXTENT / 256
+    for zoom in range(min_zoom, max_zoom + 1):
+        scale = 1 << zoom
+        tiles = {}
+        occupied = set()
+        for wx, wy, properties in features:
+            px, py = wx * scale * EXTENT, wy * scale * EXTENT
+            if zoom < max_zoom and cell > 0:
+                key = (int(px // cell), int(py // cell))
+                if key in occupied:
+                    continue
+                occupied.add(key)
+            tx, ty = int(px // EXTENT), int(py // EXTENT)
+            for nx in (tx - 1, tx, tx + 1):
+                for ny in (ty - 1, ty, ty + 1):
+                    if not (0 <= nx < scale and 0 <= ny < scale):
+                        continue
+                    lx, ly = round(px - nx * EXTENT), round(py - ny * EXTENT)
+                    if -BUFFER <= lx <= EXTENT + BUFFER and -BUFFER <= ly <= EXTENT + BUFFER:
+                        tiles.setdefault((nx, ny), []).append((lx, ly, properties))
+        for (x, y), tile_features in sorted(tiles.items()):
+            yield zoom, x, y, encode_tile(tile_features)
+
+
+# ---------- Output ----------
+class DirectoryWriter:
+    """Tiles as <out>/z/x/y.pbf, uncompressed."""
+
+    def __init__(self, path):
+        self.path = path
+        # Tiles from an earlier build would outlive shops that moved or went away
+        if os.path.exists(os.path.join(path, "metadata.json")):
+            for name in os.listdir(path):
+                if name.isdigit():
+                    shutil.rmtree(os.path.join(path, name))
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, z, x, y, data):
+        directory = os.path.join(self.path, str(z), str(x))
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"{y}.pbf"), "wb") as f:
+            f.write(data)
+
+    def close(self, metadata):
+        with open(os.path.join(self.path, "metadata.json"), "w", encoding="utf-8") as f:
+            json.dump(metadata, f, indent=2)
+
+
+class MBTilesWriter:
+    """Tiles in a single MBTiles (SQLite) file, gzipped as the spec expects."""
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(path):
+            os.remove(path)
+        self.db = sqlite3.connect(path)
+        self.db.execute("CREATE TABLE metadata (name TEXT, value TEXT)")
+        self.db.execute("CREATE TABLE tiles (zoom_level INTEGER, tile_column INTEGER, "
+                        "tile_row INTEGER, tile_data BLOB)")
+        self.db.execute("CREATE UNIQUE INDEX tile_index ON tiles (zoom_level, tile_column, tile_row)")
+
+    def write(self, z, x, y, data):
+        # MBTiles rows count from the bottom (TMS)
+        self.db.execute("INSERT INTO tiles VALUES (?, ?, ?, ?)",
+                        (z, x, (1 << z) - 1 - y, gzip.compress(data, mtime=0)))
+
+    def close(self, metadata):
+        rows = {key: value if isinstance(value, str) else json.dumps(value)
+                for key, value in metadata.items()}
+        self.db.executemany("INSERT INTO metadata VALUES (?, ?)", rows.items())
+        self.db.commit()
+        self.db.close()
+
+
+def tile_metadata(min_zoom, max_zoom):
+    return {
+        "name": "Motorcycle shops",
+        "format": "pbf",
+        "minzoom": str(min_zoom),
+        "maxzoom": str(max_zoom),
+        "json": {"vector_layers": [{
+            "id": LAYER_NAME,
+            "fields": {"id": "Number", "name": "String", "city": "String", "country": "String"},
+            "minzoom": min_zoom,
+            "maxzoom": max_zoom,
+        }]},
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Bake the shop layer into a z/x/y Mapbox Vector Tile pyramid")
+    add_dataset_arguments(parser)
+    parser.add_argument("--out", default=DEFAULT_OUT,
+                        help=f"Output directory, or a .mbtiles file (default: {DEFAULT_OUT})")
+    parser.add_argument("--min-zoom", type=int, default=DEFAULT_MIN_ZOOM,
+                        help=f"Lowest zoom level (default: {DEFAULT_MIN_ZOOM})")
+    parser.add_argument("--max-zoom", type=int, default=DEFAULT_MAX_ZOOM,
+                        help=f"Highest zoom level (default: {DEFAULT_MAX_ZOOM})")
+    parser.add_argument("--spacing", type=float, default=DEFAULT_SPACING,
+                        help=f"Below --max-zoom, drop shops closer than this many pixels to one already "
+                             f"kept; 0 keeps every shop (default: {DEFAULT_SPACING})")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not 0 <= args.min_zoom <= args.max_zoom:
+        print("❌ Need 0 <= --min-zoom <= --max-zoom")
+        exit(1)
+
+    started = time.monotonic()
+    features = shop_features(dataset_from_args(args))
+    if args.out.endswith(".mbtiles"):
+        writer = MBTilesWriter(args.out)
+    else:
+        writer = DirectoryWriter(args.out)
+
+    tiles = total_bytes = largest = 0
+    for z, x, y, data in build_tiles(features, args.min_zoom, args.max_zoom, args.spacing):
+        writer.write(z, x, y, data)
+        tiles += 1
+        total_bytes += len(data)
+        largest = max(largest, len(data))
+    writer.close(tile_metadata(args.min_zoom, args.max_zoom))
+    elapsed = time.monotonic() - started
+
+    print(f"✅ Wrote {tiles} vector tiles for {len(features)} shops to {args.out} in {elapsed:.2f}s")
+    print(f"   {total_bytes / 1024:.0f} KB in total, largest tile {largest / 1024:.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+OPS = ("insert", "update", "delete")
+
+
+def record_hash(record):
+    """Stable content hash of a formatted record (key order doesn't matter)."""
+    body = json.dumps(record, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(body.encode("utf-8")).hexdigest()[:16]
+
+
+class ChangeTracker:
+    """Change data capture between fetch runs.
+
+    `<manifest_dir>/<CC>.json.gz` maps every stored record id of a country to
+    its hash as of the last run. diff() drops records whose hash hasn't
+    changed, so only inserts and updates reach the sink; finish() rebuilds the
+    manifest from what is now stored and reports the ids that disappeared.
+    Every stored change (see log()) and every delete is also appended to a
+    JSONL changeset file for auditing.
+    """
+
+    def __init__(self, manifest_dir, changeset_path):
+        self.manifest_dir = manifest_dir
+        self.changeset_path = changeset_path
+        self._lock = threading.Lock()
+        self._previous = {}
+        self._counts = {}
+        self._changeset = None
+        os.makedirs(manifest_dir, exist_ok=True)
+
+    def manifest_path(self, code):
+        return os.path.join(self.manifest_dir, f"{code}.json.gz")
+
+    def _load(self, code):
+        path = self.manifest_path(code)
+        if not os.path.exists(path):
+            return {}
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return {int(record_id): digest for record_id, digest in json.load(f).items()}
+
+    def _write(self, entries):
+        with self._lock:
+            if self._changeset is None:
+                directory = os.path.dirname(self.changeset_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._changeset = open(self.changeset_path, "a", encoding="utf-8")
+            for entry in entries:
+                self._changeset.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+            self._changeset.flush()
+
+    def begin(self, code):
+        previous = self._load(code)
+        with self._lock:
+            self._previous[code] = previous
+            self._counts[code] = dict.fromkeys(OPS + ("unchanged",), 0)
+
+    def diff(self, code, records):
+        """The records that are new or changed since the last run, as (op, hash, record).
+
+        Unchanged records are only counted. Pass the changes to log() once
+        they are stored, so the changeset never lists a failed upsert.
+        """
+        with self._lock:
+            previous = self._previous[code]
+        changes, unchanged = [], 0
+        for record in records:
+            digest = record_hash(record)
+            old = previous.get(record["id"])
+            if old == digest:
+                unchanged += 1
+                continue
+            changes.append(("insert" if old is None else "update", digest, record))
+        with self._lock:
+            self._counts[code]["unchanged"] += unchanged
+        return changes
+
+    def log(self, code, changes):
+        """Count and append to the changeset the changes from diff() that are now stored."""
+        if not changes:
+            return
+        self._write([{"op": op, "country": code, "id": record["id"], "hash": digest, "record": record}
+                     for op, digest, record in changes])
+        with self._lock:
+            for op, _, _ in changes:
+                self._counts[code][op] += 1
+
+    def finish(self, code, stored_records):
+        """Save the new manifest from the records now stored; returns the deleted ids.
+
+        After an incremental fetch the stored records are the merged snapshot,
+        so nothing counts as deleted unless a full fetch no longer returned it.
+        """
+        manifest = {record["id"]: record_hash(record) for record in stored_records}
+        with self._lock:
+            previous = self._previous.pop(code, {})
+        deleted = sorted(set(previous) - set(manifest))
+        if deleted:
+            self._write([{"op": "delete", "country": code, "id": record_id, "hash": previous[record_id]}
+                         for record_id in deleted])
+        with self._lock:
+            self._counts[code]["delete"] = len(deleted)
+
+        tmp_path = self.manifest_path(code) + ".tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump({str(record_id): digest for record_id, digest in sorted(manifest.items())}, f,
+                      separators=(",", ":"))
+        os.replace(tmp_path, self.manifest_path(code))
+        return deleted
+
+    def counts(self, code):
+        with self._lock:
+            return dict(self._counts.get(code, {}))
+
+    def close(self):
+        with self._lock:
+            if self._changeset:
+                self._changeset.close()
+                self._changeset = None
+
+
+def changeset_path(directory):
+    """A new changeset file name for this run, e.g. <dir>/20250602T101500Z.jsonl."""
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return os.path.join(directory, f"{stamp}.jsonl")
@@ -0,0 +1,98 @@
+import json
+import os
+import threading
+
+# is_done() default: don't care which input the source was finished with
+ANY = object()
+
+
+class Checkpoint:
+    """Append-only journal of how far each source has been stored.
+
+    Every line is a JSON event: `{"source": ..., "offset": n}` once the first
+    n elements of a source are stored, and `{"source": ..., "done": true}`
+    once all of it is. Replaying the journal on start-up gives the point to
+    resume from; an interrupted write only ever loses the last line.
+    `fingerprint` ties entries to a particular input (e.g. a file's size and
+    mtime) so a changed input starts over instead of resuming mid-way.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._sources = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        # Torn last line from a crash
+                        continue
+                    self._apply(event)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._f = open(path, "a", encoding="utf-8")
+
+    def _apply(self, event):
+        state = self._sources.setdefault(event["source"], {"offset": 0, "done": False, "fingerprint": None})
+        if "fingerprint" in event:
+            state.update(offset=0, done=False, fingerprint=event["fingerprint"])
+        if "offset" in event:
+            state["offset"] = max(state["offset"], event["offset"])
+        if event.get("done"):
+            state["done"] = True
+
+    def _write(self, event):
+        with self._lock:
+            self._apply(event)
+            self._f.write(json.dumps(event) + "\n")
+            self._f.flush()
+
+    def start(self, source, fingerprint=None, resume=True):
+        """Begin (or resume) `source`; returns the offset to resume from.
+
+        With `resume=False` the source starts over from offset 0.
+        """
+        with self._lock:
+            state = self._sources.get(source)
+        if state and state["fingerprint"] == fingerprint:
+            if resume or (state["offset"] == 0 and not state["done"]):
+                return state["offset"]
+        self._write({"source": source, "fingerprint": fingerprint})
+        return 0
+
+    def offset(self, source):
+        with self._lock:
+            state = self._sources.get(source)
+            return state["offset"] if state else 0
+
+    def is_done(self, source, fingerprint=ANY):
+        with self._lock:
+            state = self._sources.get(source)
+            if not state or not state["done"]:
+                return False
+            return fingerprint is ANY or state["fingerprint"] == fingerprint
+
+    def rewind(self, source):
+        """Make `source` start over from offset 0 (same fingerprint)."""
+        with self._lock:
+            state = self._sources.get(source)
+        self._write({"source": source, "fingerprint": state["fingerprint"] if state else None})
+
+    def advance(self, source, offset):
+        self._write({"source": source, "offset": offset})
+
+    def complete(self, source):
+        self._write({"source": source, "done": True})
+
+    def reset(self):
+        with self._lock:
+            self._sources = {}
+            self._f.close()
+            self._f = open(self.path, "w", encoding="utf-8")
+
+    def close(self):
+        with self._lock:
+            self._f.close()
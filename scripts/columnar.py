@@ -0,0 +1,287 @@
+import json
+import mmap
+import struct
+import sys
+from array import array
+
+# File layout (all numbers little-endian):
+#   8 bytes   magic
+#   uint32    header length H
+#   H bytes   JSON header: row count and, per column, its kind and sections
+#   padding   up to the next multiple of 8; the data area starts here
+#   ...       8-byte aligned sections; header offsets are relative to the data area
+MAGIC = b"MSHOPCL1"
+ALIGN = 8
+
+# (column name, path into the record) for every dictionary-encoded string column
+STRING_COLUMNS = [
+    ("country_code", ("country_code",)),
+    ("name", ("name",)),
+    ("city", ("address", "city")),
+    ("street", ("address", "street")),
+    ("housenumber", ("address", "housenumber")),
+    ("postcode", ("address", "postcode")),
+    ("phone", ("contact", "phone")),
+    ("website", ("contact", "website")),
+    ("email", ("contact", "email")),
+    ("business_type", ("shop_tags", "business_type")),
+    ("hours", ("shop_tags", "hours")),
+    ("opening_hours", ("shop_tags", "opening_hours")),
+    ("source", ("shop_tags", "source")),
+]
+
+NUMERIC_TYPES = {"int64": "q", "int32": "i", "float32": "f", "float32x2": "f"}
+CODE_TYPES = {1: "B", 2: "H", 4: "I"}
+
+_LITTLE = sys.byteorder == "little"
+
+
+def _get(record, path):
+    value = record
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    if path == ("country_code",) and not value:
+        value = record.get("source_country")
+    return value
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def _to_int(value, missing=-1):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return missing
+
+
+def _code_type(size):
+    # Code 0 means "missing", so a table of `size` strings needs size + 1 codes
+    if size < 0xFF:
+        return "B"
+    if size < 0xFFFF:
+        return "H"
+    return "I"
+
+
+def _data_start(header_len):
+    start = len(MAGIC) + 4 + header_len
+    return start + (-start % ALIGN)
+
+
+class _Sections:
+    def __init__(self):
+        self.size = 0
+        self.parts = []
+
+    def add(self, values):
+        if not _LITTLE and isinstance(values, array):
+            values = array(values.typecode, values)
+            values.byteswap()
+        data = values.tobytes() if isinstance(values, array) else bytes(values)
+        padding = -self.size % ALIGN
+        self.parts.append(b"\0" * padding)
+        self.parts.append(data)
+        offset = self.size + padding
+        self.size = offset + len(data)
+        return {"offset": offset, "length": len(data)}
+
+
+def export_columnar(records, path):
+    """Write records as a columnar file; returns {"rows": n, "bytes": file size}."""
+    ids = array("q")
+    latlon = array("f")
+    rating = array("f")
+    reviews = array("i")
+    tables = {name: {} for name, _ in STRING_COLUMNS}
+    codes = {name: [] for name, _ in STRING_COLUMNS}
+
+    for record in records:
+        ids.append(record["id"])
+        latlon.append(_to_float(record.get("lat")))
+        latlon.append(_to_float(record.get("lon")))
+        rating.append(_to_float(_get(record, ("shop_tags", "rating"))))
+        reviews.append(_to_int(_get(record, ("shop_tags", "reviews_count"))))
+        for name, key_path in STRING_COLUMNS:
+            value = _get(record, key_path)
+            if value is None or value == "":
+                codes[name].append(0)
+                continue
+            table = tables[name]
+            code = table.get(value)
+            if code is None:
+                code = table[value] = len(table) + 1
+            codes[name].append(code)
+
+    sections = _Sections()
+    columns = {
+        "id": dict(kind="int64", **sections.add(ids)),
+        "latlon": dict(kind="float32x2", **sections.add(latlon)),
+        "rating": dict(kind="float32", **sections.add(rating)),
+        "reviews_count": dict(kind="int32", **sections.add(reviews)),
+    }
+    for name, _ in STRING_COLUMNS:
+        # Dicts keep insertion order, so list position + 1 is the code
+        blob = bytearray()
+        offsets = array("I", [0])
+        for value in tables[name]:
+            blob += str(value).encode("utf-8")
+            offsets.append(len(blob))
+        code_type = _code_type(len(tables[name]))
+        columns[name] = {
+            "kind": "dict",
+            "size": len(tables[name]),
+            "code_width": array(code_type).itemsize,
+            "codes": sections.add(array(code_type, codes[name])),
+            "offsets": sections.add(offsets),
+            "strings": sections.add(blob),
+        }
+
+    header = json.dumps({"rows": len(ids), "columns": columns}, separators=(",", ":")).encode("utf-8")
+    prefix = MAGIC + struct.pack("<I", len(header)) + header
+    prefix += b"\0" * (_data_start(len(header)) - len(prefix))
+    with open(path, "wb") as f:
+        f.write(prefix)
+        for part in sections.parts:
+            f.write(part)
+    return {"rows": len(ids), "bytes": len(prefix) + sections.size}
+
+
+# ---------- Loader ----------
+class DictColumn:
+    """A dictionary-encoded string column read straight from the mapped file."""
+
+    def __init__(self, codes, offsets, strings, size):
+        self.codes = codes
+        self.size = size
+        self._offsets = offsets
+        self._strings = strings
+        self._decoded = {}
+
+    def string(self, code):
+        """Entry `code` of the string table (None for code 0)."""
+        if code == 0:
+            return None
+        value = self._decoded.get(code)
+        if value is None:
+            start, end = self._offsets[code - 1], self._offsets[code]
+            value = self._decoded[code] = str(self._strings[start:end], "utf-8")
+        return value
+
+    def strings(self):
+        return [self.string(code) for code in range(1, self.size + 1)]
+
+    def lookup(self, value):
+        """Code of `value` in the string table, or None if no row has it."""
+        for code in range(1, self.size + 1):
+            if self.string(code) == value:
+                return code
+        return None
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, row):
+        return self.string(self.codes[row])
+
+
+class ColumnarDataset:
+    """Memory-mapped reader for files written by export_columnar().
+
+    Numeric columns and dictionary codes are zero-copy views over the mapping;
+    strings are decoded only when looked at.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buf = memoryview(self._mmap)
+        self._views = []
+        self._columns = {}
+        if bytes(self._buf[:len(MAGIC)]) != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a columnar shop file")
+        (header_len,) = struct.unpack_from("<I", self._buf, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.header = json.loads(bytes(self._buf[start:start + header_len]))
+        self.rows = self.header["rows"]
+        self._base = _data_start(header_len)
+
+    def _view(self, section, typecode=None):
+        start = self._base + section["offset"]
+        view = self._buf[start:start + section["length"]]
+        if typecode is None:
+            self._views.append(view)
+            return view
+        if not _LITTLE:
+            values = array(typecode, bytes(view))
+            values.byteswap()
+            return values
+        view = view.cast(typecode)
+        self._views.append(view)
+        return view
+
+    def column(self, name):
+        if name not in self._columns:
+            column = self.header["columns"][name]
+            if column["kind"] == "dict":
+                self._columns[name] = DictColumn(
+                    self._view(column["codes"], CODE_TYPES[column["code_width"]]),
+                    self._view(column["offsets"], "I"),
+                    self._view(column["strings"]),
+                    column["size"],
+                )
+            else:
+                self._columns[name] = self._view(column, NUMERIC_TYPES[column["kind"]])
+        return self._columns[name]
+
+    @property
+    def ids(self):
+        return self.column("id")
+
+    @property
+    def latlon(self):
+        """Interleaved float32 [lat0, lon0, lat1, lon1, ...]; NaN where unknown."""
+        return self.column("latlon")
+
+    def row(self, index):
+        latlon = self.latlon
+        row = {
+            "id": self.ids[index],
+            "lat": latlon[2 * index],
+            "lon": latlon[2 * index + 1],
+            "rating": self.column("rating")[index],
+            "reviews_count": self.column("reviews_count")[index],
+        }
+        for name, _ in STRING_COLUMNS:
+            row[name] = self.column(name)[index]
+        return row
+
+    def __len__(self):
+        return self.rows
+
+    def __iter__(self):
+        for index in range(self.rows):
+            yield self.row(index)
+
+    def close(self):
+        # Every view has to be released before the mapping can be closed
+        for view in self._views:
+            view.release()
+        self._views = []
+        self._columns = {}
+        self._buf.release()
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
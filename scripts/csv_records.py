@@ -0,0 +1,122 @@
+import csv
+import hashlib
+import os
+
+# CSV exports shipped with the frontend
+DEFAULT_CSV_FILES = [
+    os.path.join("public", "data", "eu_motorcycle_repairs.csv"),
+    os.path.join("public", "data", "motorcycle_shops.csv"),
+]
+
+# Country names as they appear in the scraped "City, Country" column.
+# Greece is EL to match EU_COUNTRIES and the frontend country list.
+COUNTRY_CODES = {
+    "Austria": "AT", "Belgium": "BE", "Bulgaria": "BG", "Croatia": "HR",
+    "Cyprus": "CY", "Czech Republic": "CZ", "Czechia": "CZ", "Denmark": "DK",
+    "Estonia": "EE", "Finland": "FI", "France": "FR", "Germany": "DE",
+    "Greece": "EL", "Hungary": "HU", "Ireland": "IE", "Italy": "IT",
+    "Latvia": "LV", "Lithuania": "LT", "Luxembourg": "LU", "Malta": "MT",
+    "Netherlands": "NL", "Poland": "PL", "Portugal": "PT", "Romania": "RO",
+    "Slovakia": "SK", "Slovenia": "SI", "Spain": "ES", "Sweden": "SE",
+    "Norway": "NO", "Switzerland": "CH", "United Kingdom": "GB",
+}
+
+# Placeholders the scraper writes for missing values
+MISSING = {"", "N/A", "n/a", "None"}
+
+# Scraped columns that have no place in address/contact; kept in shop_tags
+EXTRA_TAGS = ("business_type", "rating", "reviews_count", "hours", "place_id", "scraped_at")
+
+
+def clean(value):
+    if value is None:
+        return None
+    value = value.strip()
+    return None if value in MISSING else value
+
+
+def to_float(value):
+    value = clean(value)
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def place_id_to_id(place_id):
+    """Stable bigint id for a Google place_id.
+
+    Negative so it can never collide with an OSM node id in the same table,
+    and at most 53 bits so JavaScript (and supabase-js) can hold it exactly.
+    """
+    digest = hashlib.sha1(place_id.encode("utf-8")).digest()
+    return -(int.from_bytes(digest[:7], "big") >> 3) or -1
+
+
+def split_city(value):
+    """Split the scraped "City, Country" column into (city, country_code)."""
+    value = clean(value)
+    if not value:
+        return None, None
+    if "," not in value:
+        return value, None
+    city, country = value.rsplit(",", 1)
+    return clean(city), COUNTRY_CODES.get(country.strip())
+
+
+def csv_row_to_record(row):
+    """Turn one CSV row into the record shape format_records produces.
+
+    Handles both the scraped Google Places export (place_id, latitude,
+    longitude, "City, Country") and the simple sample layout (id, lat, lon,
+    country_code, street, ...). Returns None for rows without an id.
+    """
+    if clean(row.get("place_id")):
+        record_id = place_id_to_id(row["place_id"].strip())
+        city, country_code = split_city(row.get("city"))
+        tags = {"source": "google_places"}
+        for key in EXTRA_TAGS:
+            value = clean(row.get(key))
+            if value is not None:
+                tags[key] = value
+        street = clean(row.get("address"))
+        lat, lon = to_float(row.get("latitude")), to_float(row.get("longitude"))
+    else:
+        raw_id = clean(row.get("id"))
+        if raw_id is None or not raw_id.lstrip("-").isdigit():
+            return None
+        record_id = int(raw_id)
+        city = clean(row.get("city"))
+        country_code = clean(row.get("country_code"))
+        tags = {"source": "csv"}
+        street = clean(row.get("street"))
+        lat, lon = to_float(row.get("lat")), to_float(row.get("lon"))
+
+    return {
+        "id": record_id,
+        "country_code": country_code,
+        "name": clean(row.get("name")),
+        "lat": lat,
+        "lon": lon,
+        "address": {
+            "city": city,
+            "street": street,
+            "housenumber": clean(row.get("housenumber")),
+            "postcode": clean(row.get("postcode")),
+            "suburb": None
+        },
+        "contact": {
+            "phone": clean(row.get("phone")),
+            "fax": None,
+            "website": clean(row.get("website")),
+            "email": clean(row.get("email"))
+        },
+        "shop_tags": tags,
+        "source_country": country_code
+    }
+
+
+def iter_csv_rows(path):
+    """Stream rows of a CSV file as dicts, one at a time."""
+    with open(path, newline="", encoding="utf-8") as f:
+        yield from csv.DictReader(f)
@@ -0,0 +1,54 @@
+import os
+from csv_records import DEFAULT_CSV_FILES, csv_row_to_record, iter_csv_rows
+from snapshot import SnapshotStore
+from fetch_osm_data import DEFAULT_SNAPSHOT_DIR
+
+
+def iter_dataset(snapshot_dir=DEFAULT_SNAPSHOT_DIR, csv_files=DEFAULT_CSV_FILES):
+    """Yield every known shop record: the local OSM snapshot, then the CSV files.
+
+    All records have the format_records shape, whichever source they come from.
+    """
+    if snapshot_dir and os.path.isdir(snapshot_dir):
+        yield from SnapshotStore(snapshot_dir)
+    for path in csv_files or []:
+        for row in iter_csv_rows(path):
+            record = csv_row_to_record(row)
+            if record is not None:
+                yield record
+
+
+def dataset_from_args(args):
+    """The records selected by add_dataset_arguments() options."""
+    records = iter_dataset(args.snapshot_dir, args.csv)
+    if getattr(args, "dedup", False):
+        from dedup import resolve
+        records, _ = resolve(records)
+    return records
+
+
+def add_dataset_arguments(parser, dedup=True):
+    """Input options; pass dedup=False where the script already merges duplicates."""
+    parser.add_argument("--snapshot-dir", default=DEFAULT_SNAPSHOT_DIR,
+                        help=f"OSM records written by fetch_osm_data.py (default: {DEFAULT_SNAPSHOT_DIR})")
+    parser.add_argument("--csv", nargs="*", default=DEFAULT_CSV_FILES, metavar="FILE",
+                        help="CSV files to include (default: the files in public/data; pass none to skip)")
+    if dedup:
+        parser.add_argument("--dedup", action="store_true",
+                            help="Merge shops that appear in more than one source (see dedup_shops.py)")
+
+
+def record_country(record):
+    return record.get("country_code") or record.get("source_country")
+
+
+def compact(value):
+    """Drop None values and empty containers to keep exported JSON small."""
+    if isinstance(value, dict):
+        result = {}
+        for key, item in value.items():
+            item = compact(item)
+            if item is not None and item != {} and item != []:
+                result[key] = item
+        return result
+    return value
@@ -0,0 +1,223 @@
+import re
+import unicodedata
+from difflib import SequenceMatcher
+from urllib.parse import urlparse
+from spatial_index import SpatialIndex, haversine_km
+
+# Shops closer than this are compared; OSM and Google pins for the same
+# shop are usually within a few dozen metres of each other
+DEFAULT_RADIUS_KM = 0.25
+# Same normalized name counts as a candidate up to this distance
+NAME_BLOCK_KM = 2.0
+DEFAULT_THRESHOLD = 0.55
+
+# Words that say nothing about which shop it is
+NAME_STOPWORDS = {
+    "the", "and", "und", "et", "de", "du", "des", "la", "le", "les", "di", "da", "del", "der", "die", "das",
+    "gmbh", "ag", "kg", "ohg", "ug", "mbh", "sarl", "sas", "sa", "srl", "spa", "snc", "sl", "slu", "bv",
+    "nv", "vof", "ltd", "limited", "llc", "inc", "oy", "ab", "as", "aps", "sro", "kft", "zoo", "doo", "ood",
+    "co", "cie", "company",
+}
+
+
+def fold(text):
+    """Lowercase and strip accents: "Moto Rêve" -> "moto reve"."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def tokens(text):
+    # Letters and digits of any script, so Greek and Bulgarian names count too
+    return re.findall(r"[^\W_]+", fold(text or ""))
+
+
+def name_tokens(name):
+    return [token for token in tokens(name) if token not in NAME_STOPWORDS]
+
+
+def name_key(name):
+    """Blocking key: the distinctive name words, sorted."""
+    return " ".join(sorted(set(name_tokens(name))))
+
+
+def phone_key(phone):
+    # Last 9 digits ignore the country prefix and trunk 0 ("+33 1 ..." vs "01 ...")
+    digits = re.sub(r"\D", "", phone or "")
+    return digits[-9:] if len(digits) >= 6 else None
+
+
+def website_key(url):
+    if not url:
+        return None
+    host = urlparse(url if "//" in url else "//" + url).hostname or ""
+    host = host.lower()
+    return host[4:] if host.startswith("www.") else host or None
+
+
+def _jaccard(a, b):
+    a, b = set(a), set(b)
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _field(record, group, key):
+    return (record.get(group) or {}).get(key)
+
+
+def _has_coords(record):
+    return isinstance(record.get("lat"), (int, float)) and isinstance(record.get("lon"), (int, float))
+
+
+def _address_tokens(record):
+    address = record.get("address") or {}
+    return tokens(" ".join(str(address.get(key) or "") for key in ("street", "housenumber", "postcode")))
+
+
+def score_pair(a, b):
+    """(score 0..1, [reasons]) for how likely two records are the same shop."""
+    reasons = []
+    name_a, name_b = name_key(a.get("name")), name_key(b.get("name"))
+    name = max(_jaccard(name_a.split(), name_b.split()),
+               SequenceMatcher(None, name_a, name_b).ratio() if name_a and name_b else 0.0)
+    score = 0.4 * name
+    if name >= 0.8:
+        reasons.append("name")
+
+    if _has_coords(a) and _has_coords(b):
+        distance = haversine_km(a["lat"], a["lon"], b["lat"], b["lon"])
+        score += 0.2 * max(0.0, 1 - distance / NAME_BLOCK_KM) ** 2
+        if distance <= DEFAULT_RADIUS_KM:
+            reasons.append("location")
+    else:
+        score += 0.1
+
+    phone_a, phone_b = phone_key(_field(a, "contact", "phone")), phone_key(_field(b, "contact", "phone"))
+    if phone_a and phone_b:
+        if phone_a == phone_b:
+            score += 0.25
+            reasons.append("phone")
+        else:
+            score -= 0.15
+
+    site_a, site_b = website_key(_field(a, "contact", "website")), website_key(_field(b, "contact", "website"))
+    if site_a and site_a == site_b:
+        score += 0.2
+        reasons.append("website")
+
+    address = _jaccard(_address_tokens(a), _address_tokens(b))
+    score += 0.15 * address
+    if address >= 0.5:
+        reasons.append("address")
+    # Location and address alone can't tell neighbours in one building apart
+    if not {"name", "phone", "website"} & set(reasons):
+        score *= 0.6
+    return max(0.0, min(1.0, score)), reasons
+
+
+def candidate_pairs(records, radius_km=DEFAULT_RADIUS_KM):
+    """Index pairs (i < j) worth scoring.
+
+    Two blocking passes keep this close to linear instead of comparing
+    every pair: shops within radius_km of each other (via the R-tree), and
+    shops in the same country with the same normalized name.
+    """
+    pairs = set()
+    position = {record["id"]: i for i, record in enumerate(records)}
+    index = SpatialIndex.build(records)
+    for i, record in enumerate(records):
+        if not _has_coords(record):
+            continue
+        for other_id, _ in index.within_radius(record["lat"], record["lon"], radius_km):
+            j = position[other_id]
+            if i < j:
+                pairs.add((i, j))
+
+    blocks = {}
+    for i, record in enumerate(records):
+        key = name_key(record.get("name"))
+        if key:
+            country = record.get("country_code") or record.get("source_country")
+            blocks.setdefault((country, key), []).append(i)
+    for members in blocks.values():
+        # A chain name shared by hundreds of shops is not evidence of anything
+        if len(members) > 50:
+            continue
+        for x, i in enumerate(members):
+            for j in members[x + 1:]:
+                a, b = records[i], records[j]
+                if (_has_coords(a) and _has_coords(b)
+                        and haversine_km(a["lat"], a["lon"], b["lat"], b["lon"]) > NAME_BLOCK_KM):
+                    continue
+                pairs.add((min(i, j), max(i, j)))
+    return sorted(pairs)
+
+
+def _find(parent, i):
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def merge_group(group):
+    """Fold duplicate records into one, keeping an OSM record as the base when there is one.
+
+    OSM ids are positive and stable, so they stay the canonical id; empty
+    fields are filled from the other records and their ids are kept in
+    shop_tags["merged_ids"].
+    """
+    def completeness(record):
+        filled = sum(1 for group_name in ("address", "contact")
+                     for value in (record.get(group_name) or {}).values() if value)
+        return (record["id"] > 0, filled, -abs(record["id"]))
+
+    ordered = sorted(group, key=completeness, reverse=True)
+    base = ordered[0]
+    merged = dict(base)
+    for key in ("address", "contact"):
+        merged[key] = dict(base.get(key) or {})
+    merged["shop_tags"] = dict(base.get("shop_tags") or {})
+    for other in ordered[1:]:
+        for key in ("name", "lat", "lon", "country_code", "source_country"):
+            if merged.get(key) in (None, "") and other.get(key) not in (None, ""):
+                merged[key] = other[key]
+        for key in ("address", "contact"):
+            for field, value in (other.get(key) or {}).items():
+                if value and not merged[key].get(field):
+                    merged[key][field] = value
+        for tag, value in (other.get("shop_tags") or {}).items():
+            # "source" describes where the base record came from
+            if tag != "source":
+                merged["shop_tags"].setdefault(tag, value)
+    merged["shop_tags"]["merged_ids"] = ";".join(str(record["id"]) for record in ordered[1:])
+    return merged
+
+
+def resolve(records, radius_km=DEFAULT_RADIUS_KM, threshold=DEFAULT_THRESHOLD):
+    """Merge duplicate shops.
+
+    Returns (canonical records, matches), where matches lists
+    (id_a, id_b, score, reasons) for every pair that was merged.
+    """
+    by_id = {}
+    for record in records:
+        by_id[record["id"]] = record
+    records = [by_id[record_id] for record_id in sorted(by_id)]
+
+    parent = list(range(len(records)))
+    matches = []
+    for i, j in candidate_pairs(records, radius_km):
+        score, reasons = score_pair(records[i], records[j])
+        if score >= threshold:
+            matches.append((records[i]["id"], records[j]["id"], round(score, 3), reasons))
+            root_i, root_j = _find(parent, i), _find(parent, j)
+            if root_i != root_j:
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    groups = {}
+    for i in range(len(records)):
+        groups.setdefault(_find(parent, i), []).append(records[i])
+    canonical = [group[0] if len(group) == 1 else merge_group(group) for group in groups.values()]
+    canonical.sort(key=lambda record: record["id"])
+    return canonical, matches
@@ -0,0 +1,54 @@
+import os
+import gzip
+import json
+import time
+import argparse
+from dataset import iter_dataset, add_dataset_arguments
+from dedup import resolve, DEFAULT_RADIUS_KM, DEFAULT_THRESHOLD
+
+DEFAULT_OUT = os.path.join(".osm", "canonical.jsonl.gz")
+DEFAULT_REPORT = os.path.join(".osm", "dedup_report.json")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Merge shops that appear both in OSM and in the scraped Google Places data")
+    add_dataset_arguments(parser, dedup=False)
+    parser.add_argument("--radius", type=float, default=DEFAULT_RADIUS_KM,
+                        help=f"Compare shops within this many km of each other (default: {DEFAULT_RADIUS_KM})")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Minimum match score, 0..1 (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument("--out", default=DEFAULT_OUT,
+                        help=f"Merged records, one JSON per line (default: {DEFAULT_OUT})")
+    parser.add_argument("--report", default=DEFAULT_REPORT,
+                        help=f"Every merged pair with its score (default: {DEFAULT_REPORT})")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    started = time.monotonic()
+    records = list(iter_dataset(args.snapshot_dir, args.csv))
+    canonical, matches = resolve(records, args.radius, args.threshold)
+    elapsed = time.monotonic() - started
+
+    for path in (args.out, args.report):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    with gzip.open(args.out, "wt", encoding="utf-8") as f:
+        for record in canonical:
+            f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+    names = {record["id"]: record.get("name") for record in records}
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump([{"a": a, "b": b, "name_a": names.get(a), "name_b": names.get(b),
+                    "score": score, "reasons": reasons}
+                   for a, b, score, reasons in matches], f, ensure_ascii=False, indent=2)
+
+    print(f"✅ {len(records)} records -> {len(canonical)} shops "
+          f"({len(records) - len(canonical)} duplicates merged) in {elapsed:.2f}s")
+    print(f"   Merged records: {args.out}")
+    print(f"   Match report:   {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,28 @@
 import os
 import json
 import time
+import asyncio
+import argparse
+import httpx
 import requests
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from supabase import create_client, Client
 from dotenv import load_dotenv
+from rate_limiter import TokenBucket
+from sync_state import SyncState
+from snapshot import SnapshotStore
+from shop_record import ShopRecord, TagProjection, DEFAULT_TAG_PATTERNS
+from changes import ChangeTracker, changeset_path
+from checkpoint import Checkpoint
+from pipeline import Pipeline
+from async_pipeline import AsyncPipeline
+from async_http import AsyncRetryingSession, StreamedBody
+from sinks import NullSink, SupabaseSink, PostgrestSink, AdaptiveSink, AdaptiveBatchSize
+from tiling import COUNTRY_BBOXES, grid, split
+from overpass_stream import ElementStream, OverpassError, iter_file_chunks, CHUNK_SIZE
+from overpass_cache import ResponseCache, query_key, DEFAULT_TTL, DEFAULT_MAX_BYTES
+from http_session import RetryingSession, DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT
 
 # Load environment variables from .env.local (same as Next.js)
 load_dotenv('.env.local')
@@ -13,45 +32,48 @@ load_dotenv('.env.local')
 SUPABASE_URL = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
 SUPABASE_KEY = os.getenv("NEXT_PUBLIC_SUPABASE_ANON_KEY")
 
-# Validate credentials
-if not SUPABASE_URL or SUPABASE_URL == "https://placeholder.supabase.co":
-    print("")
-    print("❌ ERROR: Please set your actual Supabase credentials in .env.local")
-    print("")
-    print("📝 Steps to fix:")
-    print("   1. Go to https://supabase.com")
-    print("   2. Select your project")
-    print("   3. Go to Settings → API")
-    print("   4. Copy 'Project URL' and 'anon public' key")
-    print("   5. Update .env.local with your actual values")
-    print("")
-    exit(1)
 
-if not SUPABASE_KEY or "placeholder" in SUPABASE_KEY:
-    print("")
-    print("❌ ERROR: Please set your actual Supabase ANON key in .env.local")
-    print("")
-    print("📝 Steps to fix:")
-    print("   1. Go to https://supabase.com → Your Project → Settings → API")
-    print("   2. Copy the 'anon public' key")
-    print("   3. Update NEXT_PUBLIC_SUPABASE_ANON_KEY in .env.local")
+def connect_supabase():
+    # Validate credentials
+    if not SUPABASE_URL or SUPABASE_URL == "https://placeholder.supabase.co":
+        print("")
+        print("❌ ERROR: Please set your actual Supabase credentials in .env.local")
+        print("")
+        print("📝 Steps to fix:")
+        print("   1. Go to https://supabase.com")
+        print("   2. Select your project")
+        print("   3. Go to Settings → API")
+        print("   4. Copy 'Project URL' and 'anon public' key")
+        print("   5. Update .env.local with your actual values")
+        print("")
+        exit(1)
+
+    if not SUPABASE_KEY or "placeholder" in SUPABASE_KEY:
+        print("")
+        print("❌ ERROR: Please set your actual Supabase ANON key in .env.local")
+        print("")
+        print("📝 Steps to fix:")
+        print("   1. Go to https://supabase.com → Your Project → Settings → API")
+        print("   2. Copy the 'anon public' key")
+        print("   3. Update NEXT_PUBLIC_SUPABASE_ANON_KEY in .env.local")
+        print("")
+        exit(1)
+
+    print("=" * 60)
+    print("🏍️  Motorcycle Shop Data Fetcher")
+    print("=" * 60)
+    print(f"✅ Supabase URL: {SUPABASE_URL}")
+    print(f"✅ Supabase Key: {SUPABASE_KEY[:20]}...")
     print("")
-    exit(1)
-
-print("=" * 60)
-print("🏍️  Motorcycle Shop Data Fetcher")
-print("=" * 60)
-print(f"✅ Supabase URL: {SUPABASE_URL}")
-print(f"✅ Supabase Key: {SUPABASE_KEY[:20]}...")
-print("")
-
-try:
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-    print("✅ Connected to Supabase successfully")
-except Exception as e:
-    print(f"❌ Failed to connect to Supabase: {e}")
-    print("   Please check your credentials in .env.local")
-    exit(1)
+
+    try:
+        supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        print("✅ Connected to Supabase successfully")
+    except Exception as e:
+        print(f"❌ Failed to connect to Supabase: {e}")
+        print("   Please check your credentials in .env.local")
+        exit(1)
+    return supabase
 
 # ---------- EU country codes ----------
 EU_COUNTRIES = [
@@ -60,108 +82,623 @@ EU_COUNTRIES = [
     "CY", "LU", "MT", "EL"
 ]
 
-print(f"📍 Fetching data for {len(EU_COUNTRIES)} EU countries")
-print("")
+# Overpass allows a couple of concurrent slots per client; stay below that
+DEFAULT_WORKERS = 2
+# Shared request budget across all workers (one request every 5s on average)
+DEFAULT_RATE = 0.2
+DEFAULT_BURST = 2
+# Upsert batch size starts here and adapts between MIN and MAX to stay under
+# the target latency; batches buffered between pipeline stages
+DEFAULT_BATCH_SIZE = 100
+MIN_BATCH_SIZE = 10
+DEFAULT_MAX_BATCH_SIZE = 1000
+DEFAULT_TARGET_LATENCY = 2.0
+DEFAULT_UPSERT_WORKERS = 2
+DEFAULT_QUEUE_SIZE = 8
+# Tiling for dense countries: tile edge in degrees and tiles fetched in parallel
+DEFAULT_TILE_SIZE = 2.0
+DEFAULT_TILE_WORKERS = 2
+# Cooldown applied to every worker after a failed country
+ERROR_COOLDOWN = 20
+
+# Local run state (sync timestamps etc.), relative to the project root
+STATE_DIR = ".osm"
+DEFAULT_SYNC_STATE = os.path.join(STATE_DIR, "sync_state.json")
+DEFAULT_CACHE_DIR = os.path.join(STATE_DIR, "cache")
+DEFAULT_CHECKPOINT = os.path.join(STATE_DIR, "fetch_checkpoint.jsonl")
+DEFAULT_SNAPSHOT_DIR = os.path.join(STATE_DIR, "snapshot")
+DEFAULT_MANIFEST_DIR = os.path.join(STATE_DIR, "manifest")
+DEFAULT_CHANGESET_DIR = os.path.join(STATE_DIR, "changesets")
 
 # ---------- Helper function to fetch data ----------
-def fetch_overpass_data(country_code):
-    url = "https://overpass-api.de/api/interpreter"
-    query = f"""
+OVERPASS_URL = "https://overpass-api.de/api/interpreter"
+
+
+def build_overpass_query(country_code, since=None, bbox=None):
+    # With `since`, only ask for elements created or modified after that timestamp;
+    # with `bbox` (south, west, north, east), only for the part of the country inside it
+    filters = ""
+    if bbox:
+        filters += "({},{},{},{})".format(*bbox)
+    if since:
+        filters += f'(newer:"{since}")'
+    return f"""
     [out:json][timeout:60];
     area["ISO3166-1"="{country_code}"][admin_level=2];
     (
-      node["shop"="motorcycle"](area);
-      node["craft"="motorcycle"](area);
-      node["amenity"="car_repair"]["motorcycle"="yes"](area);
+      node["shop"="motorcycle"](area){filters};
+      node["craft"="motorcycle"](area){filters};
+      node["amenity"="car_repair"]["motorcycle"="yes"](area){filters};
     );
     out center;
     """
-    print(f"🔍 Fetching {country_code}...", end=" ", flush=True)
-    response = requests.get(url, params={'data': query})
-    response.raise_for_status()
-    return response.json()
+
+
+def _response_chunks(chunks, pending=None, close=None):
+    # Tee the body into the cache while it is parsed. ElementStream only reads
+    # to the end of a complete response without an error remark, so only those
+    # are committed; a stream that is closed or dropped earlier aborts the entry
+    try:
+        for chunk in chunks:
+            if pending:
+                pending.write(chunk)
+            yield chunk
+        if pending:
+            pending.commit()
+            pending = None
+    finally:
+        if pending:
+            pending.abort()
+        if close:
+            close()
+
+
+def _cached_or_announce(query, label, since, cache, offline):
+    """ElementStream over a cached response, or None after announcing the download."""
+    if cache:
+        cached = cache.open(query)
+        if cached is not None:
+            print(f"📦 {label}: Using cached response", flush=True)
+            return ElementStream(iter_file_chunks(cached))
+    if offline:
+        raise LookupError(f"no cached response for {label} (offline mode)")
+
+    if since:
+        print(f"🔍 Fetching {label} (changes since {since})...", flush=True)
+    else:
+        print(f"🔍 Fetching {label}...", flush=True)
+    return None
+
+
+def _label(country_code, bbox):
+    if bbox:
+        return country_code + " tile ({:g},{:g},{:g},{:g})".format(*bbox)
+    return country_code
+
+
+def fetch_overpass_data(session, country_code, since=None, cache=None, offline=False, bbox=None,
+                        url=OVERPASS_URL):
+    """Return an ElementStream over the Overpass response for one country (or tile of it)."""
+    query = build_overpass_query(country_code, since, bbox)
+    cached = _cached_or_announce(query, _label(country_code, bbox), since, cache, offline)
+    if cached is not None:
+        return cached
+    response = session.get(url, params={'data': query}, stream=True)
+    pending = cache.begin(query) if cache else None
+    return ElementStream(_response_chunks(response.iter_content(CHUNK_SIZE), pending, response.close))
+
+
+async def fetch_overpass_data_async(session, country_code, since=None, cache=None, offline=False, bbox=None,
+                                    url=OVERPASS_URL):
+    """fetch_overpass_data on an AsyncRetryingSession.
+
+    Returns once the response headers are in. The body keeps downloading
+    on the event loop, a few chunks ahead of the worker thread that
+    iterates (and so parses) the stream.
+    """
+    query = build_overpass_query(country_code, since, bbox)
+    cached = _cached_or_announce(query, _label(country_code, bbox), since, cache, offline)
+    if cached is not None:
+        return cached
+    body = await StreamedBody(session, "GET", url, CHUNK_SIZE, params={'data': query}).open()
+    pending = cache.begin(query) if cache else None
+    return ElementStream(_response_chunks(body, pending, body.close))
+
+def _is_overloaded(error):
+    # Failures that a smaller area is likely to avoid
+    if isinstance(error, OverpassError):
+        message = str(error).lower()
+        return "timed out" in message or "out of memory" in message
+    if isinstance(error, (requests.Timeout, httpx.TimeoutException)):
+        return True
+    if isinstance(error, (requests.HTTPError, httpx.HTTPStatusError)) and error.response is not None:
+        return error.response.status_code == 504
+    return False
+
+
+def _older_meta(current, meta):
+    # Keep the meta with the oldest data timestamp
+    timestamp = meta.get("osm3s", {}).get("timestamp_osm_base")
+    current_timestamp = current.get("osm3s", {}).get("timestamp_osm_base")
+    if timestamp and (current_timestamp is None or timestamp < current_timestamp):
+        return meta
+    return current
+
+
+class TiledStream:
+    """Elements of one country fetched as a grid of bbox tiles in parallel.
+
+    Tiles are yielded in grid order, so a given set of responses always
+    produces the same sequence. A tile that times out is split into
+    quadrants (up to `max_depth` times) and those are fetched in its place.
+    Nodes on a shared tile edge come back twice and are dropped by OSM id.
+    `meta` mirrors ElementStream; its data timestamp is the oldest one of
+    all tiles so an incremental sync never skips past a tile's data.
+    """
+
+    def __init__(self, session, country_code, since, cache, offline, bbox, tile_size,
+                 workers=2, max_depth=3, url=OVERPASS_URL):
+        self.session = session
+        self.url = url
+        self.country_code = country_code
+        self.since = since
+        self.cache = cache
+        self.offline = offline
+        self.tiles = grid(bbox, tile_size)
+        self.workers = workers
+        self.max_depth = max_depth
+        self.meta = {}
+
+    def _fetch_tile(self, bbox, depth):
+        try:
+            stream = fetch_overpass_data(self.session, self.country_code, self.since,
+                                         self.cache, self.offline, bbox, self.url)
+            return list(stream), stream.meta, []
+        except Exception as e:
+            if depth >= self.max_depth or not _is_overloaded(e):
+                raise
+            print(f"✂️  {self.country_code}: Splitting tile {bbox} ({e})", flush=True)
+            return [], {}, split(bbox)
+
+    def _merge_meta(self, meta):
+        self.meta = _older_meta(self.meta, meta)
+
+    def __iter__(self):
+        seen = set()
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as pool:
+            pending = deque((pool.submit(self._fetch_tile, tile, 0), 0) for tile in self.tiles)
+            try:
+                while pending:
+                    future, depth = pending.popleft()
+                    elements, meta, subtiles = future.result()
+                    # Subtiles take the place of their parent to keep the order stable
+                    for subtile in reversed(subtiles):
+                        pending.appendleft((pool.submit(self._fetch_tile, subtile, depth + 1), depth + 1))
+                    self._merge_meta(meta)
+                    for element in elements:
+                        if element["id"] not in seen:
+                            seen.add(element["id"])
+                            yield element
+            finally:
+                for future, _ in pending:
+                    future.cancel()
+
+class ElementList(list):
+    """Elements with the `meta` of their response, like a fully read ElementStream."""
+
+    def __init__(self, elements=(), meta=None):
+        super().__init__(elements)
+        self.meta = meta or {}
+
+
+async def fetch_tiles_async(session, country_code, since, cache, offline, bbox, tile_size, workers=2,
+                            max_depth=3, url=OVERPASS_URL):
+    """TiledStream on the event loop: up to `workers` tiles download at once.
+
+    Tiles come back in grid order, overloaded tiles are split into
+    quadrants and shared-edge duplicates are dropped, as in TiledStream.
+    """
+    slots = asyncio.Semaphore(max(1, workers))
+
+    async def fetch_tile(tile, depth):
+        async with slots:
+            try:
+                stream = await fetch_overpass_data_async(session, country_code, since, cache, offline, tile, url)
+                # Parse in a thread; the loop keeps serving the other tiles
+                elements = await asyncio.to_thread(list, stream)
+                return [(elements, stream.meta)]
+            except Exception as e:
+                if depth >= max_depth or not _is_overloaded(e):
+                    raise
+                print(f"✂️  {country_code}: Splitting tile {tile} ({e})", flush=True)
+        # Outside the slot, or the quadrants could wait on their parent forever
+        parts = await asyncio.gather(*(fetch_tile(subtile, depth + 1) for subtile in split(tile)))
+        return [part for quadrant in parts for part in quadrant]
+
+    tiles = await asyncio.gather(*(fetch_tile(tile, 0) for tile in grid(bbox, tile_size)))
+    result = ElementList()
+    seen = set()
+    for parts in tiles:
+        for elements, meta in parts:
+            result.meta = _older_meta(result.meta, meta)
+            for element in elements:
+                if element["id"] not in seen:
+                    seen.add(element["id"])
+                    result.append(element)
+    return result
+
 
 # ---------- Helper to format data ----------
-def format_records(data, country_code):
-    records = []
-    for element in data.get("elements", []):
-        tags = element.get("tags", {})
-        if not tags:
-            continue
+# Only these tags go into shop_tags; pass projection=None to keep all of them
+DEFAULT_PROJECTION = TagProjection(DEFAULT_TAG_PATTERNS)
+
+
+def format_element(element, country_code, projection=DEFAULT_PROJECTION):
+    record = ShopRecord.from_element(element, country_code, projection)
+    return record.to_row() if record is not None else None
+
+
+def iter_records(elements, country_code, projection=DEFAULT_PROJECTION):
+    """Compact ShopRecords for the elements that have tags."""
+    for element in elements:
+        record = ShopRecord.from_element(element, country_code, projection)
+        if record is not None:
+            yield record
+
+
+def format_records(data, country_code, projection=DEFAULT_PROJECTION):
+    return [record.to_row() for record in iter_records(data.get("elements", []), country_code, projection)]
+
+
+# ---------- Pipeline stages ----------
+def make_sink(args, dry_run=False):
+    if dry_run:
+        sink = NullSink()
+    elif args.sink == "postgrest":
+        base_url = args.sink_url or (f"{SUPABASE_URL}/rest/v1" if SUPABASE_URL else None)
+        if not base_url:
+            print("❌ --sink postgrest needs --sink-url or NEXT_PUBLIC_SUPABASE_URL")
+            exit(1)
+        print(f"✅ Upserting via PostgREST: {base_url}")
+        sink = PostgrestSink(base_url, SUPABASE_KEY, pool_size=args.upsert_workers)
+    else:
+        sink = SupabaseSink(connect_supabase())
+    batch_size = AdaptiveBatchSize(initial=args.batch_size, minimum=MIN_BATCH_SIZE,
+                                   maximum=args.max_batch_size, target_latency=args.target_latency)
+    return AdaptiveSink(sink, batch_size)
+
+
+def make_stages(sink, session, sinces, cache=None, offline=False, tiled=(), tile_size=DEFAULT_TILE_SIZE,
+                tile_workers=DEFAULT_TILE_WORKERS, snapshot=None, tracker=None, overpass_url=OVERPASS_URL,
+                projection=DEFAULT_PROJECTION):
+    def fetch(code):
+        if code in tiled:
+            return TiledStream(session, code, sinces[code], cache, offline, COUNTRY_BBOXES[code],
+                               tile_size, tile_workers, url=overpass_url)
+        return fetch_overpass_data(session, code, sinces[code], cache, offline, url=overpass_url)
+
+    async def fetch_async(code):
+        if code in tiled:
+            return await fetch_tiles_async(session, code, sinces[code], cache, offline, COUNTRY_BBOXES[code],
+                                           tile_size, tile_workers, url=overpass_url)
+        return await fetch_overpass_data_async(session, code, sinces[code], cache, offline, url=overpass_url)
+
+    def transform(code, elements):
+        return list(iter_records(elements, code, projection))
+
+    def store(code, records):
+        # Records travel through the pipeline compact; rows are built only here
+        rows = [record.to_row() for record in records]
+        # Only rows that changed since the last run need to reach the table
+        if tracker:
+            changes = tracker.diff(code, rows)
+            if changes:
+                sink.upsert([record for _, _, record in changes])
+            # The changeset only lists what the sink accepted
+            tracker.log(code, changes)
+        elif rows:
+            sink.upsert(rows)
+        # Keep a local copy of exactly what reached the table
+        if snapshot:
+            snapshot.append(code, rows)
+
+    # With an AsyncRetryingSession the pipeline needs the coroutine version
+    return (fetch_async if isinstance(session, AsyncRetryingSession) else fetch), transform, store
+
+
+def add_sink_arguments(parser):
+    parser.add_argument("--sink", choices=["supabase", "postgrest"], default="supabase",
+                        help="Upsert through the supabase client or plain PostgREST HTTP (default: supabase)")
+    parser.add_argument("--sink-url",
+                        help="PostgREST base URL for --sink postgrest (default: <Supabase URL>/rest/v1)")
+    parser.add_argument("--upsert-workers", type=int, default=DEFAULT_UPSERT_WORKERS,
+                        help=f"Upsert batches submitted in parallel (default: {DEFAULT_UPSERT_WORKERS})")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Initial rows per upsert request (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                        help=f"Upper bound for the adaptive batch size (default: {DEFAULT_MAX_BATCH_SIZE})")
+    parser.add_argument("--target-latency", type=float, default=DEFAULT_TARGET_LATENCY,
+                        help=f"Seconds per upsert the batch size adapts to (default: {DEFAULT_TARGET_LATENCY})")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fetch EU motorcycle shops from OpenStreetMap into Supabase")
+    parser.add_argument("--countries", nargs="+", default=EU_COUNTRIES, metavar="CODE",
+                        help="Country codes to fetch (default: all EU countries)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Max countries in flight at once (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE,
+                        help=f"Overpass requests per second shared by all workers (default: {DEFAULT_RATE})")
+    parser.add_argument("--burst", type=int, default=DEFAULT_BURST,
+                        help=f"Requests allowed back-to-back before the rate applies (default: {DEFAULT_BURST})")
+    parser.add_argument("--tile", nargs="+", default=[], metavar="CODE",
+                        help="Countries to fetch as a grid of bbox tiles ('all' for every country)")
+    parser.add_argument("--tile-size", type=float, default=DEFAULT_TILE_SIZE,
+                        help=f"Tile edge in degrees (default: {DEFAULT_TILE_SIZE})")
+    parser.add_argument("--tile-workers", type=int, default=DEFAULT_TILE_WORKERS,
+                        help=f"Tiles fetched in parallel per country (default: {DEFAULT_TILE_WORKERS})")
+    add_sink_arguments(parser)
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Drive every Overpass request from one asyncio event loop instead of a thread each")
+    parser.add_argument("--country-timeout", type=float,
+                        help="With --async: give up on a country that spends longer than this many seconds "
+                             "fetching and formatting (waiting for the sink doesn't count)")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help=f"Batches buffered between pipeline stages (default: {DEFAULT_QUEUE_SIZE})")
+    parser.add_argument("--retries", type=int, default=5,
+                        help="Retries per Overpass request on timeouts, 429 and 5xx (default: 5)")
+    parser.add_argument("--connect-timeout", type=float, default=DEFAULT_CONNECT_TIMEOUT,
+                        help=f"Seconds to wait for a connection (default: {DEFAULT_CONNECT_TIMEOUT})")
+    parser.add_argument("--overpass-url", default=OVERPASS_URL,
+                        help=f"Overpass interpreter endpoint (default: {OVERPASS_URL})")
+    parser.add_argument("--read-timeout", type=float, default=DEFAULT_READ_TIMEOUT,
+                        help=f"Seconds to wait for a response (default: {DEFAULT_READ_TIMEOUT})")
+    parser.add_argument("--full", action="store_true",
+                        help="Re-download every shop instead of only changes since the last sync")
+    parser.add_argument("--state-file", default=DEFAULT_SYNC_STATE,
+                        help=f"Where per-country sync timestamps are kept (default: {DEFAULT_SYNC_STATE})")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help=f"Directory for cached Overpass responses (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_TTL / 3600,
+                        help=f"Hours a cached response stays valid (default: {DEFAULT_TTL // 3600})")
+    parser.add_argument("--cache-max-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help=f"Cache size limit in MB (default: {DEFAULT_MAX_BYTES // (1024 * 1024)})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always hit Overpass and don't store responses")
+    parser.add_argument("--offline", action="store_true",
+                        help="Replay responses from the cache only, never contact Overpass")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT,
+                        help=f"Journal of finished countries and stored batches (default: {DEFAULT_CHECKPOINT})")
+    parser.add_argument("--restart", action="store_true",
+                        help="Ignore an interrupted earlier run and fetch every country again")
+    parser.add_argument("--snapshot-dir", default=DEFAULT_SNAPSHOT_DIR,
+                        help=f"Local copy of the stored records per country (default: {DEFAULT_SNAPSHOT_DIR})")
+    parser.add_argument("--no-snapshot", action="store_true",
+                        help="Don't keep a local copy of the stored records")
+    parser.add_argument("--tags", nargs="+", default=list(DEFAULT_TAG_PATTERNS), metavar="KEY",
+                        help="OSM tags kept in shop_tags; a trailing * keeps a whole prefix like service:* "
+                             "(default: shop, craft, opening_hours, brand, service:*, ...)")
+    parser.add_argument("--all-tags", action="store_true",
+                        help="Keep every OSM tag in shop_tags")
+    parser.add_argument("--no-diff", action="store_true",
+                        help="Upsert every fetched record, not just the ones that changed since the last run")
+    parser.add_argument("--delete-missing", action="store_true",
+                        help="Delete rows a full fetch no longer returns (default: only log them)")
+    parser.add_argument("--manifest-dir", default=DEFAULT_MANIFEST_DIR,
+                        help=f"Record hashes of the last run per country (default: {DEFAULT_MANIFEST_DIR})")
+    parser.add_argument("--changeset-dir", default=DEFAULT_CHANGESET_DIR,
+                        help=f"Where each run's inserts/updates/deletes are logged (default: {DEFAULT_CHANGESET_DIR})")
+    return parser.parse_args()
 
-        record = {
-            "id": element["id"],
-            "country_code": tags.get("addr:country", country_code),
-            "name": tags.get("name"),
-            "lat": element.get("lat"),
-            "lon": element.get("lon"),
-            "address": {
-                "city": tags.get("addr:city"),
-                "street": tags.get("addr:street"),
-                "housenumber": tags.get("addr:housenumber"),
-                "postcode": tags.get("addr:postcode"),
-                "suburb": tags.get("addr:suburb")
-            },
-            "contact": {
-                "phone": tags.get("contact:phone") or tags.get("phone"),
-                "fax": tags.get("contact:fax"),
-                "website": tags.get("contact:website") or tags.get("website"),
-                "email": tags.get("contact:email") or tags.get("email")
-            },
-            "shop_tags": tags,
-            "source_country": country_code
-        }
-        records.append(record)
-    return records
 
 # ---------- Main loop ----------
-total_shops = 0
-successful_countries = 0
-failed_countries = []
+def main():
+    args = parse_args()
+    countries = [code.upper() for code in args.countries]
+    tiled = {code.upper() for code in args.tile}
+    if "ALL" in tiled:
+        tiled = set(countries)
+    unknown = sorted(tiled - set(COUNTRY_BBOXES))
+    if unknown:
+        print(f"❌ No bounding box known for: {', '.join(unknown)}")
+        exit(1)
+    if args.offline and args.no_cache:
+        print("❌ --offline needs the cache, drop --no-cache")
+        exit(1)
+    if args.country_timeout and not args.use_async:
+        print("❌ --country-timeout needs --async")
+        exit(1)
+    if args.delete_missing and (args.no_diff or args.no_snapshot):
+        print("❌ --delete-missing needs the change manifest, drop --no-diff/--no-snapshot")
+        exit(1)
 
-for code in EU_COUNTRIES:
-    try:
-        data = fetch_overpass_data(code)
-        records = format_records(data, code)
+    sink = make_sink(args)
+
+    print(f"📍 Fetching data for {len(countries)} EU countries "
+          f"({args.workers} workers, {args.rate} req/s)")
+    print("")
 
-        if not records:
-            print(f"⚠️  No shops found")
+    sync_state = SyncState(args.state_file)
+    checkpoint = Checkpoint(args.checkpoint)
+    if args.restart:
+        checkpoint.reset()
+    snapshot = None if args.no_snapshot else SnapshotStore(args.snapshot_dir)
+    # The new manifest is taken from the snapshot, so diffing needs one
+    tracker = None
+    if snapshot and not args.no_diff:
+        tracker = ChangeTracker(args.manifest_dir, changeset_path(args.changeset_dir))
+    total_deleted = 0
+    cache = None
+    if not args.no_cache:
+        cache = ResponseCache(args.cache_dir, ttl=None if args.offline else args.cache_ttl * 3600,
+                              max_bytes=args.cache_max_mb * 1024 * 1024)
+    limiter = TokenBucket(args.rate, args.burst)
+    if args.use_async:
+        # Connections are cheap on the event loop; allow one per tile in flight
+        session = AsyncRetryingSession(pool_size=max(1, args.workers * args.tile_workers),
+                                       connect_timeout=args.connect_timeout, read_timeout=args.read_timeout,
+                                       max_retries=args.retries, limiter=limiter)
+    else:
+        session = RetryingSession(pool_size=max(1, args.workers), connect_timeout=args.connect_timeout,
+                                  read_timeout=args.read_timeout, max_retries=args.retries, limiter=limiter)
+    total_shops = 0
+    successful_countries = 0
+    failed_countries = []
+
+    # Pick up where an interrupted run stopped: finished countries are skipped,
+    # half-stored ones continue after their last stored batch
+    sinces = {}
+    start_offsets = {}
+    todo = []
+
+    def resumable(code):
+        # Offsets only line up with the exact same response, so resume mid-country
+        # only when it can be replayed from the cache. Tiled countries depend on
+        # many responses (and on how tiles were split), so they start over.
+        query = build_overpass_query(code, sinces[code])
+        return cache is not None and code not in tiled and cache.contains(query)
+
+    for code in countries:
+        if checkpoint.is_done(code):
+            print(f"⏭️  {code}: Already done by the previous (unfinished) run")
+            successful_countries += 1
             continue
+        # Offline runs replay full responses; the sync point stays where it was
+        sinces[code] = None if args.full or args.offline else sync_state.last_sync(code)
+        query = build_overpass_query(code, sinces[code])
+        start_offsets[code] = checkpoint.start(code, query_key(query), resume=resumable(code))
+        if start_offsets[code]:
+            print(f"↪️  {code}: Resuming after {start_offsets[code]} stored elements")
+        if snapshot:
+            snapshot.begin(code, resume=bool(start_offsets[code]))
+        if tracker:
+            tracker.begin(code)
+        todo.append(code)
 
-        # Batch insert (100 rows at a time)
-        inserted = 0
-        for i in range(0, len(records), 100):
-            chunk = records[i:i+100]
-            result = supabase.table("motorcycle_shops").upsert(chunk).execute()
-            inserted += len(chunk)
+    fetch, transform, upsert = make_stages(sink, session, sinces, cache, args.offline,
+                                           tiled, args.tile_size, args.tile_workers, snapshot,
+                                           tracker, args.overpass_url,
+                                           None if args.all_tags else TagProjection(args.tags))
+    # Stage batches are as large as an upsert may get; the sink splits them
+    # down to the current adaptive size
+    if args.use_async:
+        # The session belongs to the pipeline's event loop and is closed there
+        pipeline = AsyncPipeline(fetch, transform, upsert, fetch_workers=args.workers,
+                                 sink_workers=args.upsert_workers, batch_size=args.max_batch_size,
+                                 country_timeout=args.country_timeout,
+                                 # Tiles of a country are parsed side by side
+                                 parse_workers=args.workers * args.tile_workers,
+                                 on_fetch_error=lambda code, e: limiter.pause(ERROR_COOLDOWN),
+                                 on_progress=checkpoint.advance, on_close=session.aclose)
+    else:
+        pipeline = Pipeline(fetch, transform, upsert, fetch_workers=args.workers,
+                            sink_workers=args.upsert_workers, batch_size=args.max_batch_size,
+                            queue_size=args.queue_size,
+                            # Back off every fetch worker after a failed country
+                            on_fetch_error=lambda code, e: limiter.pause(ERROR_COOLDOWN),
+                            on_progress=checkpoint.advance)
+    started = time.monotonic()
 
-        print(f"✅ Inserted {inserted} shops")
-        total_shops += inserted
-        successful_countries += 1
+    try:
+        for result in pipeline.run(todo, start_offsets):
+            code = result.code
+            if result.error is not None:
+                print(f"❌ {code}: Error: {result.error}")
+                failed_countries.append(code)
+                if not resumable(code):
+                    # Batches may already be stored, e.g. before an error remark at the
+                    # end of the response, but an uncached response can't be resumed
+                    # from: the next run fetches this country from the start
+                    checkpoint.rewind(code)
+                    if snapshot:
+                        snapshot.discard(code)
+                continue
 
-        # Be kind to Overpass API - wait between requests
-        time.sleep(10)
+            # Only advance the sync point once everything is stored
+            synced_at = result.meta.get("osm3s", {}).get("timestamp_osm_base")
+            if synced_at and not args.offline:
+                sync_state.mark_synced(code, synced_at)
+            since = sinces[code]
+            if snapshot:
+                # Incremental results only hold changed shops; fold them into the last snapshot
+                snapshot.commit(code, merge=since is not None)
+            if tracker:
+                # Ids missing from a full fetch are gone from OSM
+                deleted = tracker.finish(code, snapshot.read(code))
+                if deleted and args.delete_missing:
+                    sink.delete(deleted)
+                    total_deleted += len(deleted)
+            checkpoint.complete(code)
 
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        failed_countries.append(code)
-        # Wait longer after errors
-        time.sleep(20)
-
-# ---------- Summary ----------
-print("")
-print("=" * 60)
-print("🎉 Data Fetch Complete!")
-print("=" * 60)
-print(f"✅ Successfully processed: {successful_countries}/{len(EU_COUNTRIES)} countries")
-print(f"📊 Total shops inserted: {total_shops}")
-
-if failed_countries:
-    print(f"⚠️  Failed countries: {', '.join(failed_countries)}")
-    print("   You can run the script again to retry failed countries")
-
-print("")
-print("🏍️  Your motorcycle shop database is ready!")
-print("   Run: npm run dev")
-print("   Open: http://localhost:3000")
-print("")
+            if not result.inserted and not (tracker and deleted):
+                if since:
+                    print(f"✅ {code}: No changes since {since}")
+                    successful_countries += 1
+                else:
+                    print(f"⚠️  {code}: No shops found")
+                continue
+
+            if tracker:
+                # Rows the tracker found unchanged reached the store stage but not the table
+                counts = tracker.counts(code)
+                print(f"✅ {code}: {counts['insert']} new, {counts['update']} updated, "
+                      f"{counts['unchanged']} unchanged, {counts['delete']} "
+                      f"{'deleted' if args.delete_missing else 'gone'}")
+                total_shops += counts["insert"] + counts["update"]
+            else:
+                print(f"✅ {code}: Inserted {result.inserted} shops")
+                total_shops += result.inserted
+            successful_countries += 1
+    except KeyboardInterrupt:
+        print("")
+        print("⏸️  Interrupted - stored batches are checkpointed")
+        print("   Run the script again to resume where it stopped")
+        if snapshot:
+            snapshot.close()
+        if tracker:
+            tracker.close()
+        checkpoint.close()
+        exit(130)
+
+    if not args.use_async:
+        session.close()
+    sink.close()
+    if snapshot:
+        snapshot.close()
+    if tracker:
+        tracker.close()
+    # A fully successful run leaves nothing to resume
+    if not failed_countries:
+        checkpoint.reset()
+    checkpoint.close()
+    elapsed = time.monotonic() - started
+
+    # ---------- Summary ----------
+    print("")
+    print("=" * 60)
+    print("🎉 Data Fetch Complete!")
+    print("=" * 60)
+    print(f"✅ Successfully processed: {successful_countries}/{len(countries)} countries")
+    print(f"📊 Total shops {'written' if tracker else 'inserted'}: {total_shops}")
+    if tracker and os.path.exists(tracker.changeset_path):
+        print(f"🔁 Changeset: {tracker.changeset_path}")
+    if total_deleted:
+        print(f"🗑️  Deleted: {total_deleted} shops")
+    print(f"⏱️  Elapsed: {elapsed:.1f}s")
+    for stats in pipeline.stats:
+        print(f"   {stats.summary(elapsed)}")
+    print(f"   Final upsert batch size: {sink.batch_size.size}")
+
+    if failed_countries:
+        print(f"⚠️  Failed countries: {', '.join(sorted(failed_countries))}")
+        print("   Run the script again to retry them; finished countries are skipped")
+
+    print("")
+    print("🏍️  Your motorcycle shop database is ready!")
+    print("   Run: npm run dev")
+    print("   Open: http://localhost:3000")
+    print("")
+
+
+if __name__ == "__main__":
+    main()
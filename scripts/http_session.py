@@ -0,0 +1,112 @@
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Transient server-side conditions worth another attempt
+RETRY_STATUS = {429, 500, 502, 503, 504}
+# Overpass answers 429 when our slot quota is used up; everyone should slow down
+THROTTLE_STATUS = {429}
+
+DEFAULT_CONNECT_TIMEOUT = 10
+# Overpass queries run with [timeout:60] server-side, leave room for the transfer
+DEFAULT_READ_TIMEOUT = 90
+
+
+def parse_retry_after(value):
+    """Return the Retry-After header as seconds, or None if missing/invalid."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def classify_status(status, retry_status=RETRY_STATUS):
+    """Sort an HTTP status into 'ok', 'retry' or 'fatal'."""
+    if status < 400:
+        return "ok"
+    if status in retry_status:
+        return "retry"
+    return "fatal"
+
+
+class RetryingSession:
+    """Pooled keep-alive session with timeouts and backoff for flaky APIs.
+
+    One instance is shared by all worker threads. If a `limiter` is given,
+    every attempt takes a token from it, and throttling responses pause it
+    so the other workers back off too. Only `retry_status` responses are
+    retried; read timeouts are too unless `retry_read_timeouts` is False.
+    """
+
+    def __init__(self, pool_size=4, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT, max_retries=5,
+                 base_delay=2.0, max_delay=120.0, limiter=None,
+                 retry_status=RETRY_STATUS, retry_read_timeouts=True):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.retry_status = retry_status
+        self.retry_read_timeouts = retry_read_timeouts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.limiter = limiter
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["User-Agent"] = "motorcycle-shops-fetcher/1.0"
+
+    def backoff(self, attempt):
+        # Full jitter: uniform over [0, min(max_delay, base * 2^attempt)]
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        attempt = 0
+        while True:
+            if self.limiter:
+                self.limiter.acquire()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries:
+                    raise
+                if isinstance(e, requests.ReadTimeout) and not self.retry_read_timeouts:
+                    raise
+                delay = self.backoff(attempt)
+                print(f"   ↻ {type(e).__name__}, retrying in {delay:.1f}s")
+            else:
+                kind = classify_status(response.status_code, self.retry_status)
+                if kind == "ok":
+                    return response
+                if kind == "fatal" or attempt >= self.max_retries:
+                    response.raise_for_status()
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                delay = min(self.max_delay, retry_after) if retry_after is not None else self.backoff(attempt)
+                if response.status_code in THROTTLE_STATUS and self.limiter:
+                    self.limiter.pause(delay)
+                print(f"   ↻ HTTP {response.status_code}, retrying in {delay:.1f}s")
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,352 @@
+import os
+import re
+import sys
+import gzip
+import json
+import time
+import random
+import argparse
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from overpass_cache import ResponseCache
+from synthetic import synthetic_elements, overpass_body, SYNTHETIC_TIMESTAMP
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_OVERPASS_PORT = 8701
+DEFAULT_POSTGREST_PORT = 8702
+DEFAULT_ELEMENTS = 2000
+WRITE_CHUNK = 64 * 1024
+# A client that gives up mid-response (timeout, cancelled task) isn't a server error
+HANG_UPS = (ConnectionResetError, BrokenPipeError)
+
+_COUNTRY = re.compile(r'"ISO3166-1"="(\w+)"')
+_BBOX = re.compile(r"\(area\)\((-?[\d.]+),(-?[\d.]+),(-?[\d.]+),(-?[\d.]+)\)")
+
+
+class Faults:
+    """Latency and failure injection for a mock server.
+
+    Every request waits `latency` seconds (plus up to `jitter`, plus
+    `per_row` for each row of an upsert). Then it fails with a 429 carrying
+    `Retry-After` with probability `throttle_rate`, or with a 503 with
+    probability `error_rate`.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, per_row=0.0, error_rate=0.0, throttle_rate=0.0,
+                 retry_after=1, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.per_row = per_row
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def duration(self, rows=0):
+        with self._lock:
+            jitter = self._random.uniform(0, self.jitter)
+        return self.latency + jitter + self.per_row * rows
+
+    def delay(self, rows=0):
+        time.sleep(self.duration(rows))
+
+    def failure(self):
+        """None, or the (status, headers) to fail this request with."""
+        with self._lock:
+            roll = self._random.random()
+        if roll < self.throttle_rate:
+            return 429, {"Retry-After": str(self.retry_after)}
+        if roll < self.throttle_rate + self.error_rate:
+            return 503, {}
+        return None
+
+
+class ServerStats:
+    def __init__(self):
+        self.requests = 0
+        self.rows = 0
+        self.statuses = {}
+        self._lock = threading.Lock()
+
+    def record(self, status, rows=0):
+        with self._lock:
+            self.requests += 1
+            self.rows += rows
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def to_json(self):
+        with self._lock:
+            return {"requests": self.requests, "rows": self.rows,
+                    "statuses": {str(status): count for status, count in sorted(self.statuses.items())}}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Keep-alive, like the real services; needs Content-Length on every response
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except HANG_UPS:
+            self.close_connection = True
+
+    def _reply(self, status, body=b"", headers=None, rows=0):
+        # Counted before the client can see the answer, so stats never lag behind it
+        self.server.stats.record(status, rows)
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        for offset in range(0, len(body), WRITE_CHUNK):
+            self.wfile.write(body[offset:offset + WRITE_CHUNK])
+
+    def _fail(self):
+        failure = self.server.faults.failure()
+        if failure is None:
+            return False
+        status, headers = failure
+        self._reply(status, json.dumps({"message": "injected failure"}).encode("utf-8"), headers)
+        return True
+
+    def _body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+
+class OverpassHandler(_Handler):
+    """Answers Overpass queries from recorded responses or synthetic data.
+
+    The response for a query comes from, in order: the response cache
+    (exactly what a real run recorded for that query), a fixture file
+    `<fixtures>/<CC>.json[.gz]` holding a full Overpass response, or
+    synthetic shops for the country. Fixture and synthetic elements are
+    cut to the query's bbox, so tiled fetches work too.
+    """
+
+    def do_GET(self):
+        self._answer(parse_qs(urlparse(self.path).query).get("data", [""])[0])
+
+    def do_POST(self):
+        self._answer(parse_qs(self._body().decode("utf-8")).get("data", [""])[0])
+
+    def _answer(self, query):
+        self.server.faults.delay()
+        if self._fail():
+            return
+        country = _COUNTRY.search(query)
+        if not country:
+            self._reply(400, b'{"remark": "no country in query"}')
+            return
+        body = self.server.response_for(query, country.group(1))
+        self._reply(200, body, {"Content-Type": "application/json"})
+
+
+class PostgrestHandler(_Handler):
+    """Accepts PostgREST upserts and deletes and only counts them.
+
+    Bodies with more than `max_rows` rows are refused with 413, like a
+    request that is too large for the real endpoint. An upsert that would
+    take longer than `statement_timeout` seconds is cancelled after that
+    long with the 500 / 57014 error Postgres gives.
+    """
+
+    def do_POST(self):
+        body = self._body()
+        rows = len(json.loads(body or b"[]"))
+        seconds = self.server.faults.duration(rows)
+        timeout = self.server.statement_timeout
+        if timeout and seconds > timeout:
+            time.sleep(timeout)
+            self._reply(500, json.dumps({"code": "57014",
+                                         "message": "canceling statement due to statement timeout"}).encode("utf-8"))
+            return
+        time.sleep(seconds)
+        if self.server.max_rows and rows > self.server.max_rows:
+            self._reply(413, b'{"message": "payload too large"}')
+            return
+        if self._fail():
+            return
+        self._reply(201, rows=rows)
+
+    def do_DELETE(self):
+        self.server.faults.delay()
+        if self._fail():
+            return
+        self._reply(204)
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, handler, faults, host=DEFAULT_HOST, port=0):
+        super().__init__((host, port), handler)
+        self.faults = faults
+        self.stats = ServerStats()
+        self._thread = None
+
+    def handle_error(self, request, client_address):
+        # Flushing the reply after the handler returns can still hit a hang-up
+        if isinstance(sys.exc_info()[1], HANG_UPS):
+            return
+        super().handle_error(request, client_address)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class MockOverpass(MockServer):
+    def __init__(self, faults, fixtures=None, cache_dir=None, elements=DEFAULT_ELEMENTS, seed=0,
+                 host=DEFAULT_HOST, port=0):
+        super().__init__(OverpassHandler, faults, host, port)
+        self.fixtures = fixtures
+        self.cache = ResponseCache(cache_dir, ttl=None) if cache_dir else None
+        self.elements = elements
+        self.seed = seed
+        self._countries = {}
+        self._lock = threading.Lock()
+
+    @property
+    def endpoint(self):
+        return f"{self.url}/api/interpreter"
+
+    def _country_response(self, code):
+        with self._lock:
+            if code not in self._countries:
+                self._countries[code] = self._load_country(code)
+            return self._countries[code]
+
+    def _load_country(self, code):
+        for name in (f"{code}.json", f"{code}.json.gz"):
+            path = os.path.join(self.fixtures or "", name)
+            if self.fixtures and os.path.exists(path):
+                opener = gzip.open if name.endswith(".gz") else open
+                with opener(path, "rb") as f:
+                    return json.load(f)
+        return {"osm3s": {}, "elements": synthetic_elements(code, self.elements, self.seed)}
+
+    def response_for(self, query, code):
+        if self.cache:
+            cached = self.cache.open(query)
+            if cached is not None:
+                with cached:
+                    return cached.read()
+        data = self._country_response(code)
+        elements = data.get("elements", [])
+        bbox = _BBOX.search(query)
+        if bbox:
+            south, west, north, east = map(float, bbox.groups())
+            elements = [e for e in elements
+                        if south <= e.get("lat", 0) <= north and west <= e.get("lon", 0) <= east]
+        return overpass_body(elements, data.get("osm3s", {}).get("timestamp_osm_base") or SYNTHETIC_TIMESTAMP)
+
+
+class MockPostgrest(MockServer):
+    def __init__(self, faults, max_rows=0, host=DEFAULT_HOST, port=0, statement_timeout=0):
+        super().__init__(PostgrestHandler, faults, host, port)
+        self.max_rows = max_rows
+        self.statement_timeout = statement_timeout
+
+    @property
+    def endpoint(self):
+        return f"{self.url}/rest/v1"
+
+
+def add_fault_arguments(parser, prefix, latency, per_row=None):
+    name = prefix.replace("-", "_")
+    parser.add_argument(f"--{prefix}-latency", type=float, default=latency,
+                        help=f"Seconds each request takes (default: {latency})")
+    parser.add_argument(f"--{prefix}-jitter", type=float, default=0.0,
+                        help="Extra random delay of up to this many seconds (default: 0)")
+    parser.add_argument(f"--{prefix}-errors", type=float, default=0.0,
+                        help="Share of requests answered with a 503 (default: 0)")
+    parser.add_argument(f"--{prefix}-throttle", type=float, default=0.0,
+                        help="Share of requests answered with a 429 (default: 0)")
+    if per_row is not None:
+        parser.add_argument(f"--{prefix}-row-latency", type=float, default=per_row,
+                            help=f"Extra seconds per upserted row (default: {per_row})")
+
+    def faults(args, seed=None):
+        return Faults(latency=getattr(args, f"{name}_latency"), jitter=getattr(args, f"{name}_jitter"),
+                      per_row=getattr(args, f"{name}_row_latency", 0.0),
+                      error_rate=getattr(args, f"{name}_errors"),
+                      throttle_rate=getattr(args, f"{name}_throttle"), seed=seed)
+    return faults
+
+
+def add_overpass_arguments(parser):
+    group = parser.add_argument_group("Overpass stand-in")
+    group.add_argument("--fixtures",
+                       help="Directory of recorded Overpass responses named <CC>.json or <CC>.json.gz")
+    group.add_argument("--replay-cache",
+                       help="Answer queries found in this response cache (e.g. .osm/cache) verbatim")
+    group.add_argument("--elements", type=int, default=DEFAULT_ELEMENTS,
+                       help=f"Synthetic shops per country without a fixture (default: {DEFAULT_ELEMENTS})")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for synthetic data and faults (default: 0)")
+
+
+def add_postgrest_arguments(parser):
+    group = parser.add_argument_group("PostgREST stand-in")
+    group.add_argument("--max-rows", type=int, default=0,
+                       help="Upserts with more rows get a 413 (default: 0 = no limit)")
+    group.add_argument("--statement-timeout", type=float, default=0.0,
+                       help="Upserts that would take longer fail with 500 / 57014 (default: 0 = no limit)")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Run local stand-ins for Overpass and PostgREST (point fetch_osm_data.py at them)")
+    parser.add_argument("--overpass-port", type=int, default=DEFAULT_OVERPASS_PORT,
+                        help=f"Port of the Overpass stand-in (default: {DEFAULT_OVERPASS_PORT})")
+    parser.add_argument("--postgrest-port", type=int, default=DEFAULT_POSTGREST_PORT,
+                        help=f"Port of the PostgREST stand-in (default: {DEFAULT_POSTGREST_PORT})")
+    add_overpass_arguments(parser)
+    add_postgrest_arguments(parser)
+    overpass_faults = add_fault_arguments(parser, "overpass", 0.5)
+    upsert_faults = add_fault_arguments(parser, "upsert", 0.05, per_row=0.0005)
+    args = parser.parse_args()
+    return args, overpass_faults, upsert_faults
+
+
+def main():
+    args, overpass_faults, upsert_faults = parse_args()
+    overpass = MockOverpass(overpass_faults(args, args.seed), args.fixtures, args.replay_cache,
+                            args.elements, args.seed, port=args.overpass_port).start()
+    postgrest = MockPostgrest(upsert_faults(args, args.seed), args.max_rows, port=args.postgrest_port,
+                              statement_timeout=args.statement_timeout).start()
+
+    print(f"✅ Overpass stand-in:  {overpass.endpoint}")
+    print(f"✅ PostgREST stand-in: {postgrest.endpoint}")
+    print("")
+    print("   python scripts/fetch_osm_data.py --full --no-cache --no-snapshot --rate 50 \\")
+    print("       --state-file .osm/mock_sync_state.json --checkpoint .osm/mock_checkpoint.jsonl \\")
+    print(f"       --overpass-url {overpass.endpoint} \\")
+    print(f"       --sink postgrest --sink-url {postgrest.endpoint}")
+    print("")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print("")
+        print(f"📊 Overpass:  {overpass.stats.to_json()}")
+        print(f"📊 PostgREST: {postgrest.stats.to_json()}")
+        # Serving threads are daemons and end with the process
+
+
+if __name__ == "__main__":
+    main()
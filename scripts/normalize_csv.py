@@ -0,0 +1,307 @@
+import os
+import re
+import csv
+import json
+import time
+import argparse
+from csv_records import COUNTRY_CODES, MISSING, place_id_to_id
+from tiling import COUNTRY_BBOXES
+
+DEFAULT_INPUT = os.path.join("public", "data", "eu_motorcycle_repairs.csv")
+DEFAULT_OUT = os.path.join("public", "data", "eu_motorcycle_repairs.clean.json")
+DEFAULT_REJECTS = os.path.join(".osm", "normalize_rejects.json")
+# Degrees of slack around COUNTRY_BBOXES before a pin counts as misplaced
+BBOX_SLACK = 0.5
+
+# Country code -> (calling code, national trunk prefix, national number length range).
+# Codes follow the rest of the project, so Greece is EL rather than ISO's GR.
+PHONE_PLANS = {
+    "AT": ("43", "0", 4, 13), "BE": ("32", "0", 8, 9), "BG": ("359", "0", 7, 9),
+    "HR": ("385", "0", 8, 9), "CY": ("357", "", 8, 8), "CZ": ("420", "", 9, 9),
+    "DK": ("45", "", 8, 8), "EE": ("372", "", 7, 8), "FI": ("358", "0", 5, 12),
+    "FR": ("33", "0", 9, 9), "DE": ("49", "0", 6, 13), "EL": ("30", "", 10, 10),
+    "HU": ("36", "06", 8, 9), "IE": ("353", "0", 7, 9), "IT": ("39", "", 6, 11),
+    "LV": ("371", "", 8, 8), "LT": ("370", "8", 8, 8), "LU": ("352", "", 4, 11),
+    "MT": ("356", "", 8, 8), "NL": ("31", "0", 9, 9), "PL": ("48", "", 9, 9),
+    "PT": ("351", "", 9, 9), "RO": ("40", "0", 9, 9), "SK": ("421", "0", 9, 9),
+    "SI": ("386", "0", 8, 8), "ES": ("34", "", 9, 9), "SE": ("46", "0", 7, 9),
+    "NO": ("47", "", 8, 8), "CH": ("41", "0", 9, 9), "GB": ("44", "0", 9, 10),
+}
+_PLANS_BY_CALLING_CODE = {plan[0]: plan for plan in PHONE_PLANS.values()}
+
+# "Closed ⋅ Opens 9 AM Mon", "Open ⋅ Closes 5 PM ⋅ Reopens 9 AM", "Open 24 hours", ...
+_TIME = r"(\d{1,2})(?::(\d{2}))?\s*([AaPp][Mm])"
+_DAY = r"(?:\s+(Mon|Tue|Wed|Thu|Fri|Sat|Sun))?"
+HOURS_PATTERN = re.compile(
+    rf"^(Open|Closed)(?: ⋅ (Opens|Closes) {_TIME}{_DAY})?(?: ⋅ Reopens {_TIME}{_DAY})?$")
+HOURS_STATUS = {
+    "Open 24 hours": "open_24_hours",
+    "Temporarily closed": "temporarily_closed",
+    "Permanently closed": "permanently_closed",
+}
+
+
+def _clean(value):
+    if value is None:
+        return None
+    # The scraper uses narrow no-break spaces in times ("9 AM")
+    value = value.replace("\u202f", " ").replace("\xa0", " ").strip()
+    return None if value in MISSING else value
+
+
+# ---------- Column normalizers ----------
+# Each takes whole columns and returns (values, issues): issues[i] is None or
+# a short reason the value of row i was dropped.
+
+def normalize_countries(cities):
+    """Split "City, Country" into city and country code columns."""
+    city_values, codes, issues = [], [], []
+    for value in cities:
+        value = _clean(value)
+        city, country = (value.rsplit(",", 1) + [None])[:2] if value else (None, None)
+        city = _clean(city)
+        code = COUNTRY_CODES.get(country.strip()) if country else None
+        city_values.append(city)
+        codes.append(code)
+        issues.append(None if code else f"unknown country in {value!r}")
+    return city_values, codes, issues
+
+
+def _national_length_ok(plan, digits):
+    return plan[2] <= len(digits) <= plan[3]
+
+
+def normalize_phone(value, country):
+    """E.164 ("+33182830384") for a scraped phone number, or (None, reason)."""
+    value = _clean(value)
+    if value is None:
+        return None, None
+    digits = re.sub(r"\D", "", value)
+    if value.startswith("+") or value.startswith("00"):
+        if value.startswith("00"):
+            digits = digits[2:]
+        for length in (1, 2, 3):
+            plan = _PLANS_BY_CALLING_CODE.get(digits[:length])
+            if plan:
+                national = digits[length:]
+                if not _national_length_ok(plan, national):
+                    return None, f"bad length for +{plan[0]}: {value!r}"
+                return "+" + digits, None
+        if 8 <= len(digits) <= 15:
+            return "+" + digits, None
+        return None, f"bad international number {value!r}"
+
+    plan = PHONE_PLANS.get(country)
+    if plan is None:
+        return None, f"no dialling plan for country {country!r}: {value!r}"
+    calling_code, trunk = plan[0], plan[1]
+    if trunk and digits.startswith(trunk):
+        digits = digits[len(trunk):]
+    if not _national_length_ok(plan, digits):
+        return None, f"not a {country} number: {value!r}"
+    return f"+{calling_code}{digits}", None
+
+
+def normalize_phones(phones, countries):
+    values, issues = [], []
+    for phone, country in zip(phones, countries):
+        value, issue = normalize_phone(phone, country)
+        values.append(value)
+        issues.append(issue)
+    return values, issues
+
+
+def _hhmm(hour, minute, meridiem):
+    hour = int(hour) % 12 + (12 if meridiem.lower() == "pm" else 0)
+    return f"{hour:02d}:{int(minute or 0):02d}"
+
+
+def parse_hours(value):
+    """Structured form of the scraped opening status.
+
+    Google only shows the status at scrape time, e.g. "Closed ⋅ Opens 9 AM
+    Mon" becomes {"status": "closed", "opens_at": "09:00", "opens_day": "Mon"}.
+    """
+    value = _clean(value)
+    if value is None:
+        return None, None
+    if value in HOURS_STATUS:
+        return {"status": HOURS_STATUS[value]}, None
+    match = HOURS_PATTERN.match(value)
+    if not match:
+        return None, f"unrecognised hours {value!r}"
+    state, change, hour, minute, meridiem, day, *reopen = match.groups()
+    hours = {"status": state.lower()}
+    if change:
+        prefix = "opens" if change == "Opens" else "closes"
+        hours[f"{prefix}_at"] = _hhmm(hour, minute, meridiem)
+        if day:
+            hours[f"{prefix}_day"] = day
+    if reopen[0]:
+        hours["reopens_at"] = _hhmm(*reopen[:3])
+        if reopen[3]:
+            hours["reopens_day"] = reopen[3]
+    return hours, None
+
+
+def normalize_hours(column):
+    values, issues = [], []
+    for value in column:
+        hours, issue = parse_hours(value)
+        values.append(hours)
+        issues.append(issue)
+    return values, issues
+
+
+def normalize_numbers(column, kind, low, high):
+    """Parse a numeric column; kind is float or int, values outside [low, high] are dropped."""
+    values, issues = [], []
+    for raw in column:
+        value = _clean(raw)
+        if value is None:
+            values.append(None)
+            issues.append(None)
+            continue
+        try:
+            number = kind(value.replace(",", "") if kind is int else value.replace(",", "."))
+        except ValueError:
+            values.append(None)
+            issues.append(f"not a number: {value!r}")
+            continue
+        if not low <= number <= high:
+            values.append(None)
+            issues.append(f"out of range: {value!r}")
+        else:
+            values.append(number)
+            issues.append(None)
+    return values, issues
+
+
+def normalize_texts(column):
+    return [_clean(value) for value in column]
+
+
+def normalize_table(columns):
+    """Clean every column of the scraped CSV.
+
+    Returns (rows, rejects): typed row dicts, and for every row with a
+    problem its line number, place_id, whether it was dropped, and why.
+    Rows without place_id, coordinates or a known country, or pinned
+    outside their country, are dropped; other bad values are only blanked.
+    """
+    size = len(columns["place_id"])
+    place_ids = normalize_texts(columns["place_id"])
+    cities, countries, country_issues = normalize_countries(columns["city"])
+    lats, lat_issues = normalize_numbers(columns["latitude"], float, -90, 90)
+    lons, lon_issues = normalize_numbers(columns["longitude"], float, -180, 180)
+    phones, phone_issues = normalize_phones(columns["phone"], countries)
+    hours, hours_issues = normalize_hours(columns["hours"])
+    ratings, rating_issues = normalize_numbers(columns["rating"], float, 0, 5)
+    reviews, review_issues = normalize_numbers(columns["reviews_count"], int, 0, 10 ** 9)
+    names = normalize_texts(columns["name"])
+    addresses = normalize_texts(columns["address"])
+    websites = normalize_texts(columns["website"])
+    business_types = normalize_texts(columns["business_type"])
+    scraped_at = normalize_texts(columns["scraped_at"])
+
+    rows, rejects = [], []
+    for i in range(size):
+        fatal = []
+        if place_ids[i] is None:
+            fatal.append("missing place_id")
+        if lats[i] is None or lons[i] is None:
+            fatal.append("missing or invalid coordinates")
+        if country_issues[i]:
+            fatal.append(country_issues[i])
+        elif lats[i] is not None and lons[i] is not None and countries[i] in COUNTRY_BBOXES:
+            south, west, north, east = COUNTRY_BBOXES[countries[i]]
+            if not (south - BBOX_SLACK <= lats[i] <= north + BBOX_SLACK
+                    and west - BBOX_SLACK <= lons[i] <= east + BBOX_SLACK):
+                fatal.append(f"coordinates outside {countries[i]}")
+        warnings = [issue for issue in (lat_issues[i], lon_issues[i], phone_issues[i], hours_issues[i],
+                                        rating_issues[i], review_issues[i]) if issue]
+        if fatal or warnings:
+            rejects.append({
+                "line": i + 2,
+                "place_id": place_ids[i],
+                "name": names[i],
+                "dropped": bool(fatal),
+                "issues": fatal + warnings,
+            })
+        if fatal:
+            continue
+        rows.append({
+            "id": place_id_to_id(place_ids[i]),
+            "place_id": place_ids[i],
+            "name": names[i],
+            "city": cities[i],
+            "country_code": countries[i],
+            "address": addresses[i],
+            "lat": lats[i],
+            "lon": lons[i],
+            "phone": phones[i],
+            "website": websites[i],
+            "business_type": business_types[i],
+            "rating": ratings[i],
+            "reviews_count": reviews[i],
+            "hours": hours[i],
+            "scraped_at": scraped_at[i],
+        })
+    return rows, rejects
+
+
+def read_columns(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        columns = {name: [] for name in header}
+        for row in reader:
+            row = row + [""] * (len(header) - len(row))
+            for name, value in zip(header, row):
+                columns[name].append(value)
+    return columns
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Clean and type the scraped Google Places CSV")
+    parser.add_argument("input", nargs="?", default=DEFAULT_INPUT,
+                        help=f"Scraped CSV file (default: {DEFAULT_INPUT})")
+    parser.add_argument("--out", default=DEFAULT_OUT,
+                        help=f"Clean JSON output (default: {DEFAULT_OUT})")
+    parser.add_argument("--rejects", default=DEFAULT_REJECTS,
+                        help=f"Report of dropped rows and blanked values (default: {DEFAULT_REJECTS})")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not os.path.exists(args.input):
+        print(f"❌ File not found: {args.input}")
+        exit(1)
+
+    started = time.monotonic()
+    columns = read_columns(args.input)
+    missing = {"place_id", "name", "city", "address", "latitude", "longitude", "phone", "website",
+               "business_type", "rating", "reviews_count", "hours", "scraped_at"} - set(columns)
+    if missing:
+        print(f"❌ {args.input} is missing columns: {', '.join(sorted(missing))}")
+        exit(1)
+    rows, rejects = normalize_table(columns)
+    elapsed = time.monotonic() - started
+
+    for path in (args.out, args.rejects):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(rows, f, ensure_ascii=False, separators=(",", ":"))
+    with open(args.rejects, "w", encoding="utf-8") as f:
+        json.dump(rejects, f, ensure_ascii=False, indent=2)
+
+    dropped = sum(1 for reject in rejects if reject["dropped"])
+    print(f"✅ Cleaned {len(rows)} of {len(columns['place_id'])} rows in {elapsed:.2f}s -> {args.out}")
+    print(f"   {dropped} rows dropped, {len(rejects) - dropped} with blanked values -> {args.rejects}")
+
+
+if __name__ == "__main__":
+    main()
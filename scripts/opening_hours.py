@@ -0,0 +1,248 @@
+import re
+import base64
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+from normalize_csv import parse_hours
+
+# A week as 7 x 96 quarter-hour slots, Monday 00:00 first: bit
+# day * SLOTS_PER_DAY + slot is set while the shop is open.
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+SLOTS_PER_WEEK = 7 * SLOTS_PER_DAY
+DAY_MASK = (1 << SLOTS_PER_DAY) - 1
+ALWAYS_OPEN = (1 << SLOTS_PER_WEEK) - 1
+
+DAYS = ["mo", "tu", "we", "th", "fr", "sa", "su"]
+# Holiday selectors; rules for them are skipped since holidays aren't modelled
+HOLIDAYS = {"ph", "sh"}
+
+# Shops are open in local time
+COUNTRY_TIMEZONES = {
+    "AT": "Europe/Vienna", "BE": "Europe/Brussels", "BG": "Europe/Sofia", "HR": "Europe/Zagreb",
+    "CY": "Asia/Nicosia", "CZ": "Europe/Prague", "DK": "Europe/Copenhagen", "EE": "Europe/Tallinn",
+    "FI": "Europe/Helsinki", "FR": "Europe/Paris", "DE": "Europe/Berlin", "EL": "Europe/Athens",
+    "HU": "Europe/Budapest", "IE": "Europe/Dublin", "IT": "Europe/Rome", "LV": "Europe/Riga",
+    "LT": "Europe/Vilnius", "LU": "Europe/Luxembourg", "MT": "Europe/Malta", "NL": "Europe/Amsterdam",
+    "PL": "Europe/Warsaw", "PT": "Europe/Lisbon", "RO": "Europe/Bucharest", "SK": "Europe/Bratislava",
+    "SI": "Europe/Ljubljana", "ES": "Europe/Madrid", "SE": "Europe/Stockholm",
+    "NO": "Europe/Oslo", "CH": "Europe/Zurich", "GB": "Europe/London",
+}
+DEFAULT_TIMEZONE = "Europe/Berlin"
+
+_RULE_SEPARATOR = re.compile(r"\s*(?:;|\|\|)\s*")
+# ", Sa 09:00-12:00" starts an additional rule that doesn't override the one before
+# (only after a time or state, since "Tu,Th" is a plain day list)
+_ADDITIONAL_RULE = re.compile(r"(?:(?<=\d)|(?<=off)|(?<=closed)|(?<=open)),\s*"
+                              r"(?=(?:Mo|Tu|We|Th|Fr|Sa|Su|PH|SH)\b)", re.IGNORECASE)
+_TIME_RANGE = re.compile(r"^(\d{1,2}):(\d{2})-(\d{1,2}):(\d{2})$")
+
+
+class UnsupportedHours(ValueError):
+    """An opening_hours value uses syntax this parser doesn't handle (months, sunrise, ...)."""
+
+
+def _day_bits(day, start, end):
+    """Bits for [start, end) slots of `day`; ends past midnight spill into the next day."""
+    bits = 0
+    for slot in range(start, end):
+        bits |= 1 << ((day * SLOTS_PER_DAY + slot) % SLOTS_PER_WEEK)
+    return bits
+
+
+def _parse_days(selector):
+    days = set()
+    for item in selector.lower().replace(" ", "").split(","):
+        if item in HOLIDAYS:
+            continue
+        first, _, last = item.partition("-")
+        if first not in DAYS or (last and last not in DAYS):
+            raise UnsupportedHours(f"day selector {item!r}")
+        start = DAYS.index(first)
+        end = DAYS.index(last) if last else start
+        # Ranges may wrap around the week ("Fr-Mo")
+        for offset in range((end - start) % 7 + 1):
+            days.add((start + offset) % 7)
+    return days
+
+
+def _parse_times(times):
+    slots = []
+    for item in times.replace(" ", "").split(","):
+        match = _TIME_RANGE.match(item)
+        if not match:
+            raise UnsupportedHours(f"time range {item!r}")
+        start_h, start_m, end_h, end_m = map(int, match.groups())
+        start = start_h * 60 + start_m
+        end = end_h * 60 + end_m
+        if start >= 24 * 60 or end > 48 * 60:
+            raise UnsupportedHours(f"time range {item!r}")
+        if end <= start:
+            end += 24 * 60
+        # Round outwards to whole slots
+        slots.append((start // SLOT_MINUTES, -(-end // SLOT_MINUTES)))
+    return slots
+
+
+def _parse_rule(rule):
+    """(days, bits) for one rule; days is None for a holiday-only rule."""
+    rule = rule.strip()
+    if rule == "24/7":
+        return set(range(7)), ALWAYS_OPEN
+    match = re.match(r"^([A-Za-z][A-Za-z,\- ]*?)?\s*(off|closed|open|\d.*)?$", rule)
+    if not match or not (match.group(1) or match.group(2)):
+        raise UnsupportedHours(f"rule {rule!r}")
+    selector, times = match.group(1), match.group(2)
+    if selector:
+        days = _parse_days(selector)
+        if not days:
+            return None, 0
+    else:
+        days = set(range(7))
+    if times in ("off", "closed"):
+        return days, 0
+    ranges = [(0, SLOTS_PER_DAY)] if times in (None, "open") else _parse_times(times)
+    bits = 0
+    for day in days:
+        for start, end in ranges:
+            bits |= _day_bits(day, start, end)
+    return days, bits
+
+
+def parse_opening_hours(value):
+    """Weekly bitmap (an int) for an OSM opening_hours value.
+
+    Handles the forms shops actually use: "24/7", day lists and ranges,
+    several time ranges per day, ranges past midnight and "off". A later
+    rule replaces earlier ones for the days it names. Anything else (months,
+    weeks, sunrise, open ends) raises UnsupportedHours.
+    """
+    value = re.sub(r'"[^"]*"', "", value or "").strip()
+    if not value:
+        raise UnsupportedHours("empty value")
+    bits = 0
+    for group in _RULE_SEPARATOR.split(value):
+        if not group:
+            continue
+        for position, rule in enumerate(_ADDITIONAL_RULE.split(group)):
+            days, rule_bits = _parse_rule(rule)
+            if days is None:
+                continue
+            if position == 0:
+                for day in days:
+                    bits &= ~(DAY_MASK << (day * SLOTS_PER_DAY))
+            bits |= rule_bits
+    return bits
+
+
+def parse_scraped_hours(hours):
+    """Weekly bitmap for the structured scraped status from normalize_csv.parse_hours().
+
+    The scrape only shows the status at one moment, which says nothing about
+    the rest of the week, except for shops that are always open or closed.
+    Returns None when the week is unknown.
+    """
+    status = (hours or {}).get("status")
+    if status == "open_24_hours":
+        return ALWAYS_OPEN
+    if status in ("temporarily_closed", "permanently_closed"):
+        return 0
+    return None
+
+
+def record_hours(record):
+    """Weekly bitmap for a shop record, or None if its hours aren't known."""
+    tags = record.get("shop_tags") or {}
+    if tags.get("opening_hours"):
+        try:
+            return parse_opening_hours(tags["opening_hours"])
+        except UnsupportedHours:
+            pass
+    if tags.get("hours"):
+        hours, _ = parse_hours(tags["hours"])
+        return parse_scraped_hours(hours)
+    return None
+
+
+def week_slot(moment):
+    """Bit position of a timezone-aware or local datetime."""
+    return moment.weekday() * SLOTS_PER_DAY + (moment.hour * 60 + moment.minute) // SLOT_MINUTES
+
+
+def is_open(bits, moment):
+    return bool(bits >> week_slot(moment) & 1)
+
+
+def encode_bits(bits):
+    return base64.b64encode(bits.to_bytes(SLOTS_PER_WEEK // 8, "little")).decode("ascii")
+
+
+def decode_bits(text):
+    return int.from_bytes(base64.b64decode(text), "little")
+
+
+class OpeningHoursTable:
+    """Weekly bitmaps for many shops, with "who is open at T" lookups.
+
+    Next to the per-shop bitmaps it keeps, per timezone, one bitset over
+    the shops for each of the 672 week slots, so open_at() is one lookup
+    and an OR per timezone instead of a test per shop.
+    """
+
+    def __init__(self, shops):
+        self.shops = shops          # id -> (timezone name, bits)
+        self._ids = sorted(shops)
+        self._slots = {}
+        for position, shop_id in enumerate(self._ids):
+            zone, bits = shops[shop_id]
+            rows = self._slots.setdefault(zone, [0] * SLOTS_PER_WEEK)
+            while bits:
+                low = bits & -bits
+                rows[low.bit_length() - 1] |= 1 << position
+                bits ^= low
+
+    @classmethod
+    def build(cls, records):
+        shops = {}
+        for record in records:
+            bits = record_hours(record)
+            if bits is None:
+                continue
+            country = record.get("country_code") or record.get("source_country")
+            shops[record["id"]] = (COUNTRY_TIMEZONES.get(country, DEFAULT_TIMEZONE), bits)
+        return cls(shops)
+
+    def __len__(self):
+        return len(self.shops)
+
+    def __contains__(self, shop_id):
+        return shop_id in self.shops
+
+    def is_open(self, shop_id, when=None):
+        """True/False, or None when the shop's hours are unknown."""
+        if shop_id not in self.shops:
+            return None
+        zone, bits = self.shops[shop_id]
+        when = when or datetime.now(timezone.utc)
+        return is_open(bits, when.astimezone(ZoneInfo(zone)))
+
+    def open_at(self, when=None):
+        """Ids of the shops open at `when` (an aware datetime; default now)."""
+        when = when or datetime.now(timezone.utc)
+        found = 0
+        for zone, rows in self._slots.items():
+            found |= rows[week_slot(when.astimezone(ZoneInfo(zone)))]
+        result = []
+        while found:
+            low = found & -found
+            result.append(self._ids[low.bit_length() - 1])
+            found ^= low
+        return result
+
+    def to_json(self):
+        return {"slot_minutes": SLOT_MINUTES,
+                "shops": {str(shop_id): [zone, encode_bits(bits)]
+                          for shop_id, (zone, bits) in sorted(self.shops.items())}}
+
+    @classmethod
+    def from_json(cls, data):
+        return cls({int(shop_id): (zone, decode_bits(bits)) for shop_id, (zone, bits) in data["shops"].items()})
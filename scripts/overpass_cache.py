@@ -0,0 +1,138 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+DEFAULT_TTL = 12 * 3600
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def query_key(query):
+    # Whitespace in the generated QL is cosmetic, don't let it split cache entries
+    normalized = " ".join(query.split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Content-addressed on-disk cache of raw Overpass responses.
+
+    Entries are gzip-compressed response bodies named after the hash of the
+    query. Entries older than `ttl` seconds are ignored and removed, and the
+    least recently used ones are evicted once the cache grows past
+    `max_bytes`.
+    """
+
+    def __init__(self, directory, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, query):
+        return os.path.join(self.directory, query_key(query) + ".json.gz")
+
+    def _is_fresh(self, path):
+        try:
+            age = time.time() - os.path.getmtime(path)
+        except FileNotFoundError:
+            return False
+        if self.ttl is not None and age > self.ttl:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            return False
+        return True
+
+    def contains(self, query):
+        return self._is_fresh(self.path_for(query))
+
+    def open(self, query):
+        """Return a binary file object with the cached body, or None on a miss."""
+        path = self.path_for(query)
+        if not self._is_fresh(path):
+            return None
+        try:
+            f = gzip.open(path, "rb")
+        except FileNotFoundError:
+            return None
+        # Touch the entry so eviction keeps recently used ones; mtime drives
+        # the TTL, so only access time is bumped
+        stat = os.stat(path)
+        os.utime(path, (time.time(), stat.st_mtime))
+        return f
+
+    def get(self, query):
+        f = self.open(query)
+        if f is None:
+            return None
+        with f:
+            return json.load(f)
+
+    def begin(self, query):
+        """Start writing a response body for `query` chunk by chunk.
+
+        The entry only becomes visible after `commit()`; `abort()` drops it.
+        """
+        return PendingEntry(self, self.path_for(query))
+
+    def put(self, query, body):
+        """Store a raw response body (bytes) for `query`."""
+        entry = self.begin(query)
+        entry.write(body)
+        entry.commit()
+
+    def evict(self):
+        with self._lock:
+            entries = []
+            total = 0
+            for name in os.listdir(self.directory):
+                if not name.endswith(".json.gz"):
+                    continue
+                path = os.path.join(self.directory, name)
+                if not self._is_fresh(path):
+                    continue
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_atime, stat.st_size, path))
+                total += stat.st_size
+
+            if self.max_bytes is None or total <= self.max_bytes:
+                return
+            # Least recently used first
+            for _, size, path in sorted(entries):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                if total <= self.max_bytes:
+                    break
+
+
+class PendingEntry:
+    def __init__(self, cache, path):
+        self.cache = cache
+        self.path = path
+        self.tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        self._f = gzip.open(self.tmp_path, "wb", compresslevel=6)
+
+    def write(self, data):
+        self._f.write(data)
+
+    def commit(self):
+        self._f.close()
+        os.replace(self.tmp_path, self.path)
+        self.cache.evict()
+
+    def abort(self):
+        self._f.close()
+        try:
+            os.remove(self.tmp_path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,139 @@
+import codecs
+import json
+
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",:]}"
+
+
+class OverpassError(RuntimeError):
+    pass
+
+
+class ElementStream:
+    """Incrementally parse an Overpass JSON response.
+
+    Iterating yields the members of the top-level `elements` array one at a
+    time, so only a single element (plus one network chunk) is held in
+    memory. Every other top-level member (`version`, `osm3s`, `remark`, ...)
+    is collected into `meta` as it goes by; Overpass writes `osm3s` before
+    `elements`, so the data timestamp is known as soon as elements arrive.
+    The chunks are only read to the end for a complete response without
+    an error remark.
+    """
+
+    def __init__(self, chunks):
+        self.meta = {}
+        self._chunks = iter(chunks)
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    # ---------- buffer handling ----------
+    def _fill(self):
+        if self._eof:
+            return False
+        # Drop what has been consumed so the buffer stays small
+        self._buf = self._buf[self._pos:]
+        self._pos = 0
+        for chunk in self._chunks:
+            if chunk:
+                self._buf += self._utf8.decode(chunk)
+                return True
+        self._buf += self._utf8.decode(b"", final=True)
+        self._eof = True
+        return False
+
+    def _skip_ws(self):
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf) or not self._fill():
+                return
+
+    def _peek(self):
+        self._skip_ws()
+        if self._pos >= len(self._buf):
+            raise ValueError("unexpected end of Overpass response")
+        return self._buf[self._pos]
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise ValueError(f"expected {char!r} at offset {self._pos} of Overpass response")
+        self._pos += 1
+
+    def _value(self):
+        self._skip_ws()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+                # A number cut off at the chunk boundary ("12" of "12.5")
+                # still decodes, so a value only counts once a delimiter follows
+                if self._eof or (end < len(self._buf) and self._buf[end] in _DELIMITERS):
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._fill()
+
+    # ---------- parsing ----------
+    def __iter__(self):
+        self._expect("{")
+        if self._peek() == "}":
+            return
+        while True:
+            key = self._value()
+            self._expect(":")
+            if key == "elements":
+                yield from self._elements()
+            else:
+                self.meta[key] = self._value()
+            if self._peek() == ",":
+                self._pos += 1
+                continue
+            self._expect("}")
+            break
+
+        # Overpass reports timeouts/out-of-memory as a remark next to partial results
+        remark = self.meta.get("remark") or ""
+        if "error" in remark.lower():
+            self.close()
+            raise OverpassError(remark)
+        # Read the chunks to the end, so whatever tees them (the cache) sees
+        # the response complete; only whitespace may follow the object
+        self._skip_ws()
+        if self._pos < len(self._buf):
+            raise ValueError(f"unexpected data after the Overpass response at offset {self._pos}")
+
+    def close(self):
+        """Stop reading the response; a generator of chunks is closed early."""
+        close = getattr(self._chunks, "close", None)
+        if close:
+            close()
+
+    def _elements(self):
+        self._expect("[")
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            yield self._value()
+            if self._peek() == ",":
+                self._pos += 1
+                continue
+            self._expect("]")
+            return
+
+
+def iter_file_chunks(f, chunk_size=CHUNK_SIZE):
+    """Yield binary chunks from `f` and close it when done."""
+    with f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
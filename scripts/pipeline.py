@@ -0,0 +1,268 @@
+import math
+import queue
+import threading
+import time
+from itertools import islice
+
+# Marks the end of a stage's input
+_STOP = object()
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile (`fraction` 0.5 = median); 0 for no values."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+
+class StageStats:
+    """Item counts, busy time and per-batch latencies for one pipeline stage (all its threads)."""
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.batches = 0
+        self.busy = 0.0
+        self.latencies = []
+        self._lock = threading.Lock()
+
+    def record(self, items, seconds):
+        with self._lock:
+            self.items += items
+            self.batches += 1
+            self.busy += seconds
+            self.latencies.append(seconds)
+
+    def percentile(self, fraction):
+        with self._lock:
+            return percentile(self.latencies, fraction)
+
+    def summary(self, elapsed):
+        rate = self.items / elapsed if elapsed else 0.0
+        return (f"{self.name:<7} {self.items:>7} items in {self.batches:>5} batches, "
+                f"busy {self.busy:6.1f}s, {rate:8.1f} items/s")
+
+
+class CountryResult:
+    def __init__(self, code):
+        self.code = code
+        self.inserted = 0
+        self.meta = {}
+        self.error = None
+        self.pending = 0
+        self.fetched = False
+        self.reported = False
+        # Source elements stored without gaps from the start; batches can
+        # finish out of order, so finished ranges wait here until contiguous
+        self.committed = 0
+        self.done_ranges = {}
+
+
+class Pipeline:
+    """Fetch → format → upsert stages connected by bounded queues.
+
+    - `fetch(code)` returns an iterable of raw elements (optionally with a
+      `meta` dict, like ElementStream); it is cut into batches of `batch_size`.
+    - `transform(code, elements)` turns a batch of elements into records.
+    - `sink(code, records)` stores a batch of records.
+
+    Each stage runs on its own threads, so the next country downloads while
+    the previous one is still being upserted. A full queue blocks the stage
+    feeding it, which keeps memory bounded when a downstream stage is slow.
+    A country is reported through `results` once all of its batches are
+    stored, or as soon as any of them fails. `on_progress(code, offset)` is
+    called whenever the first `offset` source elements of a country are all
+    stored, which is what checkpoints record to resume from.
+    """
+
+    def __init__(self, fetch, transform, sink, fetch_workers=1, transform_workers=1,
+                 sink_workers=1, batch_size=100, queue_size=8, on_fetch_error=None,
+                 on_progress=None):
+        self.fetch = fetch
+        self.transform = transform
+        self.sink = sink
+        self.batch_size = batch_size
+        self.on_fetch_error = on_fetch_error
+        self.on_progress = on_progress
+        self.stats = [StageStats("fetch"), StageStats("format"), StageStats("upsert")]
+        self.results = queue.Queue()
+
+        self._countries = queue.Queue()
+        self._elements = queue.Queue(maxsize=queue_size)
+        self._records = queue.Queue(maxsize=queue_size)
+        self._state = {}
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._workers = (fetch_workers, transform_workers, sink_workers)
+
+    # ---------- bookkeeping ----------
+    def _add_pending(self, code):
+        with self._lock:
+            self._state[code].pending += 1
+
+    def _finish(self, code, inserted=0, error=None, fetched=False, meta=None, batch=None, dropped=False):
+        with self._lock:
+            result = self._state[code]
+            result.inserted += inserted
+            if batch is not None:
+                result.pending -= 1
+                # A dropped batch was never stored, so it must not move the offset
+                if error is None and result.error is None and not dropped:
+                    offset, size = batch
+                    result.done_ranges[offset] = size
+                    before = result.committed
+                    while result.committed in result.done_ranges:
+                        result.committed += result.done_ranges.pop(result.committed)
+                    # Called under the lock so offsets are reported in order
+                    if result.committed != before and self.on_progress:
+                        self.on_progress(code, result.committed)
+            if fetched:
+                result.fetched = True
+                result.meta = meta or {}
+            if error is not None and result.error is None:
+                result.error = error
+            done = result.error is not None or (result.fetched and result.pending == 0)
+            if done and not result.reported:
+                result.reported = True
+                report = result
+            else:
+                report = None
+        if report is not None:
+            self.results.put(report)
+
+    def _failed(self, code):
+        # After cancel() every remaining batch is dropped without being stored
+        if self._cancelled.is_set():
+            return True
+        with self._lock:
+            return self._state[code].error is not None
+
+    def cancel(self):
+        """Stop taking new work; batches already being stored still finish."""
+        self._cancelled.set()
+
+    # ---------- stages ----------
+    def _fetch_worker(self):
+        stats = self.stats[0]
+        while True:
+            code = self._countries.get()
+            if code is _STOP:
+                return
+            if self._cancelled.is_set():
+                continue
+            try:
+                started = time.monotonic()
+                source = self.fetch(code)
+                elements = iter(source)
+                # Resume after elements a previous run already stored
+                offset = self._state[code].committed
+                if offset:
+                    next(islice(elements, offset, offset), None)
+                while True:
+                    batch = list(islice(elements, self.batch_size))
+                    if not batch:
+                        break
+                    stats.record(len(batch), time.monotonic() - started)
+                    if self._failed(code):
+                        # A later stage already gave up on this country
+                        break
+                    self._add_pending(code)
+                    self._elements.put((code, offset, batch))
+                    offset += len(batch)
+                    started = time.monotonic()
+                self._finish(code, fetched=True, meta=getattr(source, "meta", {}))
+            except Exception as e:
+                if self.on_fetch_error:
+                    self.on_fetch_error(code, e)
+                self._finish(code, error=e)
+
+    def _transform_worker(self):
+        stats = self.stats[1]
+        while True:
+            item = self._elements.get()
+            if item is _STOP:
+                return
+            code, offset, elements = item
+            batch = (offset, len(elements))
+            if self._failed(code):
+                self._finish(code, batch=batch, dropped=True)
+                continue
+            started = time.monotonic()
+            try:
+                records = self.transform(code, elements)
+            except Exception as e:
+                self._finish(code, error=e, batch=batch)
+                continue
+            stats.record(len(records), time.monotonic() - started)
+            if records:
+                self._records.put((code, batch, records))
+            else:
+                self._finish(code, batch=batch)
+
+    def _sink_worker(self):
+        stats = self.stats[2]
+        while True:
+            item = self._records.get()
+            if item is _STOP:
+                return
+            code, batch, records = item
+            if self._failed(code):
+                self._finish(code, batch=batch, dropped=True)
+                continue
+            started = time.monotonic()
+            try:
+                self.sink(code, records)
+            except Exception as e:
+                self._finish(code, error=e, batch=batch)
+                continue
+            stats.record(len(records), time.monotonic() - started)
+            self._finish(code, inserted=len(records), batch=batch)
+
+    # ---------- driving ----------
+    def _start(self, target, count):
+        threads = []
+        for _ in range(max(1, count)):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            threads.append(thread)
+        return threads
+
+    def run(self, countries, start_offsets=None):
+        """Process `countries`, yielding a CountryResult as each one finishes.
+
+        `start_offsets` maps a country to the number of leading source
+        elements to skip because they were stored by an earlier run.
+        """
+        start_offsets = start_offsets or {}
+        for code in countries:
+            result = CountryResult(code)
+            result.committed = start_offsets.get(code, 0)
+            self._state[code] = result
+            self._countries.put(code)
+
+        fetchers = self._start(self._fetch_worker, self._workers[0])
+        transformers = self._start(self._transform_worker, self._workers[1])
+        sinks = self._start(self._sink_worker, self._workers[2])
+        for _ in fetchers:
+            self._countries.put(_STOP)
+
+        try:
+            for _ in countries:
+                yield self.results.get()
+        except BaseException:
+            # Ctrl-C or the consumer gave up: wind down instead of finishing everything
+            self.cancel()
+            raise
+        finally:
+            # Drain the stages in order so every queued batch is handled
+            for thread in fetchers:
+                thread.join()
+            for _ in transformers:
+                self._elements.put(_STOP)
+            for thread in transformers:
+                thread.join()
+            for _ in sinks:
+                self._records.put(_STOP)
+            for thread in sinks:
+                thread.join()
@@ -0,0 +1,56 @@
+import threading
+import time
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by every worker that talks to Overpass.
+
+    `rate` tokens are added per second up to `capacity`. `acquire()` blocks
+    until a token is available, and `pause()` holds every caller back for a
+    cooldown period (used after errors instead of a fixed sleep).
+    """
+
+    def __init__(self, rate, capacity=1):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def try_acquire(self):
+        """Take a token if one is available: returns 0, or else the seconds to wait before trying again.
+
+        Doesn't block, so asyncio code can wait with asyncio.sleep instead.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+            self._refill(now)
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            # Start empty after the cooldown so callers don't burst straight back in
+            self._tokens = 0.0
+            self._updated = max(self._updated, self._paused_until)
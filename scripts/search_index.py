@@ -0,0 +1,177 @@
+import gzip
+import json
+from bisect import bisect_left
+from dedup import tokens
+
+# Fields in posting order; a posting is doc * len(FIELDS) + field, so one
+# sorted int list per term says both which shop matched and where
+FIELDS = ("name", "city", "street", "country")
+FIELD_WEIGHTS = (4.0, 2.0, 1.0, 1.0)
+# Match kinds, best first
+EXACT, PREFIX, FUZZY = 1.0, 0.7, 0.4
+MIN_PREFIX = 2
+MIN_FUZZY = 4
+
+
+def trigrams(term):
+    padded = f"${term}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """Edit distance counting a swap of two neighbouring letters as one edit.
+
+    Returns limit + 1 as soon as it's clear the distance will exceed limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+def _field_values(record, country_names):
+    address = record.get("address") or {}
+    country = record.get("country_code") or record.get("source_country")
+    return (record.get("name"), address.get("city"), address.get("street"),
+            " ".join(filter(None, (country, country_names.get(country)))))
+
+
+class SearchIndex:
+    """Inverted index over shop name, city, street and country.
+
+    Terms are accent-folded and lowercased; a query word matches a term
+    exactly, as a prefix (while typing), or, when it isn't a term itself,
+    within one or two typos found through the trigrams of the term list.
+    """
+
+    def __init__(self, ids, terms, postings):
+        self.ids = ids              # doc number -> shop id
+        self.terms = terms          # sorted
+        self.postings = postings    # per term, sorted doc * len(FIELDS) + field
+        self._trigrams = {}
+        for number, term in enumerate(terms):
+            for gram in trigrams(term):
+                self._trigrams.setdefault(gram, []).append(number)
+
+    @classmethod
+    def build(cls, records, country_names=None):
+        country_names = country_names or {}
+        by_term = {}
+        by_id = {}
+        for record in records:
+            by_id[record["id"]] = record
+        ids = sorted(by_id)
+        for doc, shop_id in enumerate(ids):
+            for field, value in enumerate(_field_values(by_id[shop_id], country_names)):
+                for term in set(tokens(value)):
+                    by_term.setdefault(term, []).append(doc * len(FIELDS) + field)
+        terms = sorted(by_term)
+        return cls(ids, terms, [sorted(by_term[term]) for term in terms])
+
+    def __len__(self):
+        return len(self.ids)
+
+    # ---------- Queries ----------
+    def _prefix_terms(self, word):
+        start = bisect_left(self.terms, word)
+        end = start
+        while end < len(self.terms) and self.terms[end].startswith(word):
+            end += 1
+        return range(start, end)
+
+    def _fuzzy_terms(self, word):
+        limit = 1 if len(word) < 8 else 2
+        grams = trigrams(word)
+        shared = {}
+        for gram in grams:
+            for number in self._trigrams.get(gram, ()):
+                shared[number] = shared.get(number, 0) + 1
+        # Each edit can break at most three trigrams (a swap four)
+        needed = len(grams) - 4 * limit
+        return [number for number, count in shared.items()
+                if count >= needed and edit_distance(word, self.terms[number], limit) <= limit]
+
+    def _word_scores(self, word):
+        """{doc: score} for one query word."""
+        matches = {}
+        if len(word) >= MIN_PREFIX:
+            matches = {number: PREFIX for number in self._prefix_terms(word)}
+        exact = bisect_left(self.terms, word)
+        if exact < len(self.terms) and self.terms[exact] == word:
+            matches[exact] = EXACT
+        elif len(word) >= MIN_FUZZY:
+            # A word that isn't a term itself may be a typo ("motorad")
+            for number in self._fuzzy_terms(word):
+                matches.setdefault(number, FUZZY)
+
+        scores = {}
+        for number, kind in matches.items():
+            for posting in self.postings[number]:
+                doc, field = divmod(posting, len(FIELDS))
+                score = kind * FIELD_WEIGHTS[field]
+                if score > scores.get(doc, 0):
+                    scores[doc] = score
+        return scores
+
+    def search(self, query, limit=20):
+        """[(shop id, score), ...] of shops matching every word of the query, best first."""
+        words = tokens(query)
+        if not words:
+            return []
+        combined = None
+        # Rarest words first keeps the running intersection small
+        for scores in sorted((self._word_scores(word) for word in words), key=len):
+            if combined is None:
+                combined = scores
+            else:
+                combined = {doc: score + scores[doc] for doc, score in combined.items() if doc in scores}
+            if not combined:
+                return []
+        ranked = sorted(combined.items(), key=lambda item: (-item[1], item[0]))
+        if limit:
+            ranked = ranked[:limit]
+        return [(self.ids[doc], round(score, 2)) for doc, score in ranked]
+
+    # ---------- Persistence ----------
+    def to_json(self):
+        # Postings are delta-encoded: small numbers compress far better
+        deltas = []
+        for postings in self.postings:
+            previous = 0
+            encoded = []
+            for posting in postings:
+                encoded.append(posting - previous)
+                previous = posting
+            deltas.append(encoded)
+        return {"version": 1, "fields": list(FIELDS), "ids": list(self.ids),
+                "terms": self.terms, "postings": deltas}
+
+    def save(self, path):
+        body = json.dumps(self.to_json(), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        with open(path, "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=9, mtime=0) as f:
+                f.write(body)
+
+    @classmethod
+    def load(cls, path):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        postings = []
+        for deltas in data["postings"]:
+            total = 0
+            decoded = []
+            for delta in deltas:
+                total += delta
+                decoded.append(total)
+            postings.append(decoded)
+        return cls(data["ids"], data["terms"], postings)
@@ -0,0 +1,123 @@
+from sys import intern
+
+# OSM tags kept in shop_tags. A trailing "*" keeps every key with that prefix.
+# Address and contact tags are left out since they already have columns.
+DEFAULT_TAG_PATTERNS = (
+    "shop", "craft", "amenity", "motorcycle", "motorcycle:*", "service:*",
+    "opening_hours", "opening_hours:*", "brand", "brand:*", "operator",
+    "description", "wheelchair", "payment:*", "check_date",
+)
+
+
+def _interned(value):
+    # Countries, cities and streets repeat across thousands of shops; share one copy
+    return intern(value) if value is not None else None
+
+
+class TagProjection:
+    """Picks the OSM tags worth keeping from an element's tags.
+
+    Built from patterns like DEFAULT_TAG_PATTERNS: exact keys, or prefixes
+    ending in "*". Whether a key is kept is decided once per distinct key,
+    and kept keys are interned, so every shop's shop_tags shares the same
+    key strings.
+    """
+
+    def __init__(self, patterns=DEFAULT_TAG_PATTERNS):
+        self.patterns = tuple(patterns)
+        self.keys = {pattern for pattern in self.patterns if not pattern.endswith("*")}
+        self.prefixes = tuple(pattern[:-1] for pattern in self.patterns if pattern.endswith("*"))
+        self._decided = {}
+
+    def _decide(self, key):
+        kept = key in self.keys or key.startswith(self.prefixes)
+        decision = self._decided[key] = intern(key) if kept else None
+        return decision
+
+    def __call__(self, tags):
+        decided = self._decided
+        projected = {}
+        for key, value in tags.items():
+            kept = decided[key] if key in decided else self._decide(key)
+            if kept is not None:
+                projected[kept] = value
+        return projected
+
+
+class ShopRecord:
+    """One shop inside the Python pipeline, as flat slots instead of nested dicts.
+
+    The motorcycle_shops row shape (with `address` and `contact` objects)
+    is only built by to_row(), right before a record is stored. Country
+    codes, cities and streets are interned.
+    """
+
+    __slots__ = ("id", "country_code", "name", "lat", "lon", "city", "street", "housenumber", "postcode",
+                 "suburb", "phone", "fax", "website", "email", "shop_tags", "source_country")
+
+    def __init__(self, id, country_code, name, lat, lon, city=None, street=None, housenumber=None,
+                 postcode=None, suburb=None, phone=None, fax=None, website=None, email=None,
+                 shop_tags=None, source_country=None):
+        self.id = id
+        self.country_code = _interned(country_code)
+        self.name = name
+        self.lat = lat
+        self.lon = lon
+        self.city = _interned(city)
+        self.street = _interned(street)
+        self.housenumber = housenumber
+        self.postcode = postcode
+        self.suburb = suburb
+        self.phone = phone
+        self.fax = fax
+        self.website = website
+        self.email = email
+        self.shop_tags = shop_tags
+        self.source_country = _interned(source_country)
+
+    @classmethod
+    def from_element(cls, element, country_code, projection=None):
+        """Record for an Overpass element, or None for one without tags.
+
+        With a TagProjection only the tags it keeps go into shop_tags;
+        without one, all of them do.
+        """
+        tags = element.get("tags")
+        if not tags:
+            return None
+        get = tags.get
+        # Positional, in slot order: this runs once per element
+        return cls(element["id"], get("addr:country", country_code), get("name"), element.get("lat"),
+                   element.get("lon"), get("addr:city"), get("addr:street"), get("addr:housenumber"),
+                   get("addr:postcode"), get("addr:suburb"), get("contact:phone") or get("phone"),
+                   get("contact:fax"), get("contact:website") or get("website"),
+                   get("contact:email") or get("email"), projection(tags) if projection else tags,
+                   country_code)
+
+    def to_row(self):
+        """The motorcycle_shops row (same shape as format_records has always produced)."""
+        return {
+            "id": self.id,
+            "country_code": self.country_code,
+            "name": self.name,
+            "lat": self.lat,
+            "lon": self.lon,
+            "address": {
+                "city": self.city,
+                "street": self.street,
+                "housenumber": self.housenumber,
+                "postcode": self.postcode,
+                "suburb": self.suburb
+            },
+            "contact": {
+                "phone": self.phone,
+                "fax": self.fax,
+                "website": self.website,
+                "email": self.email
+            },
+            "shop_tags": self.shop_tags,
+            "source_country": self.source_country
+        }
+
+    def __repr__(self):
+        return f"ShopRecord(id={self.id!r}, name={self.name!r}, country_code={self.country_code!r})"
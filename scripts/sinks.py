@@ -0,0 +1,183 @@
+import json
+import threading
+import time
+
+import requests
+
+from http_session import RetryingSession
+
+DEFAULT_TABLE = "motorcycle_shops"
+
+# Postgres statement_timeout, surfaced by PostgREST when a batch takes too long
+STATEMENT_TIMEOUT_CODE = "57014"
+# What the PostgREST session retries: throttling and a gateway that is briefly
+# down. Timeouts (a read timeout, 500 with 57014, 504) depend on the batch
+# size, so they are raised at once and the batch is split instead
+SINK_RETRY_STATUS = {429, 502, 503}
+# Answers that mean the batch should be retried in smaller pieces
+TOO_LARGE_STATUS = {413, 504}
+
+
+class BatchTooLarge(Exception):
+    """The sink rejected a batch because of its size (413, statement timeout, read timeout)."""
+
+
+# ---------- Sinks ----------
+class Sink:
+    """Destination for formatted shop records.
+
+    Subclasses implement `upsert(records)` for one batch and raise
+    BatchTooLarge when the batch should be retried in smaller pieces.
+    """
+
+    def upsert(self, records):
+        raise NotImplementedError
+
+    def delete(self, ids):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class NullSink(Sink):
+    """Discards everything; used for dry runs and benchmarks."""
+
+    def upsert(self, records):
+        pass
+
+    def delete(self, ids):
+        pass
+
+
+class SupabaseSink(Sink):
+    """Upserts through the supabase-py client."""
+
+    def __init__(self, client, table=DEFAULT_TABLE):
+        self.client = client
+        self.table = table
+
+    def upsert(self, records):
+        try:
+            self.client.table(self.table).upsert(records).execute()
+        except Exception as e:
+            # postgrest APIError carries the Postgres error code; httpx timeouts
+            # don't, but their class name gives them away
+            if str(getattr(e, "code", "")) in (STATEMENT_TIMEOUT_CODE, "413") or "Timeout" in type(e).__name__:
+                raise BatchTooLarge(str(e)) from e
+            raise
+
+    def delete(self, ids):
+        self.client.table(self.table).delete().in_("id", list(ids)).execute()
+
+
+class PostgrestSink(Sink):
+    """Upserts by POSTing JSON straight to a PostgREST endpoint.
+
+    Works against Supabase (`<project>/rest/v1`) or any local stand-in that
+    speaks the same protocol, which makes it handy for tests and benchmarks.
+    """
+
+    def __init__(self, base_url, api_key=None, table=DEFAULT_TABLE, session=None, pool_size=4,
+                 retry_delay=2.0):
+        self.url = f"{base_url.rstrip('/')}/{table}"
+        self.session = session or RetryingSession(pool_size=pool_size, read_timeout=60, max_retries=3,
+                                                  base_delay=retry_delay, retry_status=SINK_RETRY_STATUS,
+                                                  retry_read_timeouts=False)
+        self.headers = {
+            "Content-Type": "application/json",
+            "Prefer": "resolution=merge-duplicates,return=minimal",
+        }
+        if api_key:
+            self.headers["apikey"] = api_key
+            self.headers["Authorization"] = f"Bearer {api_key}"
+
+    def upsert(self, records):
+        body = json.dumps(records, separators=(",", ":"))
+        try:
+            self.session.post(self.url, data=body.encode("utf-8"), headers=self.headers)
+        except requests.Timeout as e:
+            raise BatchTooLarge(f"timed out after {len(records)} rows") from e
+        except requests.HTTPError as e:
+            response = e.response
+            if response is not None and (response.status_code in TOO_LARGE_STATUS
+                                         or STATEMENT_TIMEOUT_CODE in response.text):
+                raise BatchTooLarge(f"HTTP {response.status_code} for {len(records)} rows") from e
+            raise
+
+    def delete(self, ids):
+        id_list = ",".join(str(record_id) for record_id in ids)
+        self.session.request("DELETE", f"{self.url}?id=in.({id_list})", headers=self.headers)
+
+    def close(self):
+        self.session.close()
+
+
+# ---------- Adaptive batching ----------
+class AdaptiveBatchSize:
+    """AIMD controller for the upsert batch size, shared by all submitters.
+
+    The size grows by `growth` while batches finish under `target_latency`
+    seconds and is cut by `shrink` when they don't. A BatchTooLarge error
+    halves it straight away.
+    """
+
+    def __init__(self, initial=100, minimum=10, maximum=1000, target_latency=2.0,
+                 growth=1.25, shrink=0.7):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.target_latency = target_latency
+        self.growth = growth
+        self.shrink = shrink
+        self._size = float(min(self.maximum, max(self.minimum, initial)))
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        with self._lock:
+            return int(self._size)
+
+    def record(self, rows, seconds):
+        with self._lock:
+            # Only trust full-size batches to grow the size; a short tail batch
+            # says little about how a full one would do
+            if seconds <= self.target_latency:
+                if rows >= int(self._size):
+                    self._size = min(self.maximum, self._size * self.growth + 1)
+            else:
+                self._size = max(self.minimum, self._size * self.shrink)
+
+    def too_large(self, rows):
+        with self._lock:
+            self._size = max(self.minimum, min(self._size, rows / 2))
+
+
+class AdaptiveSink(Sink):
+    """Splits incoming record batches to the current adaptive size."""
+
+    def __init__(self, sink, batch_size):
+        self.sink = sink
+        self.batch_size = batch_size
+
+    def upsert(self, records):
+        offset = 0
+        while offset < len(records):
+            chunk = records[offset:offset + self.batch_size.size]
+            started = time.monotonic()
+            try:
+                self.sink.upsert(chunk)
+            except BatchTooLarge:
+                if len(chunk) <= self.batch_size.minimum:
+                    raise
+                self.batch_size.too_large(len(chunk))
+                continue
+            self.batch_size.record(len(chunk), time.monotonic() - started)
+            offset += len(chunk)
+
+    def delete(self, ids):
+        ids = list(ids)
+        for offset in range(0, len(ids), self.batch_size.maximum):
+            self.sink.delete(ids[offset:offset + self.batch_size.maximum])
+
+    def close(self):
+        self.sink.close()
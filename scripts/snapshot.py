@@ -0,0 +1,109 @@
+import gzip
+import json
+import os
+import threading
+
+
+class SnapshotStore:
+    """Latest formatted records per country, kept locally next to Supabase.
+
+    Each country lives in `<CC>.jsonl.gz` (one record per line). While a
+    country is being fetched its records go to `<CC>.partial.jsonl.gz`;
+    `commit()` then either replaces the country's snapshot (full fetch) or
+    merges the new records into it by id (incremental fetch). Later build
+    steps (shards, indexes, diffs) read from here instead of Supabase.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._partials = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, code):
+        return os.path.join(self.directory, f"{code}.jsonl.gz")
+
+    def _partial_path(self, code):
+        return os.path.join(self.directory, f"{code}.partial.jsonl.gz")
+
+    def begin(self, code, resume=False):
+        """Start collecting records for `code`; `resume` keeps what an interrupted run stored."""
+        with self._lock:
+            path = self._partial_path(code)
+            if not resume and os.path.exists(path):
+                os.remove(path)
+            # Appending adds another gzip member, which gzip.open reads transparently
+            self._partials[code] = (threading.Lock(), gzip.open(path, "at", encoding="utf-8"))
+
+    def append(self, code, records):
+        with self._lock:
+            lock, f = self._partials[code]
+        with lock:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+            f.flush()
+
+    def _close_partial(self, code):
+        with self._lock:
+            entry = self._partials.pop(code, None)
+        if entry:
+            entry[1].close()
+
+    def commit(self, code, merge=False):
+        self._close_partial(code)
+        partial = self._partial_path(code)
+        if not os.path.exists(partial):
+            return
+        if merge and os.path.exists(self.path(code)):
+            records = {record["id"]: record for record in self.read(code)}
+            for record in _read_lines(partial):
+                records[record["id"]] = record
+            tmp_path = self.path(code) + ".tmp"
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                for record in records.values():
+                    f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+            os.replace(tmp_path, self.path(code))
+            os.remove(partial)
+        else:
+            os.replace(partial, self.path(code))
+
+    def discard(self, code):
+        """Drop what was collected for `code` without touching its snapshot."""
+        self._close_partial(code)
+        try:
+            os.remove(self._partial_path(code))
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        """Close open partials without committing them (kept for a resume)."""
+        for code in list(self._partials):
+            self._close_partial(code)
+
+    def countries(self):
+        return sorted(name[:-len(".jsonl.gz")] for name in os.listdir(self.directory)
+                      if name.endswith(".jsonl.gz") and not name.endswith(".partial.jsonl.gz"))
+
+    def read(self, code):
+        path = self.path(code)
+        if not os.path.exists(path):
+            return iter(())
+        return _read_lines(path)
+
+    def __iter__(self):
+        for code in self.countries():
+            yield from self.read(code)
+
+
+def _read_lines(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                # A crash mid-write can leave a torn last line
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+        except (EOFError, gzip.BadGzipFile):
+            # ...or a truncated last gzip member
+            return
@@ -0,0 +1,196 @@
+import heapq
+import math
+import struct
+import sys
+from array import array
+
+# Packed R-tree built with Sort-Tile-Recursive (STR). Points are stored in
+# STR order and every level above them is a flat array of bounding boxes:
+# node j of level L+1 covers entries j*M .. j*M+M-1 of level L, so the tree
+# needs no child pointers and loads as a handful of arrays.
+MAGIC = b"MSHOPRT1"
+DEFAULT_NODE_SIZE = 16
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+_HEADER = struct.Struct("<8sIII")
+_LITTLE = sys.byteorder == "little"
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _box_distance_km(lat, lon, s, w, n, e):
+    # Distance to the closest point of the box; 0 inside it. Good enough as a
+    # lower bound at the scale of Europe (no boxes across the antimeridian).
+    return haversine_km(lat, lon, min(max(lat, s), n), min(max(lon, w), e))
+
+
+def _str_order(points, node_size):
+    """Indexes of `points` [(lat, lon), ...] in Sort-Tile-Recursive order."""
+    count = len(points)
+    if not count:
+        return []
+    leaves = math.ceil(count / node_size)
+    slices = math.ceil(math.sqrt(leaves))
+    per_slice = slices * node_size
+    by_lon = sorted(range(count), key=lambda i: points[i][1])
+    order = []
+    for start in range(0, count, per_slice):
+        order.extend(sorted(by_lon[start:start + per_slice], key=lambda i: points[i][0]))
+    return order
+
+
+class SpatialIndex:
+    """Static R-tree over shop coordinates.
+
+    Build with SpatialIndex.build(records) or load a saved one with
+    SpatialIndex.load(path). Queries return shop ids (with distances in km
+    for the radius and nearest queries).
+    """
+
+    def __init__(self, ids, coords, levels, node_size):
+        self.ids = ids              # int64 per point, STR order
+        self.coords = coords        # float64 [lat0, lon0, lat1, lon1, ...]
+        self.levels = levels        # bottom-up; float64 [s, w, n, e, ...] per node
+        self.node_size = node_size
+
+    @classmethod
+    def build(cls, records, node_size=DEFAULT_NODE_SIZE):
+        """Index records with a numeric lat/lon; others are skipped."""
+        points, point_ids = [], []
+        for record in records:
+            lat, lon = record.get("lat"), record.get("lon")
+            if isinstance(lat, (int, float)) and isinstance(lon, (int, float)):
+                points.append((float(lat), float(lon)))
+                point_ids.append(record["id"])
+
+        order = _str_order(points, node_size)
+        ids = array("q", (point_ids[i] for i in order))
+        coords = array("d")
+        for i in order:
+            coords.extend(points[i])
+
+        levels = []
+        # Leaf boxes come straight from the points; upper levels from the boxes below
+        entries = [(lat, lon, lat, lon) for lat, lon in (points[i] for i in order)]
+        while len(entries) > 1 or not levels:
+            boxes = array("d")
+            for start in range(0, len(entries), node_size):
+                group = entries[start:start + node_size]
+                boxes.extend((min(b[0] for b in group), min(b[1] for b in group),
+                              max(b[2] for b in group), max(b[3] for b in group)))
+            levels.append(boxes)
+            entries = [tuple(boxes[i:i + 4]) for i in range(0, len(boxes), 4)]
+            if not entries:
+                break
+        return cls(ids, coords, levels, node_size)
+
+    def __len__(self):
+        return len(self.ids)
+
+    # ---------- Queries ----------
+    def _candidates(self, s, w, n, e):
+        """Point positions whose leaf boxes intersect the query box."""
+        if not self.ids:
+            return
+        size = self.node_size
+        top = len(self.levels) - 1
+        stack = [(top, j) for j in range(len(self.levels[top]) // 4)]
+        while stack:
+            level, node = stack.pop()
+            boxes = self.levels[level]
+            o = node * 4
+            if boxes[o] > n or boxes[o + 2] < s or boxes[o + 1] > e or boxes[o + 3] < w:
+                continue
+            first = node * size
+            if level == 0:
+                yield from range(first, min(first + size, len(self.ids)))
+            else:
+                below = len(self.levels[level - 1]) // 4
+                stack.extend((level - 1, child) for child in range(first, min(first + size, below)))
+
+    def within_bbox(self, south, west, north, east):
+        """Ids of shops inside the box (inclusive)."""
+        coords = self.coords
+        return [self.ids[i] for i in self._candidates(south, west, north, east)
+                if south <= coords[2 * i] <= north and west <= coords[2 * i + 1] <= east]
+
+    def within_radius(self, lat, lon, radius_km):
+        """[(id, distance_km), ...] of shops within radius_km, nearest first."""
+        dlat = radius_km / KM_PER_DEGREE
+        cos_lat = math.cos(math.radians(min(89.0, abs(lat) + dlat)))
+        dlon = min(180.0, radius_km / (KM_PER_DEGREE * max(cos_lat, 1e-6)))
+        coords = self.coords
+        hits = []
+        for i in self._candidates(lat - dlat, lon - dlon, lat + dlat, lon + dlon):
+            distance = haversine_km(lat, lon, coords[2 * i], coords[2 * i + 1])
+            if distance <= radius_km:
+                hits.append((self.ids[i], distance))
+        hits.sort(key=lambda hit: hit[1])
+        return hits
+
+    def nearest(self, lat, lon, k=1):
+        """[(id, distance_km), ...] of the k shops closest to (lat, lon)."""
+        if not self.ids or k <= 0:
+            return []
+        size = self.node_size
+        coords = self.coords
+        top = len(self.levels) - 1
+        # Best-first search: a heap of nodes and points keyed by their
+        # distance lower bound; points pop out in exact distance order
+        heap = []
+        for node in range(len(self.levels[top]) // 4):
+            heapq.heappush(heap, (_box_distance_km(lat, lon, *self.levels[top][node * 4:node * 4 + 4]), top, node))
+        result = []
+        while heap and len(result) < k:
+            distance, level, item = heapq.heappop(heap)
+            if level < 0:
+                result.append((self.ids[item], distance))
+                continue
+            first = item * size
+            if level == 0:
+                for i in range(first, min(first + size, len(self.ids))):
+                    heapq.heappush(heap, (haversine_km(lat, lon, coords[2 * i], coords[2 * i + 1]), -1, i))
+            else:
+                boxes = self.levels[level - 1]
+                for child in range(first, min(first + size, len(boxes) // 4)):
+                    o = child * 4
+                    heapq.heappush(heap, (_box_distance_km(lat, lon, *boxes[o:o + 4]), level - 1, child))
+        return result
+
+    # ---------- Persistence ----------
+    def save(self, path):
+        arrays = [self.ids, self.coords] + self.levels
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, self.node_size, len(self.ids), len(self.levels)))
+            f.write(struct.pack(f"<{len(self.levels)}I", *(len(boxes) for boxes in self.levels)))
+            for values in arrays:
+                if not _LITTLE:
+                    values = array(values.typecode, values)
+                    values.byteswap()
+                values.tofile(f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            magic, node_size, count, level_count = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a shop spatial index")
+            lengths = struct.unpack(f"<{level_count}I", f.read(4 * level_count))
+
+            def read(typecode, length):
+                values = array(typecode)
+                values.fromfile(f, length)
+                if not _LITTLE:
+                    values.byteswap()
+                return values
+
+            ids = read("q", count)
+            coords = read("d", 2 * count)
+            levels = [read("d", length) for length in lengths]
+        return cls(ids, coords, levels, node_size)
@@ -0,0 +1,38 @@
+import json
+import os
+import threading
+
+
+class SyncState:
+    """Per-country timestamp of the last successful sync, persisted as JSON.
+
+    Timestamps are the Overpass `timestamp_osm_base` of the data we stored,
+    so the next run can ask only for elements changed since then.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._state = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._state = json.load(f)
+
+    def last_sync(self, country_code):
+        with self._lock:
+            return self._state.get(country_code)
+
+    def mark_synced(self, country_code, timestamp):
+        with self._lock:
+            self._state[country_code] = timestamp
+            self._save()
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._state, f, indent=2, sort_keys=True)
+        # Atomic swap so a crash never leaves a half-written state file
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,110 @@
+import csv
+import json
+import random
+from tiling import COUNTRY_BBOXES
+
+SYNTHETIC_TIMESTAMP = "2025-01-01T00:00:00Z"
+
+# Made-up but plausible values; enough variety to exercise string handling
+NAMES = ["Moto", "Bike", "Motorrad", "Racing", "Custom", "Garage", "Service", "Center", "Pro", "Speed"]
+CITIES = ["Berlin", "Paris", "Roma", "Madrid", "Warszawa", "Wien", "Praha", "Lisboa", "Athína", "Tallinn",
+          "München", "Lyon", "Milano", "Sevilla", "Kraków", "Graz", "Brno", "Porto", "Sofia", "Riga"]
+STREETS = ["Hauptstraße", "Rue de la Paix", "Via Roma", "Calle Mayor", "ul. Długa", "Ringstraße"]
+SHOP_TAGS = [("shop", "motorcycle"), ("craft", "motorcycle"), ("amenity", "car_repair")]
+EXTRA_TAGS = [
+    ("opening_hours", "Mo-Fr 09:00-18:00; Sa 09:00-13:00"),
+    ("brand", "Honda"),
+    ("service:motorcycle:repair", "yes"),
+    ("service:motorcycle:sales", "yes"),
+    ("service:motorcycle:tyres", "yes"),
+    ("wheelchair", "no"),
+    ("check_date", "2024-05-01"),
+    ("source", "survey"),
+]
+
+
+def synthetic_elements(country_code, count, seed=0):
+    """`count` fake Overpass nodes inside the country's bounding box (same ones every time)."""
+    rng = random.Random(f"{country_code}:{seed}")
+    south, west, north, east = COUNTRY_BBOXES.get(country_code, (45.0, 5.0, 55.0, 15.0))
+    base_id = 10_000_000_000 + sum(map(ord, country_code)) * 100_000_000
+    elements = []
+    for number in range(count):
+        key, value = SHOP_TAGS[number % len(SHOP_TAGS)]
+        tags = {
+            key: value,
+            "name": f"{rng.choice(NAMES)} {rng.choice(NAMES)} {number}",
+            "addr:city": rng.choice(CITIES),
+            "addr:street": rng.choice(STREETS),
+            "addr:housenumber": str(rng.randint(1, 200)),
+            "addr:postcode": f"{rng.randint(1000, 99999)}",
+        }
+        if key == "amenity":
+            tags["motorcycle"] = "yes"
+        if rng.random() < 0.6:
+            tags["phone"] = f"+{rng.randint(30, 49)} {rng.randint(100, 999)} {rng.randint(100000, 9999999)}"
+        if rng.random() < 0.4:
+            tags["website"] = f"https://shop{number}.example"
+        for extra_key, extra_value in rng.sample(EXTRA_TAGS, rng.randint(0, len(EXTRA_TAGS))):
+            tags[extra_key] = extra_value
+        elements.append({
+            "type": "node",
+            "id": base_id + number,
+            "lat": round(rng.uniform(south, north), 7),
+            "lon": round(rng.uniform(west, east), 7),
+            "tags": tags,
+        })
+    return elements
+
+
+def overpass_body(elements, timestamp=SYNTHETIC_TIMESTAMP):
+    """Encode elements the way Overpass does (metadata first, then `elements`)."""
+    return json.dumps({
+        "version": 0.6,
+        "generator": "Overpass API (synthetic)",
+        "osm3s": {"timestamp_osm_base": timestamp},
+        "elements": elements,
+    }, ensure_ascii=False).encode("utf-8")
+
+
+CSV_COLUMNS = ["city", "name", "address", "rating", "reviews_count", "phone", "website", "business_type",
+               "hours", "latitude", "longitude", "place_id", "scraped_at"]
+CSV_COUNTRIES = [("Germany", "DE", "49"), ("France", "FR", "33"), ("Italy", "IT", "39"), ("Spain", "ES", "34"),
+                 ("Poland", "PL", "48"), ("Netherlands", "NL", "31"), ("Austria", "AT", "43"),
+                 ("Greece", "EL", "30"), ("Czechia", "CZ", "420"), ("Portugal", "PT", "351")]
+CSV_HOURS = ["Closed ⋅ Opens 9 AM", "Open ⋅ Closes 6 PM", "Open 24 hours",
+             "Closed ⋅ Opens 8 AM Mon", "Open ⋅ Closes 12 PM ⋅ Reopens 2 PM", "N/A"]
+BUSINESS_TYPES = ["Motorcycle repair shop", "Motorcycle dealer", "Motorcycle parts store"]
+PLACE_ID_CHARS = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+
+
+def synthetic_csv_rows(count, seed=0):
+    """`count` rows shaped like the scraped Google Places CSV, including its messy values."""
+    rng = random.Random(f"csv:{seed}")
+    for number in range(count):
+        country, code, calling_code = rng.choice(CSV_COUNTRIES)
+        south, west, north, east = COUNTRY_BBOXES[code]
+        city = rng.choice(CITIES)
+        yield {
+            "city": f"{city}, {country}",
+            "name": f"{rng.choice(NAMES)} {rng.choice(NAMES)} {number}",
+            "address": f"{rng.choice(STREETS)} {rng.randint(1, 200)}, {rng.randint(1000, 99999)} {city}, {country}",
+            "rating": f"{rng.uniform(1, 5):.1f}" if rng.random() < 0.9 else "N/A",
+            "reviews_count": str(rng.randint(0, 2000)) if rng.random() < 0.9 else "N/A",
+            "phone": f"+{calling_code} {rng.randint(100, 999)} {rng.randint(100000, 999999)}"
+                     if rng.random() < 0.8 else "N/A",
+            "website": f"https://shop{number}.example/" if rng.random() < 0.5 else "N/A",
+            "business_type": rng.choice(BUSINESS_TYPES),
+            "hours": rng.choice(CSV_HOURS),
+            "latitude": f"{rng.uniform(south, north):.7f}",
+            "longitude": f"{rng.uniform(west, east):.7f}",
+            "place_id": "ChIJ" + "".join(rng.choice(PLACE_ID_CHARS) for _ in range(23)),
+            "scraped_at": "2025-10-25T02:56:34.106792",
+        }
+
+
+def write_synthetic_csv(path, count, seed=0):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
+        writer.writeheader()
+        writer.writerows(synthetic_csv_rows(count, seed))
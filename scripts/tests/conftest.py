@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The scripts import each other as flat modules, the way `python scripts/x.py` runs them
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
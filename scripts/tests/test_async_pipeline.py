@@ -0,0 +1,55 @@
+import asyncio
+import threading
+import time
+
+from async_pipeline import AsyncPipeline
+
+
+def _pipeline(fetch, sink, transform=lambda code, elements: list(elements), **kwargs):
+    return AsyncPipeline(fetch, transform, sink, batch_size=10, **kwargs)
+
+
+def test_waiting_for_a_slow_sink_does_not_count_against_the_timeout():
+    stored, lock = [], threading.Lock()
+
+    async def fetch(code):
+        return range(100)
+
+    def sink(code, records):
+        time.sleep(0.05)
+        with lock:
+            stored.extend(records)
+
+    # Ten batches through one upsert slot take ~0.5s, well past the timeout
+    pipeline = _pipeline(fetch, sink, country_timeout=0.2)
+    result, = pipeline.run(["DE"])
+    assert result.error is None
+    assert (result.inserted, result.committed) == (100, 100)
+    assert sorted(stored) == list(range(100))
+
+
+def test_slow_download_times_out():
+    async def fetch(code):
+        await asyncio.sleep(5)
+        return range(10)
+
+    started = time.monotonic()
+    result, = _pipeline(fetch, lambda code, records: None, country_timeout=0.1).run(["DE"])
+    assert isinstance(result.error, TimeoutError)
+    assert str(result.error) == "gave up after 0.1s"
+    assert time.monotonic() - started < 2
+
+
+def test_fetch_and_format_time_adds_up():
+    async def fetch(code):
+        await asyncio.sleep(0.1)
+        return range(100)
+
+    def transform(code, elements):
+        time.sleep(0.03)
+        return list(elements)
+
+    # Neither step alone reaches the timeout, together they do
+    result, = _pipeline(fetch, lambda code, records: None, transform, country_timeout=0.2).run(["DE"])
+    assert isinstance(result.error, TimeoutError)
+    assert 0 < result.committed < 100
@@ -0,0 +1,19 @@
+from build_clusters import build_pyramid, shop_points
+
+
+def test_single_shops_keep_their_ids():
+    records = [
+        {"id": -5863140531513107, "name": "Google", "lat": 48.85, "lon": 2.35, "country_code": "FR"},
+        {"id": 7, "name": "OSM", "lat": 43.3, "lon": 5.37, "country_code": "FR"},
+        {"id": 8, "name": "No position"},
+    ]
+    points = shop_points(records)
+    assert [point.to_json()["id"] for point in points] == [-5863140531513107, 7]
+
+
+def test_nearby_shops_cluster_at_low_zoom():
+    records = [{"id": i, "lat": 48.85 + i * 0.01, "lon": 2.35, "country_code": "FR"} for i in range(5)]
+    levels = build_pyramid(shop_points(records), 0, 18)
+    assert [point.count for point in levels[0]] == [5]
+    assert len(levels[18]) == 5
+    assert sum(point.count for point in levels[10]) == 5
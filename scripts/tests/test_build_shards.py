@@ -0,0 +1,31 @@
+import gzip
+import json
+
+from build_shards import build_shards
+
+
+def test_shops_are_sorted_by_id(tmp_path):
+    records = [
+        {"id": 42, "name": "OSM", "lat": 49.8, "lon": 6.3, "country_code": "LU"},
+        {"id": -5863140531513107, "name": "Google", "lat": 49.6, "lon": 6.1, "country_code": "LU"},
+        {"id": 7, "name": "OSM", "lat": 49.7, "lon": 6.2, "country_code": "LU"},
+    ]
+    manifest = build_shards(records, str(tmp_path))
+    assert manifest["countries"]["LU"]["count"] == 3
+    with gzip.open(tmp_path / "LU.json.gz", "rt", encoding="utf-8") as f:
+        shops = json.load(f)
+    assert [shop["id"] for shop in shops] == [-5863140531513107, 7, 42]
+
+
+def test_shards_of_vanished_countries_are_removed(tmp_path):
+    build_shards([
+        {"id": 1, "name": "A", "lat": 49.6, "lon": 6.1, "country_code": "LU"},
+        {"id": 2, "name": "B", "lat": 35.9, "lon": 14.4, "country_code": "MT"},
+        {"id": 3, "name": "C", "lat": 49.6, "lon": 6.1},
+    ], str(tmp_path))
+    (tmp_path / "notes.txt").write_text("kept")
+    assert sorted(p.name for p in tmp_path.glob("*.json.gz")) == ["LU.json.gz", "MT.json.gz", "XX.json.gz"]
+
+    manifest = build_shards([{"id": 1, "name": "A", "lat": 49.6, "lon": 6.1, "country_code": "LU"}], str(tmp_path))
+    assert list(manifest["countries"]) == ["LU"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["LU.json.gz", "manifest.json", "notes.txt"]
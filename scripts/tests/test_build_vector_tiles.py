@@ -0,0 +1,118 @@
+from build_vector_tiles import BUFFER, EXTENT, LAYER_NAME, build_tiles, encode_tile
+
+
+# ---------- A minimal protobuf reader, independent of the encoder ----------
+def _read_varint(data, offset):
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, offset
+
+
+def _fields(data):
+    """(field number, value) pairs; length-delimited values are bytes."""
+    offset = 0
+    while offset < len(data):
+        key, offset = _read_varint(data, offset)
+        number, wire_type = key >> 3, key & 7
+        if wire_type == 0:
+            value, offset = _read_varint(data, offset)
+        elif wire_type == 2:
+            length, offset = _read_varint(data, offset)
+            value, offset = data[offset:offset + length], offset + length
+        else:
+            raise AssertionError(f"unexpected wire type {wire_type}")
+        yield number, value
+
+
+def _packed(data):
+    offset, values = 0, []
+    while offset < len(data):
+        value, offset = _read_varint(data, offset)
+        values.append(value)
+    return values
+
+
+def _unzigzag(value):
+    return (value >> 1) ^ -(value & 1)
+
+
+def _value(data):
+    (number, value), = _fields(data)
+    if number == 1:
+        return value.decode("utf-8")
+    assert number == 6, "only string and sint values are written"
+    return _unzigzag(value)
+
+
+def decode_tile(data):
+    """{layer name: {"version", "extent", "features": [(x, y, properties)]}}"""
+    layers = {}
+    for number, layer_bytes in _fields(data):
+        assert number == 3
+        layer = {"features": []}
+        keys, values, features = [], [], []
+        for field, value in _fields(layer_bytes):
+            if field == 15:
+                layer["version"] = value
+            elif field == 1:
+                name = value.decode("utf-8")
+            elif field == 2:
+                features.append(dict((n, v) for n, v in _fields(value)))
+            elif field == 3:
+                keys.append(value.decode("utf-8"))
+            elif field == 4:
+                values.append(_value(value))
+            elif field == 5:
+                layer["extent"] = value
+        for feature in features:
+            assert feature[3] == 1, "point geometry"
+            command, x, y = _packed(feature[4])
+            assert command == (1 << 3) | 1, "a single MoveTo"
+            tags = _packed(feature[2])
+            properties = {keys[k]: values[v] for k, v in zip(tags[::2], tags[1::2])}
+            layer["features"].append((_unzigzag(x), _unzigzag(y), properties))
+        layers[name] = layer
+    return layers
+
+
+def test_encode_tile_round_trip():
+    features = [
+        (0, 0, {"id": 42, "name": "Corner"}),
+        (EXTENT, EXTENT, {"id": -5863140531513107, "name": "Müller Motos", "city": "Köln"}),
+        (-BUFFER, EXTENT + BUFFER, {"id": 7, "name": "Corner", "country": "DE"}),
+        (1234, 3000, {"id": 8}),
+    ]
+    layers = decode_tile(encode_tile(features))
+    assert list(layers) == [LAYER_NAME]
+    layer = layers[LAYER_NAME]
+    assert (layer["version"], layer["extent"]) == (2, EXTENT)
+    assert layer["features"] == features
+
+
+def _tiles(features, zoom):
+    return {(x, y): decode_tile(data)[LAYER_NAME]["features"]
+            for _, x, y, data in build_tiles(features, zoom, zoom)}
+
+
+def test_points_on_the_tile_edge_and_in_the_buffer():
+    zoom = 1
+    world = EXTENT << zoom
+    edge = (0.5, 0.25, {"id": 1})
+    buffered = (0.5 - (BUFFER // 2) / world, 0.25, {"id": 2})
+    outside = (0.5 - (BUFFER * 2) / world, 0.75, {"id": 3})
+    tiles = _tiles([edge, buffered, outside], zoom)
+
+    # On the edge between x=0 and x=1: in both tiles, at EXTENT and at 0
+    assert (EXTENT, EXTENT // 2, {"id": 1}) in tiles[(0, 0)]
+    assert (0, EXTENT // 2, {"id": 1}) in tiles[(1, 0)]
+    # Just left of the edge: repeated in the right tile's buffer
+    assert (EXTENT - BUFFER // 2, EXTENT // 2, {"id": 2}) in tiles[(0, 0)]
+    assert (-(BUFFER // 2), EXTENT // 2, {"id": 2}) in tiles[(1, 0)]
+    # Further left than the buffer reaches: only in its own tile
+    assert [properties["id"] for _, _, properties in tiles[(0, 1)]] == [3]
+    assert (1, 1) not in tiles
@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from changes import ChangeTracker, record_hash
+from fetch_osm_data import make_stages
+from sinks import Sink
+
+
+def _changeset(path):
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def _run(tracker, code, records):
+    """One fetch run: diff, store and log everything, then finish."""
+    tracker.begin(code)
+    tracker.log(code, tracker.diff(code, records))
+    tracker.finish(code, records)
+    return tracker.counts(code)
+
+
+def test_record_hash_ignores_key_order():
+    assert record_hash({"id": 1, "name": "a"}) == record_hash({"name": "a", "id": 1})
+    assert record_hash({"id": 1, "name": "a"}) != record_hash({"id": 1, "name": "b"})
+
+
+def test_second_run_reports_inserts_updates_and_deletes(tmp_path):
+    first = [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}, {"id": 3, "name": "c"}]
+    tracker = ChangeTracker(str(tmp_path / "manifest"), str(tmp_path / "run1.jsonl"))
+    assert _run(tracker, "LU", first) == {"insert": 3, "update": 0, "delete": 0, "unchanged": 0}
+    tracker.close()
+
+    # A new tracker only knows the first run through the saved manifest
+    second = [{"id": 1, "name": "a"}, {"id": 2, "name": "b2"}, {"id": 4, "name": "d"}]
+    tracker = ChangeTracker(str(tmp_path / "manifest"), str(tmp_path / "run2.jsonl"))
+    assert _run(tracker, "LU", second) == {"insert": 1, "update": 1, "delete": 1, "unchanged": 1}
+    tracker.close()
+
+    entries = _changeset(tmp_path / "run2.jsonl")
+    assert [(e["op"], e["id"]) for e in entries] == [("update", 2), ("insert", 4), ("delete", 3)]
+    assert entries[0]["record"] == {"id": 2, "name": "b2"}
+    assert entries[2]["hash"] == record_hash({"id": 3, "name": "c"})
+
+
+def test_diff_only_returns_changed_records(tmp_path):
+    tracker = ChangeTracker(str(tmp_path / "manifest"), str(tmp_path / "run1.jsonl"))
+    _run(tracker, "MT", [{"id": 1, "name": "a"}])
+    tracker.begin("MT")
+    changes = tracker.diff("MT", [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}])
+    assert [(op, record["id"]) for op, _, record in changes] == [("insert", 2)]
+    tracker.close()
+
+
+def test_changes_are_only_logged_once_stored(tmp_path):
+    path = tmp_path / "changes.jsonl"
+    tracker = ChangeTracker(str(tmp_path / "manifest"), str(path))
+    tracker.begin("LU")
+    tracker.diff("LU", [{"id": 1, "name": "a"}])
+    assert _changeset(path) == []
+    assert tracker.counts("LU")["insert"] == 0
+    tracker.close()
+
+
+class _FailingSink(Sink):
+    def upsert(self, records):
+        raise ConnectionError("sink down")
+
+
+class _Record:
+    # Stands in for a ShopRecord; the store stage only calls to_row()
+    def __init__(self, row):
+        self.row = row
+
+    def to_row(self):
+        return self.row
+
+
+def test_failed_upsert_is_not_in_the_changeset(tmp_path):
+    path = tmp_path / "changes.jsonl"
+    tracker = ChangeTracker(str(tmp_path / "manifest"), str(path))
+    tracker.begin("LU")
+    _, _, store = make_stages(_FailingSink(), None, {"LU": None}, tracker=tracker)
+    with pytest.raises(ConnectionError):
+        store("LU", [_Record({"id": 1, "name": "a"})])
+    tracker.close()
+    assert _changeset(path) == []
+    assert tracker.counts("LU")["insert"] == 0
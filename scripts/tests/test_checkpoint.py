@@ -0,0 +1,66 @@
+from checkpoint import Checkpoint
+
+
+def test_rewind_starts_a_source_over(tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl")
+    checkpoint = Checkpoint(path)
+    checkpoint.start("DE", "abc")
+    checkpoint.advance("DE", 300)
+    checkpoint.rewind("DE")
+    checkpoint.close()
+
+    checkpoint = Checkpoint(path)
+    assert checkpoint.offset("DE") == 0
+    assert checkpoint.start("DE", "abc") == 0
+    checkpoint.close()
+
+
+def test_journal_replay_gives_the_resume_offset(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    checkpoint = Checkpoint(str(path))
+    assert checkpoint.start("DE", "abc") == 0
+    checkpoint.advance("DE", 100)
+    checkpoint.advance("DE", 250)
+    checkpoint.start("FR", "def")
+    checkpoint.complete("FR")
+    checkpoint.close()
+    # A crash mid-write leaves a torn last line
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"source": "DE", "off')
+
+    checkpoint = Checkpoint(str(path))
+    assert checkpoint.start("DE", "abc") == 250
+    assert checkpoint.is_done("FR")
+    assert checkpoint.is_done("FR", "def")
+    assert not checkpoint.is_done("FR", "other")
+    assert not checkpoint.is_done("DE")
+    checkpoint.close()
+
+
+def test_changed_fingerprint_starts_over(tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl")
+    checkpoint = Checkpoint(path)
+    checkpoint.start("DE", "old")
+    checkpoint.advance("DE", 100)
+    assert checkpoint.start("DE", "new") == 0
+    checkpoint.close()
+    assert Checkpoint(path).offset("DE") == 0
+
+
+def test_resume_false_starts_over(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.jsonl"))
+    checkpoint.start("DE", "abc")
+    checkpoint.advance("DE", 100)
+    assert checkpoint.start("DE", "abc", resume=False) == 0
+    assert checkpoint.offset("DE") == 0
+    checkpoint.close()
+
+
+def test_reset_forgets_everything(tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl")
+    checkpoint = Checkpoint(path)
+    checkpoint.start("DE", "abc")
+    checkpoint.complete("DE")
+    checkpoint.reset()
+    checkpoint.close()
+    assert not Checkpoint(path).is_done("DE")
@@ -0,0 +1,76 @@
+import math
+
+import pytest
+
+from columnar import STRING_COLUMNS, ColumnarDataset, _get, export_columnar
+from fetch_osm_data import format_records
+from synthetic import synthetic_elements
+
+RECORDS = format_records({"elements": synthetic_elements("LU", 300)}, "LU") + [
+    # Empty strings and missing optional fields
+    {"id": -5863140531513107, "country_code": "", "source_country": "DE", "name": "", "lat": None,
+     "lon": "8.5", "address": {"city": "Köln", "street": ""}, "contact": None,
+     "shop_tags": {"rating": "4.5", "reviews_count": "12", "source": "google"}},
+    {"id": 7, "name": "Nur Name"},
+]
+
+
+def _expected(record, key_path):
+    value = _get(record, key_path)
+    return None if value in (None, "") else value
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    path = str(tmp_path / "shops.col")
+    stats = export_columnar(RECORDS, path)
+    assert stats == {"rows": len(RECORDS), "bytes": (tmp_path / "shops.col").stat().st_size}
+    with ColumnarDataset(path) as data:
+        yield data
+
+
+def test_numeric_columns_round_trip(dataset):
+    assert len(dataset) == len(RECORDS)
+    assert list(dataset.ids) == [record["id"] for record in RECORDS]
+    for index, record in enumerate(RECORDS):
+        row = dataset.row(index)
+        for key in ("lat", "lon"):
+            if record.get(key) is None:
+                assert math.isnan(row[key])
+            else:
+                assert row[key] == pytest.approx(float(record[key]), abs=1e-5)
+    last, google = dataset.row(len(RECORDS) - 1), dataset.row(len(RECORDS) - 2)
+    assert google["rating"] == 4.5 and google["reviews_count"] == 12
+    assert math.isnan(last["rating"]) and last["reviews_count"] == -1
+
+
+def test_string_columns_and_tables_round_trip(dataset):
+    for name, key_path in STRING_COLUMNS:
+        column = dataset.column(name)
+        expected = [_expected(record, key_path) for record in RECORDS]
+        assert [column[index] for index in range(len(column))] == expected
+        # One table entry per distinct value, in first-seen order
+        assert column.strings() == list(dict.fromkeys(value for value in expected if value is not None))
+    google = dataset.row(len(RECORDS) - 2)
+    assert (google["country_code"], google["name"], google["city"], google["street"], google["phone"]) == \
+           ("DE", None, "Köln", None, None)
+    assert dataset.column("city").lookup("Köln") is not None
+    assert dataset.column("city").lookup("Nowhere") is None
+
+
+def test_wide_string_tables(tmp_path):
+    records = [{"id": n, "name": f"Shop {n}"} for n in range(70000)]
+    path = str(tmp_path / "wide.col")
+    export_columnar(records, path)
+    with ColumnarDataset(path) as data:
+        assert data.header["columns"]["name"]["code_width"] == 4
+        assert data.header["columns"]["city"]["code_width"] == 1
+        names = data.column("name")
+        assert (names[0], names[69999], names.size) == ("Shop 0", "Shop 69999", 70000)
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "shops.json"
+    path.write_bytes(b'{"rows": 0}')
+    with pytest.raises(ValueError, match="not a columnar"):
+        ColumnarDataset(str(path))
@@ -0,0 +1,36 @@
+import hashlib
+
+from csv_records import csv_row_to_record, place_id_to_id, split_city
+
+
+def test_place_id_to_id_is_stable_negative_and_53_bit():
+    place_id = "ChIJN1t_tDeuEmsRUsoyG83frY4"
+    digest = hashlib.sha1(place_id.encode("utf-8")).digest()
+    assert place_id_to_id(place_id) == -(int.from_bytes(digest[:7], "big") >> 3)
+    ids = {place_id_to_id(f"ChIJ{n}") for n in range(10000)}
+    assert len(ids) == 10000
+    # Negative, so never an OSM node id, and exact as a JavaScript number
+    assert all(-(2 ** 53) < record_id < 0 for record_id in ids)
+
+
+def test_split_city():
+    assert split_city("Paris, France") == ("Paris", "FR")
+    assert split_city("Frankfurt am Main, Germany") == ("Frankfurt am Main", "DE")
+    assert split_city("Atlantis") == ("Atlantis", None)
+    assert split_city("N/A") == (None, None)
+
+
+def test_google_places_row():
+    record = csv_row_to_record({"place_id": " ChIJ-abc ", "name": "Moto", "city": "Lyon, France",
+                                "latitude": "45.76", "longitude": "4.83", "rating": "4.5", "hours": "N/A"})
+    assert record["id"] == place_id_to_id("ChIJ-abc")
+    assert (record["country_code"], record["address"]["city"]) == ("FR", "Lyon")
+    assert (record["lat"], record["lon"]) == (45.76, 4.83)
+    assert record["shop_tags"] == {"source": "google_places", "rating": "4.5", "place_id": "ChIJ-abc"}
+
+
+def test_sample_row_and_rows_without_an_id():
+    record = csv_row_to_record({"id": "123", "name": "Shop", "lat": "1.5", "lon": "x", "country_code": "DE"})
+    assert (record["id"], record["lat"], record["lon"]) == (123, 1.5, None)
+    assert csv_row_to_record({"id": "", "name": "No id"}) is None
+    assert csv_row_to_record({"id": "abc"}) is None
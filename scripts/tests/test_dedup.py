@@ -0,0 +1,67 @@
+from dedup import DEFAULT_THRESHOLD, fold, name_key, phone_key, resolve, score_pair, website_key
+
+
+def _shop(shop_id, name, lat, lon, address=None, contact=None, shop_tags=None):
+    return {"id": shop_id, "country_code": "FR", "name": name, "lat": lat, "lon": lon,
+            "address": address or {}, "contact": contact or {}, "shop_tags": shop_tags or {}}
+
+
+OSM = _shop(100, "Moto Rêve", 48.8566, 2.3522,
+            {"street": "Rue de Rivoli", "housenumber": "12", "postcode": "75004"},
+            {"phone": "+33 1 23 45 67 89"}, {"shop": "motorcycle", "source": "osm"})
+GOOGLE = _shop(-5, "MOTO REVE SARL", 48.8568, 2.3525,
+               {"street": "Rue de Rivoli", "housenumber": "12", "city": "Paris"},
+               {"phone": "01 23 45 67 89", "website": "https://www.motoreve.fr/"},
+               {"source": "google", "rating": "4.6"})
+# Same website and door as GOOGLE, but nothing in common with OSM beyond the address
+LISTING = _shop(-9, "Atelier Deux Roues", 48.8569, 2.3526,
+                {"street": "Rue de Rivoli", "housenumber": "12"}, {"website": "motoreve.fr"})
+BAKERY = _shop(200, "Boulangerie Martin", 48.8566, 2.3522,
+               {"street": "Rue de Rivoli", "housenumber": "12", "postcode": "75004"},
+               {"phone": "+33 1 99 99 99 99"})
+
+
+def test_keys_ignore_formatting():
+    assert fold("Moto Rêve") == "moto reve"
+    assert name_key("MOTO REVE SARL") == name_key("Rêve Moto") == "moto reve"
+    assert phone_key("+33 1 23 45 67 89") == phone_key("01.23.45.67.89") == "123456789"
+    assert phone_key("112") is None
+    assert website_key("https://www.motoreve.fr/atelier") == website_key("motoreve.fr") == "motoreve.fr"
+
+
+def test_score_pair_same_shop_from_both_sources():
+    score, reasons = score_pair(OSM, GOOGLE)
+    assert score >= 0.9
+    assert reasons == ["name", "location", "phone", "address"]
+    assert score_pair(GOOGLE, OSM)[0] == score
+
+
+def test_score_pair_neighbours_are_not_the_same_shop():
+    score, reasons = score_pair(OSM, BAKERY)
+    assert score < DEFAULT_THRESHOLD
+    assert "phone" not in reasons and "name" not in reasons
+
+
+def test_resolve_merges_chains_into_the_osm_record():
+    canonical, matches = resolve([BAKERY, LISTING, GOOGLE, OSM, dict(OSM)])
+    assert sorted((a, b) for a, b, _, _ in matches) == [(-9, -5), (-5, 100)]
+    # LISTING only matches GOOGLE, but joins the OSM shop through it
+    assert score_pair(OSM, LISTING)[0] < DEFAULT_THRESHOLD
+    assert [record["id"] for record in canonical] == [100, 200]
+
+    merged = canonical[0]
+    assert merged["name"] == "Moto Rêve"
+    assert merged["address"] == {"street": "Rue de Rivoli", "housenumber": "12", "postcode": "75004",
+                                 "city": "Paris"}
+    assert merged["contact"] == {"phone": "+33 1 23 45 67 89", "website": "https://www.motoreve.fr/"}
+    assert merged["shop_tags"]["source"] == "osm"
+    assert merged["shop_tags"]["rating"] == "4.6"
+    assert sorted(merged["shop_tags"]["merged_ids"].split(";")) == ["-5", "-9"]
+    assert canonical[1] == BAKERY
+    assert "merged_ids" not in OSM["shop_tags"]
+
+
+def test_resolve_without_duplicates_keeps_records():
+    canonical, matches = resolve([BAKERY, OSM])
+    assert canonical == [OSM, BAKERY]
+    assert matches == []
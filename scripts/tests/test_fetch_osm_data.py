@@ -0,0 +1,203 @@
+import asyncio
+import signal
+import sys
+import threading
+import time
+
+import pytest
+
+import fetch_osm_data
+from checkpoint import Checkpoint
+from async_http import AsyncRetryingSession, StreamedBody
+from fetch_osm_data import build_overpass_query, fetch_overpass_data, fetch_overpass_data_async
+from http_session import RetryingSession
+from mock_servers import Faults, MockOverpass, MockPostgrest
+from overpass_cache import ResponseCache
+from overpass_stream import OverpassError
+from snapshot import SnapshotStore
+from sync_state import SyncState
+from synthetic import SYNTHETIC_TIMESTAMP, overpass_body, synthetic_elements
+
+
+@pytest.fixture
+def overpass(tmp_path):
+    # Answers from its replay cache first, so a test can plant exact responses there
+    server = MockOverpass(Faults(), cache_dir=str(tmp_path / "upstream"), elements=50).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def session():
+    session = RetryingSession(max_retries=0)
+    yield session
+    session.close()
+
+
+def test_fetch_then_replay_offline(tmp_path, overpass, session):
+    cache = ResponseCache(str(tmp_path / "cache"))
+    fetched = list(fetch_overpass_data(session, "LU", cache=cache, url=overpass.endpoint))
+    assert [e["id"] for e in fetched] == [e["id"] for e in synthetic_elements("LU", 50)]
+    assert cache.contains(build_overpass_query("LU"))
+
+    overpass.stop()
+    replayed = fetch_overpass_data(session, "LU", cache=cache, offline=True, url=overpass.endpoint)
+    assert list(replayed) == fetched
+    assert replayed.meta["osm3s"]["timestamp_osm_base"]
+    assert overpass.stats.requests == 1
+
+
+def test_offline_miss(tmp_path, session):
+    cache = ResponseCache(str(tmp_path / "cache"))
+    with pytest.raises(LookupError, match="offline"):
+        fetch_overpass_data(session, "MT", cache=cache, offline=True)
+
+
+def test_error_remark_is_not_cached(tmp_path, overpass, session):
+    query = build_overpass_query("MT")
+    overpass.cache.put(query, b'{"osm3s": {}, "elements": [{"id": 1}], '
+                              b'"remark": "runtime error: Query run out of memory using about 2048 MB of RAM."}')
+    cache = ResponseCache(str(tmp_path / "cache"))
+    with pytest.raises(OverpassError, match="out of memory"):
+        list(fetch_overpass_data(session, "MT", cache=cache, url=overpass.endpoint))
+    assert not cache.contains(query)
+    assert not list((tmp_path / "cache").iterdir())
+
+
+@pytest.fixture
+def postgrest():
+    server = MockPostgrest(Faults()).start()
+    yield server
+    server.stop()
+
+
+def run_fetch(monkeypatch, state, overpass, postgrest, *args):
+    monkeypatch.setattr(sys, "argv", [
+        "fetch_osm_data.py", "--rate", "1000", "--overpass-url", overpass.endpoint,
+        "--sink", "postgrest", "--sink-url", postgrest.endpoint,
+        "--state-file", str(state / "sync_state.json"), "--checkpoint", str(state / "checkpoint.jsonl"),
+        "--cache-dir", str(state / "cache"), "--snapshot-dir", str(state / "snapshot"),
+        "--manifest-dir", str(state / "manifest"), "--changeset-dir", str(state / "changesets"), *args])
+    fetch_osm_data.main()
+
+
+def test_interrupted_run_resumes_after_the_stored_batches(tmp_path, monkeypatch, overpass, postgrest, capsys):
+    state = tmp_path / "state"
+    make_stages = fetch_osm_data.make_stages
+    stored = []
+
+    def interrupting_stages(*args, **kwargs):
+        fetch, transform, store = make_stages(*args, **kwargs)
+
+        def store_then_interrupt(code, records):
+            store(code, records)
+            stored.append(len(records))
+            if len(stored) == 3:
+                # Ctrl-C once the response is cached, like a run stopped mid-upsert
+                deadline = time.monotonic() + 10
+                while not list((state / "cache").glob("*.json.gz")) and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                signal.pthread_kill(threading.main_thread().ident, signal.SIGINT)
+                time.sleep(1)
+        return fetch, transform, store_then_interrupt
+
+    monkeypatch.setattr(fetch_osm_data, "make_stages", interrupting_stages)
+    batch = ["--upsert-workers", "1", "--batch-size", "10", "--max-batch-size", "10"]
+    with pytest.raises(SystemExit) as interrupted:
+        run_fetch(monkeypatch, state, overpass, postgrest, "--full", "--countries", "LU", *batch)
+    assert interrupted.value.code == 130
+    checkpoint = Checkpoint(str(state / "checkpoint.jsonl"))
+    assert checkpoint.offset("LU") == 30
+    checkpoint.close()
+    rows_before = postgrest.stats.rows
+
+    monkeypatch.setattr(fetch_osm_data, "make_stages", make_stages)
+    run_fetch(monkeypatch, state, overpass, postgrest, "--full", "--countries", "LU", *batch)
+    assert "LU: Resuming after 30 stored elements" in capsys.readouterr().out
+    assert postgrest.stats.rows - rows_before == 20
+    assert len({record["id"] for record in SnapshotStore(str(state / "snapshot")).read("LU")}) == 50
+
+
+def _fetch_async(session, *args, **kwargs):
+    """Run fetch_overpass_data_async and parse the stream in a thread, like AsyncPipeline."""
+    async def fetch():
+        try:
+            stream = await fetch_overpass_data_async(session, *args, **kwargs)
+            return await asyncio.to_thread(list, stream), stream
+        finally:
+            await session.aclose()
+    return asyncio.run(fetch())
+
+
+def test_async_fetch_then_replay_offline(tmp_path, overpass):
+    cache = ResponseCache(str(tmp_path / "cache"))
+    fetched, stream = _fetch_async(AsyncRetryingSession(max_retries=0), "LU", cache=cache, url=overpass.endpoint)
+    assert [e["id"] for e in fetched] == [e["id"] for e in synthetic_elements("LU", 50)]
+    assert stream.meta["osm3s"]["timestamp_osm_base"]
+    assert cache.contains(build_overpass_query("LU"))
+
+    overpass.stop()
+    replayed, _ = _fetch_async(AsyncRetryingSession(max_retries=0), "LU", cache=cache, offline=True)
+    assert replayed == fetched
+
+
+def test_async_error_remark_is_not_cached(tmp_path, overpass):
+    query = build_overpass_query("MT")
+    overpass.cache.put(query, b'{"osm3s": {}, "elements": [{"id": 1}], '
+                              b'"remark": "runtime error: Query timed out in \\"query\\" at line 3"}')
+    cache = ResponseCache(str(tmp_path / "cache"))
+    with pytest.raises(OverpassError, match="timed out"):
+        _fetch_async(AsyncRetryingSession(max_retries=0), "MT", cache=cache, url=overpass.endpoint)
+    assert not list((tmp_path / "cache").iterdir())
+
+
+def test_streamed_body_stays_a_few_chunks_ahead(overpass):
+    overpass.elements = 5000
+    session = AsyncRetryingSession(max_retries=0)
+
+    async def read_first_chunk():
+        try:
+            body = await StreamedBody(session, "GET", overpass.endpoint, 1024, buffer=2,
+                                      params={"data": build_overpass_query("LU")}).open()
+            chunks = iter(body)
+            first = await asyncio.to_thread(next, chunks)
+            # Give the download time to run ahead if it were unbounded
+            await asyncio.sleep(0.3)
+            buffered = body._chunks.qsize()
+            body.close()
+            return first, buffered
+        finally:
+            await session.aclose()
+
+    first, buffered = asyncio.run(read_first_chunk())
+    assert first.startswith(b"{")
+    assert buffered <= 2
+
+
+def test_async_run_stores_every_shop(tmp_path, monkeypatch, overpass, postgrest):
+    state = tmp_path / "state"
+    run_fetch(monkeypatch, state, overpass, postgrest, "--full", "--async", "--countries", "LU", "MT",
+              "--tile", "MT", "--tile-size", "0.2")
+    assert postgrest.stats.rows == 100
+    assert len(list((state / "cache").glob("*.json.gz"))) > 2
+
+
+def test_sync_point_only_advances_after_a_stored_country(tmp_path, monkeypatch, overpass, postgrest):
+    state = tmp_path / "state"
+
+    def last_sync():
+        return SyncState(str(state / "sync_state.json")).last_sync("LU")
+
+    run_fetch(monkeypatch, state, overpass, postgrest, "--countries", "LU")
+    assert last_sync() == SYNTHETIC_TIMESTAMP
+
+    # The next run asks for changes since then; make that response fail
+    query = build_overpass_query("LU", SYNTHETIC_TIMESTAMP)
+    overpass.cache.put(query, b'{"osm3s": {"timestamp_osm_base": "2025-02-01T00:00:00Z"}, "elements": [], '
+                              b'"remark": "runtime error: Query timed out in \\"query\\" at line 3"}')
+    run_fetch(monkeypatch, state, overpass, postgrest, "--countries", "LU")
+    assert last_sync() == SYNTHETIC_TIMESTAMP
+
+    overpass.cache.put(query, overpass_body(synthetic_elements("LU", 3), "2025-02-01T00:00:00Z"))
+    run_fetch(monkeypatch, state, overpass, postgrest, "--countries", "LU")
+    assert last_sync() == "2025-02-01T00:00:00Z"
@@ -0,0 +1,118 @@
+import threading
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import http_session
+from http_session import RetryingSession, parse_retry_after
+
+
+class ScriptedServer(ThreadingHTTPServer):
+    """Answers each request with the next (status, headers) of a script, then 200."""
+
+    daemon_threads = True
+
+    def __init__(self, script):
+        super().__init__(("127.0.0.1", 0), _ScriptedHandler)
+        self.script = list(script)
+        self.requests = 0
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/"
+
+
+class _ScriptedHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests += 1
+        status, headers = self.server.script.pop(0) if self.server.script else (200, {})
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+
+class _Limiter:
+    def __init__(self):
+        self.acquired = 0
+        self.pauses = []
+
+    def acquire(self):
+        self.acquired += 1
+
+    def pause(self, seconds):
+        self.pauses.append(seconds)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    # Record backoff waits instead of sleeping through them
+    sleeps = []
+    monkeypatch.setattr(http_session, "time", types.SimpleNamespace(sleep=sleeps.append))
+    return sleeps
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def serve(*script):
+        servers.append(ScriptedServer(script))
+        return servers[-1]
+    yield serve
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_retry_after_is_honoured_and_pauses_the_limiter(serve, sleeps):
+    server = serve((429, {"Retry-After": "7"}))
+    limiter = _Limiter()
+    session = RetryingSession(limiter=limiter)
+    assert session.get(server.url).status_code == 200
+    assert (server.requests, sleeps, limiter.pauses, limiter.acquired) == (2, [7.0], [7.0], 2)
+    session.close()
+
+
+def test_gateway_timeouts_are_retried_with_capped_backoff(serve, sleeps):
+    server = serve((504, {}), (503, {}))
+    session = RetryingSession(base_delay=1.0)
+    assert session.get(server.url).status_code == 200
+    assert server.requests == 3
+    assert len(sleeps) == 2 and 0 <= sleeps[0] <= 1.0 and 0 <= sleeps[1] <= 2.0
+    session.close()
+
+
+def test_client_errors_are_not_retried(serve, sleeps):
+    server = serve((400, {}))
+    session = RetryingSession()
+    with pytest.raises(requests.HTTPError):
+        session.get(server.url)
+    assert (server.requests, sleeps) == (1, [])
+    session.close()
+
+
+def test_gives_up_after_max_retries(serve, sleeps):
+    server = serve(*[(503, {})] * 5)
+    session = RetryingSession(max_retries=2)
+    with pytest.raises(requests.HTTPError):
+        session.get(server.url)
+    assert (server.requests, len(sleeps)) == (3, 2)
+    session.close()
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
@@ -0,0 +1,50 @@
+import argparse
+import socket
+import struct
+import time
+
+import pytest
+import requests
+
+from mock_servers import Faults, MockOverpass, add_overpass_arguments, add_postgrest_arguments
+
+QUERY = '[out:json]; area["ISO3166-1"="LU"]; node["shop"="motorcycle"](area); out center;'
+
+
+@pytest.fixture
+def overpass():
+    server = MockOverpass(Faults(), elements=5000).start()
+    yield server
+    server.stop()
+
+
+def _hang_up(server):
+    """Send a query and reset the connection before the response is read."""
+    host, port = server.server_address[:2]
+    with socket.create_connection((host, port)) as sock:
+        body = "data=" + requests.utils.quote(QUERY)
+        sock.sendall(f"POST /api/interpreter HTTP/1.1\r\nHost: {host}\r\nContent-Length: {len(body)}\r\n"
+                     f"Content-Type: application/x-www-form-urlencoded\r\n\r\n{body}".encode("ascii"))
+        sock.recv(1)
+        # Linger 0 makes close() send a RST, like a cancelled download
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+
+
+def test_client_hang_ups_are_not_logged(overpass, capfd):
+    for _ in range(5):
+        _hang_up(overpass)
+    time.sleep(0.5)
+    # The server keeps answering, and didn't print a traceback for the resets
+    assert requests.post(overpass.endpoint, data={"data": QUERY}, timeout=10).status_code == 200
+    assert "Traceback" not in capfd.readouterr().err
+
+
+def test_max_rows_is_a_postgrest_option():
+    parser = argparse.ArgumentParser()
+    add_overpass_arguments(parser)
+    add_postgrest_arguments(parser)
+    args = parser.parse_args(["--max-rows", "100"])
+    assert args.max_rows == 100
+    titles = {group.title: [action.dest for action in group._group_actions] for group in parser._action_groups}
+    assert "max_rows" in titles["PostgREST stand-in"]
+    assert "max_rows" not in titles["Overpass stand-in"]
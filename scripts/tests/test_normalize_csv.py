@@ -0,0 +1,69 @@
+import pytest
+
+from csv_records import place_id_to_id
+from normalize_csv import normalize_phone, normalize_table, parse_hours
+
+
+@pytest.mark.parametrize("value, country, expected", [
+    ("01 82 83 03 84", "FR", "+33182830384"),
+    ("+33 1 82 83 03 84", "DE", "+33182830384"),
+    ("0033 1 82 83 03 84", "FR", "+33182830384"),
+    ("030 1234567", "DE", "+49301234567"),
+    ("06 1 234 5678", "HU", "+3612345678"),
+    ("2101234567", "EL", "+302101234567"),
+    ("8 612 34567", "LT", "+37061234567"),
+    ("+1 212 555 0100", "DE", "+12125550100"),
+])
+def test_normalize_phone(value, country, expected):
+    assert normalize_phone(value, country) == (expected, None)
+
+
+@pytest.mark.parametrize("value, country, reason", [
+    ("01 82", "FR", "not a FR number"),
+    ("+33 1 82", "FR", "bad length for +33"),
+    ("12345", "XX", "no dialling plan"),
+    ("+12", "FR", "bad international number"),
+])
+def test_normalize_phone_rejects(value, country, reason):
+    phone, issue = normalize_phone(value, country)
+    assert phone is None
+    assert reason in issue
+
+
+def test_missing_phone_is_not_an_issue():
+    assert normalize_phone("N/A", "FR") == (None, None)
+    assert normalize_phone("  ", "FR") == (None, None)
+
+
+def test_parse_hours():
+    assert parse_hours("Closed ⋅ Opens 9 AM Mon") == (
+        {"status": "closed", "opens_at": "09:00", "opens_day": "Mon"}, None)
+    assert parse_hours("Open ⋅ Closes 12 PM ⋅ Reopens 2:30 PM") == (
+        {"status": "open", "closes_at": "12:00", "reopens_at": "14:30"}, None)
+    assert parse_hours("Open 24 hours") == ({"status": "open_24_hours"}, None)
+    assert parse_hours("sometimes")[0] is None
+
+
+def _columns(rows):
+    names = ["place_id", "name", "city", "address", "latitude", "longitude", "phone", "website",
+             "business_type", "rating", "reviews_count", "hours", "scraped_at"]
+    return {name: [row.get(name, "") for row in rows] for name in names}
+
+
+def test_normalize_table_types_rows_and_reports_rejects():
+    rows, rejects = normalize_table(_columns([
+        {"place_id": "ChIJ-abc", "name": "Moto Paris", "city": "Paris, France", "latitude": "48.85",
+         "longitude": "2.35", "phone": "01 82 83 03 84", "rating": "4,5", "reviews_count": "1,204"},
+        {"place_id": "ChIJ-def", "name": "Wrong pin", "city": "Paris, France", "latitude": "52.5",
+         "longitude": "13.4"},
+        {"place_id": "ChIJ-ghi", "name": "Bad rating", "city": "Lyon, France", "latitude": "45.76",
+         "longitude": "4.83", "rating": "7"},
+    ]))
+    assert [row["name"] for row in rows] == ["Moto Paris", "Bad rating"]
+    first = rows[0]
+    assert first["id"] == place_id_to_id("ChIJ-abc")
+    assert (first["country_code"], first["city"], first["phone"]) == ("FR", "Paris", "+33182830384")
+    assert (first["rating"], first["reviews_count"]) == (4.5, 1204)
+    assert rows[1]["rating"] is None
+    assert [(reject["line"], reject["dropped"]) for reject in rejects] == [(3, True), (4, False)]
+    assert rejects[0]["issues"] == ["coordinates outside FR"]
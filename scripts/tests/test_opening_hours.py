@@ -0,0 +1,106 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from opening_hours import (ALWAYS_OPEN, OpeningHoursTable, UnsupportedHours, decode_bits, encode_bits, is_open,
+                           parse_opening_hours, record_hours)
+
+DAYS = ["Mo", "Tu", "We", "Th", "Fr", "Sa", "Su"]
+
+
+def _at(day, time):
+    # 2024-06-03 is a Monday
+    hour, minute = map(int, time.split(":"))
+    return datetime(2024, 6, 3 + DAYS.index(day), hour, minute)
+
+
+def _open(value, day, time):
+    return is_open(parse_opening_hours(value), _at(day, time))
+
+
+def test_always_open():
+    assert parse_opening_hours("24/7") == ALWAYS_OPEN
+    assert parse_opening_hours("Mo-Su 00:00-24:00") == ALWAYS_OPEN
+
+
+def test_day_ranges_and_lists():
+    value = "Mo-Fr 08:00-18:00; Sa 09:00-12:30"
+    assert _open(value, "Mo", "08:00") and _open(value, "Fr", "17:59")
+    assert not _open(value, "Mo", "07:59") and not _open(value, "Fr", "18:00")
+    assert _open(value, "Sa", "12:15") and not _open(value, "Sa", "12:30")
+    assert not _open(value, "Su", "10:00")
+    assert _open("Tu,Th 10:00-12:00", "Th", "11:00") and not _open("Tu,Th 10:00-12:00", "We", "11:00")
+
+
+def test_split_days_and_times_past_midnight():
+    value = "Mo-Fr 09:00-12:00,14:00-18:00"
+    assert _open(value, "We", "09:30") and not _open(value, "We", "13:00") and _open(value, "We", "17:00")
+    night = "Fr 20:00-02:00"
+    assert _open(night, "Fr", "23:00") and _open(night, "Sa", "01:45") and not _open(night, "Sa", "02:00")
+    # Sunday night spills into Monday morning
+    assert _open("Su 22:00-01:00", "Mo", "00:30")
+
+
+def test_week_wrapping_range():
+    assert _open("Fr-Mo 10:00-16:00", "Su", "12:00")
+    assert not _open("Fr-Mo 10:00-16:00", "We", "12:00")
+
+
+def test_later_rules_replace_earlier_days():
+    value = "Mo-Sa 09:00-18:00; We off; Sa 09:00-13:00"
+    assert not _open(value, "We", "10:00")
+    assert _open(value, "Sa", "12:00") and not _open(value, "Sa", "15:00")
+    assert _open(value, "Th", "15:00")
+
+
+def test_additional_rule_does_not_replace():
+    value = "Mo-Fr 08:00-12:00, Fr 14:00-18:00"
+    assert _open(value, "Fr", "09:00") and _open(value, "Fr", "15:00")
+    assert not _open(value, "Th", "15:00")
+
+
+def test_holidays_and_comments_are_ignored():
+    value = 'Mo-Fr 08:00-17:00 "by appointment"; PH off'
+    assert parse_opening_hours(value) == parse_opening_hours("Mo-Fr 08:00-17:00")
+
+
+def test_times_round_outwards_to_slots():
+    assert _open("Mo 08:10-08:20", "Mo", "08:00") and _open("Mo 08:10-08:20", "Mo", "08:29")
+    assert not _open("Mo 08:10-08:20", "Mo", "08:30")
+
+
+@pytest.mark.parametrize("value", ["", "Jan-Mar Mo 10:00-12:00", "Mo sunrise-sunset", "Mo 10:00+",
+                                   "Mo 25:00-26:00", "Xy 10:00-12:00"])
+def test_unsupported_syntax(value):
+    with pytest.raises(UnsupportedHours):
+        parse_opening_hours(value)
+
+
+def test_bits_round_trip_through_base64():
+    bits = parse_opening_hours("Mo-Fr 08:00-18:00; Sa 09:00-12:00")
+    assert decode_bits(encode_bits(bits)) == bits
+
+
+def test_record_hours_falls_back_to_the_scraped_status():
+    assert record_hours({"shop_tags": {"opening_hours": "24/7"}}) == ALWAYS_OPEN
+    assert record_hours({"shop_tags": {"opening_hours": "sunrise-sunset", "hours": "Open 24 hours"}}) == ALWAYS_OPEN
+    assert record_hours({"shop_tags": {"hours": "Permanently closed"}}) == 0
+    assert record_hours({"shop_tags": {"hours": "Closed ⋅ Opens 9 AM"}}) is None
+    assert record_hours({}) is None
+
+
+def test_table_answers_in_each_shops_timezone():
+    table = OpeningHoursTable.build([
+        {"id": 1, "country_code": "PT", "shop_tags": {"opening_hours": "Mo-Fr 09:00-10:00"}},
+        {"id": -2891974813750798303, "country_code": "EL", "shop_tags": {"opening_hours": "Mo-Fr 09:00-10:00"}},
+        {"id": 3, "country_code": "DE", "shop_tags": {}},
+    ])
+    assert len(table) == 2 and 3 not in table
+    # 08:30 UTC in June: 09:30 in Lisbon, 11:30 in Athens
+    when = datetime(2024, 6, 3, 8, 30, tzinfo=timezone.utc)
+    assert table.open_at(when) == [1]
+    assert table.is_open(-2891974813750798303, when) is False
+    assert table.is_open(3, when) is None
+    loaded = OpeningHoursTable.from_json(table.to_json())
+    assert loaded.open_at(when) == [1]
+    assert sorted(table.to_json()["shops"]) == ["-2891974813750798303", "1"]
@@ -0,0 +1,78 @@
+import os
+import time
+
+from overpass_cache import ResponseCache, query_key
+
+QUERY = '[out:json]; area["ISO3166-1"="LU"]; node["shop"="motorcycle"](area); out center;'
+
+
+def _age(path, seconds):
+    # Pretend the entry was written (and last used) `seconds` ago
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_query_key_ignores_whitespace():
+    assert query_key(QUERY) == query_key("\n    " + QUERY.replace(" ", "\n  ") + "\n")
+    assert query_key(QUERY) != query_key(QUERY.replace("LU", "MT"))
+
+
+def test_pending_entry_is_only_visible_after_commit(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    entry = cache.begin(QUERY)
+    entry.write(b'{"elements": ')
+    entry.write(b"[]}")
+    assert cache.open(QUERY) is None
+    entry.commit()
+    assert cache.get(QUERY) == {"elements": []}
+
+
+def test_aborted_entry_leaves_nothing_behind(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    entry = cache.begin(QUERY)
+    entry.write(b'{"elements": [')
+    entry.abort()
+    assert cache.open(QUERY) is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_stale_entries_are_ignored_and_removed(tmp_path):
+    cache = ResponseCache(str(tmp_path), ttl=60)
+    cache.put(QUERY, b"{}")
+    assert cache.contains(QUERY)
+    _age(cache.path_for(QUERY), 120)
+    assert not cache.contains(QUERY)
+    assert not os.path.exists(cache.path_for(QUERY))
+
+
+def test_offline_replay_ignores_the_ttl(tmp_path):
+    ResponseCache(str(tmp_path), ttl=60).put(QUERY, b'{"elements": [{"id": 1}]}')
+    _age(os.path.join(tmp_path, query_key(QUERY) + ".json.gz"), 30 * 24 * 3600)
+    # Offline runs open the cache with ttl=None
+    assert ResponseCache(str(tmp_path), ttl=None).get(QUERY) == {"elements": [{"id": 1}]}
+
+
+def test_least_recently_used_entries_are_evicted_first(tmp_path):
+    cache = ResponseCache(str(tmp_path), ttl=None)
+    queries = [QUERY.replace("LU", code) for code in ("AT", "BE", "CY")]
+    for age, query in zip((300, 200, 100), queries):
+        # Incompressible bodies, so the gzip size is known
+        cache.put(query, os.urandom(4096))
+        _age(cache.path_for(query), age)
+    # Reading AT makes it the most recently used one
+    cache.open(queries[0]).close()
+
+    size = os.path.getsize(cache.path_for(queries[0]))
+    cache.max_bytes = size * 2 + size // 2
+    cache.evict()
+    assert [cache.contains(query) for query in queries] == [True, False, True]
+
+
+def test_reading_keeps_the_ttl_clock(tmp_path):
+    cache = ResponseCache(str(tmp_path), ttl=60)
+    cache.put(QUERY, b"{}")
+    _age(cache.path_for(QUERY), 50)
+    cache.open(QUERY).close()
+    stat = os.stat(cache.path_for(QUERY))
+    assert time.time() - stat.st_mtime >= 50
+    assert time.time() - stat.st_atime < 5
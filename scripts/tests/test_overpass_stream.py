@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from overpass_stream import ElementStream, OverpassError
+
+ELEMENTS = [
+    {"type": "node", "id": 1, "lat": 48.1351253, "lon": 11.5819806,
+     "tags": {"shop": "motorcycle", "name": "Zweirad \"Müller\" & Söhne"}},
+    {"type": "node", "id": 22, "lat": -0.5, "lon": 1e-7, "tags": {"name": "Moto 🏍️ Ελλάδα", "note": "a\\b\nc"}},
+    {"type": "node", "id": 333, "lat": 50, "lon": 4.25, "tags": {}},
+]
+
+
+def _body(elements=ELEMENTS, **extra):
+    data = {"version": 0.6, "osm3s": {"timestamp_osm_base": "2024-06-01T00:00:00Z"}, "elements": elements}
+    data.update(extra)
+    return json.dumps(data, ensure_ascii=False, indent=1).encode("utf-8")
+
+
+def _chunks(body, size):
+    return [body[offset:offset + size] for offset in range(0, len(body), size)]
+
+
+def _generator(chunks, log):
+    try:
+        for chunk in chunks:
+            yield chunk
+        log.append("exhausted")
+    finally:
+        log.append("closed")
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 64, 100000])
+def test_chunk_boundaries_inside_tokens_and_strings(size):
+    # Size 1 cuts every number, escape sequence and multi-byte character apart
+    stream = ElementStream(_chunks(_body(), size))
+    assert list(stream) == ELEMENTS
+    assert stream.meta["osm3s"]["timestamp_osm_base"] == "2024-06-01T00:00:00Z"
+    assert stream.meta["version"] == 0.6
+
+
+def test_number_at_chunk_boundary_is_not_cut_short():
+    body = b'{"elements": [{"id": 12345, "lat": 12.5}]}'
+    for split in range(1, len(body)):
+        assert list(ElementStream([body[:split], body[split:]])) == [{"id": 12345, "lat": 12.5}]
+
+
+def test_meta_after_elements_and_empty_responses():
+    stream = ElementStream([b'{"elements": [], "remark": "all fine"}'])
+    assert list(stream) == []
+    assert stream.meta == {"remark": "all fine"}
+    assert list(ElementStream([b"  {}  "])) == []
+
+
+def test_error_remark_raises_and_stops_reading():
+    log = []
+    body = _body(remark="runtime error: Query timed out in \"query\" at line 3 after 61 seconds.")
+    with pytest.raises(OverpassError, match="timed out"):
+        list(ElementStream(_generator(_chunks(body, 16), log)))
+    assert log == ["closed"]
+
+
+def test_complete_response_reads_chunks_to_the_end():
+    log = []
+    body = _body() + b"\n"
+    stream = ElementStream(_generator(_chunks(body, len(body)), log))
+    assert len(list(stream)) == len(ELEMENTS)
+    assert log == ["exhausted", "closed"]
+
+
+def test_trailing_data_is_an_error():
+    with pytest.raises(ValueError, match="unexpected data"):
+        list(ElementStream([_body() + b"{}"]))
+
+
+def test_truncated_response_is_an_error():
+    body = _body()
+    with pytest.raises(ValueError):
+        list(ElementStream(_chunks(body[:len(body) // 2], 10)))
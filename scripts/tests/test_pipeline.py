@@ -0,0 +1,74 @@
+import random
+import threading
+import time
+
+from pipeline import Pipeline, percentile
+
+
+def _store_into(stored, lock, delay=None):
+    def sink(code, records):
+        if delay:
+            time.sleep(delay(records))
+        with lock:
+            stored.extend(records)
+    return sink
+
+
+def test_start_offsets_skip_stored_elements():
+    stored, lock = [], threading.Lock()
+    progress = []
+    pipeline = Pipeline(lambda code: range(100), lambda code, elements: list(elements), _store_into(stored, lock),
+                        batch_size=10, on_progress=lambda code, offset: progress.append(offset))
+    results = list(pipeline.run(["DE"], {"DE": 30}))
+    assert results[0].error is None
+    assert results[0].inserted == 70
+    assert sorted(stored) == list(range(30, 100))
+    assert progress[-1] == 100
+
+
+def test_progress_only_covers_contiguous_stored_batches():
+    stored, lock = [], threading.Lock()
+    progress = []
+    rng = random.Random(0)
+
+    def on_progress(code, offset):
+        # Every element before the reported offset is stored already
+        with lock:
+            assert set(range(offset)) <= set(stored)
+        progress.append(offset)
+
+    pipeline = Pipeline(lambda code: range(200), lambda code, elements: list(elements),
+                        _store_into(stored, lock, delay=lambda records: rng.uniform(0, 0.01)),
+                        sink_workers=4, batch_size=10, on_progress=on_progress)
+    list(pipeline.run(["DE"]))
+    assert progress == sorted(progress)
+    assert progress[-1] == 200
+
+
+def test_failed_batch_stops_the_offset():
+    progress = []
+
+    def sink(code, records):
+        if 50 in records:
+            raise RuntimeError("upsert failed")
+
+    pipeline = Pipeline(lambda code: range(100), lambda code, elements: list(elements), sink,
+                        batch_size=10, on_progress=lambda code, offset: progress.append(offset))
+    result = next(pipeline.run(["DE"]))
+    assert str(result.error) == "upsert failed"
+    assert max(progress, default=0) <= 50
+
+
+def test_batches_without_records_still_count():
+    progress = []
+    pipeline = Pipeline(lambda code: range(30), lambda code, elements: [e for e in elements if e >= 20],
+                        lambda code, records: None, batch_size=10,
+                        on_progress=lambda code, offset: progress.append(offset))
+    assert next(pipeline.run(["DE"])).inserted == 10
+    assert progress[-1] == 30
+
+
+def test_percentile_is_nearest_rank():
+    assert percentile([], 0.5) == 0.0
+    assert percentile([3, 1, 2], 0.5) == 2
+    assert percentile(list(range(1, 101)), 0.99) == 99
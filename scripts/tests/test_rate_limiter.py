@@ -0,0 +1,58 @@
+import pytest
+
+import rate_limiter
+from rate_limiter import TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    return clock
+
+
+def test_burst_then_refill_rate(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+    assert [bucket.try_acquire() for _ in range(3)] == [0, 0, 0]
+    # Empty: the next token is half a second away at 2 tokens/s
+    assert bucket.try_acquire() == pytest.approx(0.5)
+    clock.sleep(0.5)
+    assert bucket.try_acquire() == 0
+    # Idle time never banks more than `capacity` tokens
+    clock.sleep(60)
+    assert [bucket.try_acquire() for _ in range(3)] == [0, 0, 0]
+    assert bucket.try_acquire() == pytest.approx(0.5)
+
+
+def test_acquire_keeps_to_the_rate(clock):
+    bucket = TokenBucket(rate=4, capacity=1)
+    started = clock.now
+    for _ in range(9):
+        bucket.acquire()
+    assert clock.now - started == pytest.approx(2.0)
+
+
+def test_pause_holds_everyone_back_and_starts_empty(clock):
+    bucket = TokenBucket(rate=1, capacity=5)
+    bucket.pause(10)
+    assert bucket.try_acquire() == pytest.approx(10)
+    clock.sleep(10)
+    assert bucket.try_acquire() == pytest.approx(1.0)
+    clock.sleep(1)
+    assert bucket.try_acquire() == 0
+
+
+def test_rate_must_be_positive():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
@@ -0,0 +1,55 @@
+from search_index import EXACT, FIELD_WEIGHTS, FUZZY, PREFIX, SearchIndex, edit_distance
+
+RECORDS = [
+    {"id": 1, "name": "Motorrad Müller", "country_code": "DE", "address": {"city": "Köln", "street": "Ringstraße"}},
+    {"id": 2, "name": "Moto Rêve", "country_code": "FR", "address": {"city": "Paris", "street": "Rue de Rivoli"}},
+    {"id": -7, "name": "Zweirad Center", "country_code": "DE", "address": {"city": "München"}},
+    {"id": 4, "name": "Müller Reifen", "country_code": "AT", "address": {"city": "Wien"}},
+]
+COUNTRY_NAMES = {"DE": "Germany", "FR": "France", "AT": "Austria"}
+
+
+def _index():
+    return SearchIndex.build(RECORDS, COUNTRY_NAMES)
+
+
+def test_exact_words_rank_by_field():
+    index = _index()
+    assert index.search("muller") == [(1, EXACT * FIELD_WEIGHTS[0]), (4, EXACT * FIELD_WEIGHTS[0])]
+    assert index.search("koln") == [(1, EXACT * FIELD_WEIGHTS[1])]
+    assert [shop_id for shop_id, _ in index.search("germany")] == [-7, 1]
+    # Every word must match
+    assert index.search("muller wien") == [(4, 6.0)]
+    assert index.search("muller paris") == []
+
+
+def test_prefix_while_typing():
+    index = _index()
+    assert index.search("mot") == [(1, PREFIX * FIELD_WEIGHTS[0]), (2, PREFIX * FIELD_WEIGHTS[0])]
+    # The exact term beats a longer one that only starts with it
+    assert index.search("moto")[0] == (2, EXACT * FIELD_WEIGHTS[0])
+    assert index.search("m") == []
+
+
+def test_typos_match_through_trigrams():
+    index = _index()
+    assert index.search("motorad") == [(1, FUZZY * FIELD_WEIGHTS[0])]
+    assert index.search("zweriad") == [(-7, FUZZY * FIELD_WEIGHTS[0])]
+    assert index.search("munchen") == [(-7, EXACT * FIELD_WEIGHTS[1])]
+    assert index.search("xyzzy") == []
+
+
+def test_edit_distance_counts_swaps_as_one():
+    assert edit_distance("zweriad", "zweirad", 2) == 1
+    assert edit_distance("motorad", "motorrad", 1) == 1
+    assert edit_distance("moto", "motorrad", 1) == 2
+
+
+def test_save_load_round_trip(tmp_path):
+    index = _index()
+    path = tmp_path / "search_index.json.gz"
+    index.save(str(path))
+    loaded = SearchIndex.load(str(path))
+    assert (loaded.ids, loaded.terms, loaded.postings) == (index.ids, index.terms, index.postings)
+    for query in ("muller", "mot", "motorad", "rue rivoli", "austria"):
+        assert loaded.search(query) == index.search(query)
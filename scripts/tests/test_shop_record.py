@@ -0,0 +1,92 @@
+from fnmatch import fnmatchcase
+
+from fetch_osm_data import format_records
+from shop_record import DEFAULT_TAG_PATTERNS, ShopRecord, TagProjection
+from synthetic import synthetic_elements
+
+
+def baseline_format_records(data, country_code):
+    # format_records as it was before ShopRecord, kept as the reference row shape
+    records = []
+    for element in data.get("elements", []):
+        tags = element.get("tags", {})
+        if not tags:
+            continue
+
+        record = {
+            "id": element["id"],
+            "country_code": tags.get("addr:country", country_code),
+            "name": tags.get("name"),
+            "lat": element.get("lat"),
+            "lon": element.get("lon"),
+            "address": {
+                "city": tags.get("addr:city"),
+                "street": tags.get("addr:street"),
+                "housenumber": tags.get("addr:housenumber"),
+                "postcode": tags.get("addr:postcode"),
+                "suburb": tags.get("addr:suburb")
+            },
+            "contact": {
+                "phone": tags.get("contact:phone") or tags.get("phone"),
+                "fax": tags.get("contact:fax"),
+                "website": tags.get("contact:website") or tags.get("website"),
+                "email": tags.get("contact:email") or tags.get("email")
+            },
+            "shop_tags": tags,
+            "source_country": country_code
+        }
+        records.append(record)
+    return records
+
+
+ELEMENTS = synthetic_elements("LU", 200) + [
+    {"type": "node", "id": 1, "lat": 49.6, "lon": 6.1},
+    {"type": "node", "id": 2, "lat": 49.6, "lon": 6.1, "tags": {}},
+    {"type": "node", "id": 3, "tags": {"shop": "motorcycle", "addr:country": "FR", "contact:phone": "+33 1",
+                                       "phone": "+33 2", "contact:fax": "+33 3", "contact:email": "a@b.fr",
+                                       "addr:suburb": "Nord"}},
+]
+
+
+def test_to_row_matches_the_baseline_rows():
+    data = {"elements": ELEMENTS}
+    rows = format_records(data, "LU", projection=None)
+    assert rows == baseline_format_records(data, "LU")
+    # Same key order too, so the upsert body doesn't change
+    assert [list(row) for row in rows] == [list(row) for row in baseline_format_records(data, "LU")]
+
+
+def test_projected_rows_only_differ_in_shop_tags():
+    data = {"elements": ELEMENTS}
+    projection = TagProjection(DEFAULT_TAG_PATTERNS)
+    rows = format_records(data, "LU", projection)
+    baseline = baseline_format_records(data, "LU")
+    assert len(rows) == len(baseline)
+    for row, expected in zip(rows, baseline):
+        kept = {key: value for key, value in expected.pop("shop_tags").items()
+                if any(fnmatchcase(key, pattern) for pattern in DEFAULT_TAG_PATTERNS)}
+        # Address and contact tags already have columns
+        assert not any(key.startswith(("addr:", "contact:")) for key in kept)
+        assert row.pop("shop_tags") == kept
+        assert row == expected
+
+
+def test_projection_keeps_exact_keys_and_prefixes():
+    projection = TagProjection(["shop", "contact:*"])
+    tags = {"shop": "motorcycle", "contact:phone": "+352 1", "contact:instagram": "moto",
+            "contact": "x", "shop:type": "repair", "name": "Moto", "phone": "+352 2"}
+    assert projection(tags) == {"shop": "motorcycle", "contact:phone": "+352 1", "contact:instagram": "moto"}
+    assert projection({"name": "Only a name"}) == {}
+
+
+def test_projection_and_records_share_interned_strings():
+    projection = TagProjection(["opening_hours"])
+    # Built at runtime, so they are distinct objects until interned
+    first = projection({"".join(["opening", "_hours"]): "Mo-Fr 09:00-18:00"})
+    second = projection({"".join(["opening_", "hours"]): "Sa 10:00-14:00"})
+    assert next(iter(first)) is next(iter(second))
+
+    records = [ShopRecord(n, "".join(["L", "U"]), "Moto", 49.6, 6.1, city="".join(["Esch", "-sur-Alzette"]))
+               for n in range(2)]
+    assert records[0].country_code is records[1].country_code
+    assert records[0].city is records[1].city
@@ -0,0 +1,102 @@
+import pytest
+
+from mock_servers import Faults, MockPostgrest
+from sinks import AdaptiveBatchSize, AdaptiveSink, BatchTooLarge, PostgrestSink
+
+
+def _records(start, count):
+    return [{"id": record_id, "name": f"Shop {record_id}"} for record_id in range(start, start + count)]
+
+
+class _RecordingSink(PostgrestSink):
+    """PostgrestSink that remembers the size and ids of every accepted batch."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.batches = []
+
+    def upsert(self, records):
+        super().upsert(records)
+        self.batches.append([record["id"] for record in records])
+
+
+@pytest.fixture
+def postgrest():
+    server = MockPostgrest(Faults()).start()
+    yield server
+    server.stop()
+
+
+def test_batch_size_grows_on_fast_full_batches_only():
+    size = AdaptiveBatchSize(initial=100, minimum=10, maximum=150, target_latency=1.0, growth=1.25)
+    size.record(40, 0.1)
+    assert size.size == 100
+    size.record(100, 0.1)
+    assert size.size == 126
+    size.record(126, 0.1)
+    assert size.size == 150
+
+
+def test_batch_size_shrinks_on_slow_batches_and_errors():
+    size = AdaptiveBatchSize(initial=100, minimum=10, target_latency=1.0, shrink=0.5)
+    size.record(100, 5.0)
+    assert size.size == 50
+    size.too_large(50)
+    assert size.size == 25
+    for _ in range(10):
+        size.too_large(size.size)
+    assert size.size == 10
+
+
+def test_statement_timeout_splits_on_the_first_failure(postgrest):
+    postgrest.faults = Faults(per_row=0.001)
+    postgrest.statement_timeout = 0.05
+    sink = PostgrestSink(postgrest.endpoint, retry_delay=0.01)
+    with pytest.raises(BatchTooLarge):
+        sink.upsert(_records(0, 100))
+    # Not retried: the same batch would only time out again
+    assert postgrest.stats.statuses == {500: 1}
+    sink.close()
+
+
+def test_unavailable_is_retried(postgrest):
+    postgrest.faults = Faults(error_rate=1.0)
+    sink = PostgrestSink(postgrest.endpoint, retry_delay=0.01)
+    with pytest.raises(Exception) as error:
+        sink.upsert(_records(0, 10))
+    assert not isinstance(error.value, BatchTooLarge)
+    assert postgrest.stats.statuses == {503: 4}
+    sink.close()
+
+
+def test_batches_shrink_then_grow_back_without_losing_rows(postgrest):
+    postgrest.max_rows = 50
+    inner = _RecordingSink(postgrest.endpoint, retry_delay=0.01)
+    size = AdaptiveBatchSize(initial=200, minimum=10, maximum=400, target_latency=5.0)
+    sink = AdaptiveSink(inner, size)
+
+    sink.upsert(_records(0, 1000))
+    assert max(len(batch) for batch in inner.batches) <= 50
+    assert 413 in postgrest.stats.statuses
+    shrunk = size.size
+
+    # The limit is lifted, so fast batches let the size climb again
+    postgrest.max_rows = 0
+    sink.upsert(_records(1000, 3000))
+    assert size.size > shrunk
+    assert max(len(batch) for batch in inner.batches) > 50
+
+    ids = [record_id for batch in inner.batches for record_id in batch]
+    assert ids == list(range(4000))
+    assert postgrest.stats.rows == 4000
+    sink.close()
+
+
+def test_smallest_batch_that_still_fails_is_raised(postgrest):
+    postgrest.max_rows = 5
+    sink = AdaptiveSink(PostgrestSink(postgrest.endpoint, retry_delay=0.01),
+                        AdaptiveBatchSize(initial=40, minimum=10))
+    with pytest.raises(BatchTooLarge):
+        sink.upsert(_records(0, 40))
+    assert postgrest.stats.rows == 0
+    sink.close()
@@ -0,0 +1,26 @@
+from snapshot import SnapshotStore
+
+
+def test_discard_keeps_the_committed_snapshot(tmp_path):
+    snapshot = SnapshotStore(str(tmp_path))
+    snapshot.begin("LU")
+    snapshot.append("LU", [{"id": 1, "name": "old"}])
+    snapshot.commit("LU")
+
+    snapshot.begin("LU")
+    snapshot.append("LU", [{"id": 1, "name": "half-fetched"}])
+    snapshot.discard("LU")
+    assert list(snapshot.read("LU")) == [{"id": 1, "name": "old"}]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["LU.jsonl.gz"]
+
+
+def test_incremental_commit_merges_by_id(tmp_path):
+    snapshot = SnapshotStore(str(tmp_path))
+    snapshot.begin("MT")
+    snapshot.append("MT", [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}])
+    snapshot.commit("MT")
+
+    snapshot.begin("MT")
+    snapshot.append("MT", [{"id": 2, "name": "b2"}, {"id": 3, "name": "c"}])
+    snapshot.commit("MT", merge=True)
+    assert sorted((r["id"], r["name"]) for r in snapshot.read("MT")) == [(1, "a"), (2, "b2"), (3, "c")]
@@ -0,0 +1,70 @@
+import random
+
+import pytest
+
+from spatial_index import SpatialIndex, haversine_km
+
+
+@pytest.fixture(scope="module")
+def records():
+    rng = random.Random(7)
+    # Europe-sized spread with a dense cluster, plus records the index must skip
+    records = [{"id": n, "lat": rng.uniform(35, 70), "lon": rng.uniform(-10, 30)} for n in range(3000)]
+    records += [{"id": 10_000 + n, "lat": 48.85 + rng.gauss(0, 0.05), "lon": 2.35 + rng.gauss(0, 0.05)}
+                for n in range(1000)]
+    records += [{"id": -1, "lat": None, "lon": 2.0}, {"id": -2}]
+    return records
+
+
+@pytest.fixture(scope="module", params=[4, 16])
+def index(request, records):
+    return SpatialIndex.build(records, node_size=request.param)
+
+
+def _located(records):
+    return [r for r in records if isinstance(r.get("lat"), float)]
+
+
+def test_skips_records_without_coordinates(index, records):
+    assert len(index) == len(_located(records))
+
+
+@pytest.mark.parametrize("box", [(48.7, 2.2, 49.0, 2.5), (40, -5, 50, 5), (60, 20, 61, 21), (0, 0, 1, 1)])
+def test_within_bbox_matches_brute_force(index, records, box):
+    south, west, north, east = box
+    expected = {r["id"] for r in _located(records) if south <= r["lat"] <= north and west <= r["lon"] <= east}
+    assert sorted(index.within_bbox(*box)) == sorted(expected)
+
+
+@pytest.mark.parametrize("lat, lon, radius", [(48.85, 2.35, 5), (48.85, 2.35, 150), (65, 25, 300), (36, -9, 50)])
+def test_within_radius_matches_brute_force(index, records, lat, lon, radius):
+    expected = sorted((haversine_km(lat, lon, r["lat"], r["lon"]), r["id"]) for r in _located(records))
+    expected = [shop_id for distance, shop_id in expected if distance <= radius]
+    hits = index.within_radius(lat, lon, radius)
+    assert sorted(shop_id for shop_id, _ in hits) == sorted(expected)
+    assert [distance for _, distance in hits] == sorted(distance for _, distance in hits)
+
+
+def test_nearest_matches_brute_force(index, records):
+    rng = random.Random(11)
+    for _ in range(50):
+        lat, lon = rng.uniform(35, 70), rng.uniform(-10, 30)
+        expected = sorted(haversine_km(lat, lon, r["lat"], r["lon"]) for r in _located(records))[:10]
+        assert [round(distance, 9) for _, distance in index.nearest(lat, lon, 10)] == \
+            [round(distance, 9) for distance in expected]
+
+
+def test_save_and_load_round_trip(tmp_path, index):
+    path = tmp_path / "shops.rtree"
+    index.save(str(path))
+    loaded = SpatialIndex.load(str(path))
+    assert list(loaded.ids) == list(index.ids)
+    assert loaded.within_bbox(48.7, 2.2, 49.0, 2.5) == index.within_bbox(48.7, 2.2, 49.0, 2.5)
+    assert loaded.nearest(50, 10, 3) == index.nearest(50, 10, 3)
+
+
+def test_empty_index():
+    index = SpatialIndex.build([])
+    assert len(index) == 0
+    assert index.within_bbox(-90, -180, 90, 180) == []
+    assert index.nearest(0, 0, 5) == []
@@ -0,0 +1,15 @@
+from sync_state import SyncState
+
+
+def test_timestamps_survive_a_restart(tmp_path):
+    path = tmp_path / "state" / "sync_state.json"
+    state = SyncState(str(path))
+    assert state.last_sync("LU") is None
+    state.mark_synced("LU", "2025-01-01T00:00:00Z")
+    state.mark_synced("MT", "2025-01-02T00:00:00Z")
+    state.mark_synced("LU", "2025-02-01T00:00:00Z")
+
+    state = SyncState(str(path))
+    assert state.last_sync("LU") == "2025-02-01T00:00:00Z"
+    assert state.last_sync("MT") == "2025-01-02T00:00:00Z"
+    assert sorted(p.name for p in path.parent.iterdir()) == ["sync_state.json"]
@@ -0,0 +1,89 @@
+import pytest
+
+from fetch_osm_data import TiledStream, build_overpass_query
+from http_session import RetryingSession
+from mock_servers import Faults, MockOverpass
+from overpass_stream import OverpassError
+from synthetic import overpass_body
+from tiling import grid, split
+
+
+def test_grid_covers_the_box_without_overlap():
+    tiles = grid((49.45, 5.73, 50.18, 6.53), 0.5)
+    assert tiles == [
+        (49.45, 5.73, 49.95, 6.23), (49.45, 6.23, 49.95, 6.53),
+        (49.95, 5.73, 50.18, 6.23), (49.95, 6.23, 50.18, 6.53),
+    ]
+    area = sum((north - south) * (east - west) for south, west, north, east in tiles)
+    assert area == pytest.approx((50.18 - 49.45) * (6.53 - 5.73))
+    # A box smaller than one tile is a single tile
+    assert grid((35.79, 14.18, 36.08, 14.58), 1.0) == [(35.79, 14.18, 36.08, 14.58)]
+
+
+def test_split_into_quadrants():
+    assert split((40.0, 0.0, 41.0, 2.0)) == [
+        (40.0, 0.0, 40.5, 1.0), (40.0, 1.0, 40.5, 2.0),
+        (40.5, 0.0, 41.0, 1.0), (40.5, 1.0, 41.0, 2.0),
+    ]
+
+
+# ---------- TiledStream against planted Overpass responses ----------
+BBOX = (0.0, 0.0, 2.0, 2.0)
+
+
+def _node(node_id, lat, lon):
+    return {"type": "node", "id": node_id, "lat": lat, "lon": lon, "tags": {"shop": "motorcycle"}}
+
+
+@pytest.fixture
+def overpass(tmp_path):
+    server = MockOverpass(Faults(), cache_dir=str(tmp_path / "upstream"), elements=0).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def session():
+    session = RetryingSession(max_retries=0)
+    yield session
+    session.close()
+
+
+def _plant(overpass, bbox, body):
+    overpass.cache.put(build_overpass_query("LU", None, bbox), body)
+
+
+def _stream(session, overpass, **kwargs):
+    return TiledStream(session, "LU", None, None, False, BBOX, 1.0, url=overpass.endpoint, **kwargs)
+
+
+def test_nodes_on_shared_edges_are_yielded_once(overpass, session):
+    corner = _node(1, 1.0, 1.0)
+    edge = _node(2, 0.5, 1.0)
+    tiles = grid(BBOX, 1.0)
+    _plant(overpass, tiles[0], overpass_body([_node(10, 0.5, 0.5), edge, corner], "2025-01-03T00:00:00Z"))
+    _plant(overpass, tiles[1], overpass_body([edge, corner, _node(11, 0.5, 1.5)], "2025-01-01T00:00:00Z"))
+    _plant(overpass, tiles[2], overpass_body([corner], "2025-01-02T00:00:00Z"))
+    _plant(overpass, tiles[3], overpass_body([corner, _node(12, 1.5, 1.5)], "2025-01-04T00:00:00Z"))
+
+    stream = _stream(session, overpass, workers=3)
+    assert [element["id"] for element in stream] == [10, 2, 1, 11, 12]
+    # The oldest tile decides where the next incremental sync starts
+    assert stream.meta["osm3s"]["timestamp_osm_base"] == "2025-01-01T00:00:00Z"
+
+
+def test_overloaded_tile_is_split_in_place(overpass, session):
+    tiles = grid(BBOX, 1.0)
+    timed_out = b'{"osm3s": {}, "elements": [], "remark": "runtime error: Query timed out after 180 seconds."}'
+    _plant(overpass, tiles[0], overpass_body([_node(10, 0.5, 0.5)]))
+    _plant(overpass, tiles[1], timed_out)
+    for number, quadrant in enumerate(split(tiles[1])):
+        _plant(overpass, quadrant, overpass_body([_node(20 + number, 0.0, 1.5), _node(30, 0.5, 1.5)]))
+    _plant(overpass, tiles[2], overpass_body([_node(40, 1.5, 0.5)]))
+    _plant(overpass, tiles[3], overpass_body([]))
+
+    assert [element["id"] for element in _stream(session, overpass)] == [10, 20, 30, 21, 22, 23, 40]
+
+    # Past max_depth the error is raised instead of splitting further
+    with pytest.raises(OverpassError, match="timed out"):
+        list(_stream(session, overpass, max_depth=0))
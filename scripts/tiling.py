@@ -0,0 +1,88 @@
+import math
+
+# Approximate (south, west, north, east) bounds per country, mainland plus
+# the main islands. Tile queries still filter by the country area, so these
+# only need to cover the country, not match its border.
+COUNTRY_BBOXES = {
+    "AT": (46.37, 9.53, 49.02, 17.16),
+    "BE": (49.50, 2.54, 51.51, 6.41),
+    "BG": (41.24, 22.36, 44.22, 28.61),
+    "CY": (34.57, 32.27, 35.70, 34.60),
+    "CZ": (48.55, 12.09, 51.06, 18.86),
+    "DE": (47.27, 5.87, 55.06, 15.04),
+    "DK": (54.56, 8.07, 57.75, 15.20),
+    "EE": (57.51, 21.76, 59.68, 28.21),
+    "EL": (34.80, 19.37, 41.75, 29.65),
+    "ES": (27.64, -18.16, 43.79, 4.33),
+    "FI": (59.81, 20.55, 70.09, 31.59),
+    "FR": (41.33, -5.14, 51.09, 9.56),
+    "HR": (42.39, 13.49, 46.55, 19.45),
+    "HU": (45.74, 16.11, 48.59, 22.90),
+    "IE": (51.42, -10.48, 55.39, -5.99),
+    "IT": (35.49, 6.63, 47.09, 18.52),
+    "LT": (53.90, 20.93, 56.45, 26.84),
+    "LU": (49.45, 5.73, 50.18, 6.53),
+    "LV": (55.67, 20.97, 58.09, 28.24),
+    "MT": (35.79, 14.18, 36.08, 14.58),
+    "NL": (50.75, 3.36, 53.56, 7.23),
+    "PL": (49.00, 14.12, 54.84, 24.15),
+    "PT": (30.03, -31.27, 42.15, -6.19),
+    "RO": (43.62, 20.26, 48.27, 29.76),
+    "SE": (55.34, 11.11, 69.06, 24.17),
+    "SI": (45.42, 13.38, 46.88, 16.61),
+    "SK": (47.73, 16.83, 49.61, 22.57),
+}
+
+
+def grid(bbox, size):
+    """Cut a (south, west, north, east) box into tiles of at most `size` degrees."""
+    south, west, north, east = bbox
+    tiles = []
+    lat = south
+    while lat < north:
+        top = min(north, lat + size)
+        lon = west
+        while lon < east:
+            right = min(east, lon + size)
+            tiles.append((round(lat, 4), round(lon, 4), round(top, 4), round(right, 4)))
+            lon = right
+        lat = top
+    return tiles
+
+
+def split(bbox):
+    """Split a tile into its four quadrants."""
+    south, west, north, east = bbox
+    mid_lat = round((south + north) / 2, 4)
+    mid_lon = round((west + east) / 2, 4)
+    return [
+        (south, west, mid_lat, mid_lon),
+        (south, mid_lon, mid_lat, east),
+        (mid_lat, west, north, mid_lon),
+        (mid_lat, mid_lon, north, east),
+    ]
+
+
+# ---------- Web Mercator (z/x/y map tiles) ----------
+MAX_LATITUDE = 85.05112878
+
+
+def project(lat, lon):
+    """(lat, lon) to Web Mercator world coordinates, both in 0..1 (y grows southwards)."""
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    sin = math.sin(math.radians(lat))
+    x = lon / 360 + 0.5
+    y = 0.5 - 0.25 * math.log((1 + sin) / (1 - sin)) / math.pi
+    return x, min(max(y, 0.0), 1.0)
+
+
+def unproject(x, y):
+    """Inverse of project(): world coordinates back to (lat, lon)."""
+    lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y))))
+    return lat, (x - 0.5) * 360
+
+
+def tile_of(x, y, zoom):
+    """The z/x/y map tile containing world coordinates (x, y)."""
+    scale = 1 << zoom
+    return min(int(x * scale), scale - 1), min(int(y * scale), scale - 1)
@@ -0,0 +1,124 @@
+import os
+import time
+import argparse
+from checkpoint import Checkpoint
+from csv_records import DEFAULT_CSV_FILES, csv_row_to_record, iter_csv_rows
+from pipeline import Pipeline
+from fetch_osm_data import STATE_DIR, DEFAULT_QUEUE_SIZE, add_sink_arguments, make_sink
+
+# ---------- Defaults ----------
+DEFAULT_CHECKPOINT = os.path.join(STATE_DIR, "upload_checkpoint.jsonl")
+# Rows read per pipeline batch; the sink splits them to the adaptive upsert size
+READ_BATCH_SIZE = 1000
+
+
+def file_fingerprint(path):
+    # A changed file must not resume at an offset taken from the old one
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def transform(path, rows):
+    records = []
+    seen = set()
+    for row in rows:
+        record = csv_row_to_record(row)
+        # Postgres rejects an upsert that touches the same id twice
+        if record is None or record["id"] in seen:
+            continue
+        seen.add(record["id"])
+        records.append(record)
+    return records
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Bulk load shop CSV files into the motorcycle_shops table")
+    parser.add_argument("files", nargs="*", default=DEFAULT_CSV_FILES,
+                        help="CSV files to load (default: the files in public/data)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Read and normalize everything but don't upsert; reports rows per second")
+    add_sink_arguments(parser)
+    parser.add_argument("--read-workers", type=int, default=2,
+                        help="Files read in parallel (default: 2)")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help=f"Batches buffered between pipeline stages (default: {DEFAULT_QUEUE_SIZE})")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT,
+                        help=f"Journal of loaded rows per file (default: {DEFAULT_CHECKPOINT})")
+    parser.add_argument("--restart", action="store_true",
+                        help="Ignore the checkpoint and load every file from the first row")
+    return parser.parse_args()
+
+
+# ---------- Main ----------
+def main():
+    args = parse_args()
+
+    missing = [path for path in args.files if not os.path.exists(path)]
+    if missing:
+        print(f"❌ File not found: {', '.join(missing)}")
+        exit(1)
+
+    print("=" * 60)
+    print("🏍️  Motorcycle Shop CSV Loader" + (" (dry run)" if args.dry_run else ""))
+    print("=" * 60)
+
+    sink = make_sink(args, dry_run=args.dry_run)
+
+    # Dry runs neither resume from nor write to the checkpoint
+    checkpoint = None if args.dry_run else Checkpoint(args.checkpoint)
+    if checkpoint and args.restart:
+        checkpoint.reset()
+
+    files = []
+    start_offsets = {}
+    for path in args.files:
+        fingerprint = file_fingerprint(path)
+        if checkpoint and checkpoint.is_done(path, fingerprint):
+            print(f"⏭️  {path}: Already loaded")
+            continue
+        offset = checkpoint.start(path, fingerprint) if checkpoint else 0
+        if offset:
+            print(f"↪️  {path}: Resuming after row {offset}")
+        start_offsets[path] = offset
+        files.append(path)
+
+    pipeline = Pipeline(iter_csv_rows, transform, lambda path, records: sink.upsert(records),
+                        fetch_workers=args.read_workers, sink_workers=args.upsert_workers,
+                        batch_size=READ_BATCH_SIZE, queue_size=args.queue_size,
+                        on_progress=checkpoint.advance if checkpoint else None)
+
+    total_rows = 0
+    failed_files = []
+    started = time.monotonic()
+
+    for result in pipeline.run(files, start_offsets):
+        if result.error is not None:
+            print(f"❌ {result.code}: Error after row {result.committed}: {result.error}")
+            failed_files.append(result.code)
+            continue
+        if checkpoint:
+            checkpoint.complete(result.code)
+        verb = "Validated" if args.dry_run else "Upserted"
+        print(f"✅ {result.code}: {verb} {result.inserted} shops")
+        total_rows += result.inserted
+
+    sink.close()
+    if checkpoint:
+        checkpoint.close()
+    elapsed = time.monotonic() - started
+
+    # ---------- Summary ----------
+    print("")
+    print("=" * 60)
+    print(f"📊 Total shops: {total_rows} in {elapsed:.2f}s "
+          f"({total_rows / elapsed if elapsed else 0:.0f} rows/s)")
+    for stats in pipeline.stats:
+        print(f"   {stats.summary(elapsed)}")
+    if failed_files:
+        print(f"⚠️  Failed files: {', '.join(failed_files)}")
+        print("   Run the loader again to resume where it stopped")
+    print("")
+
+
+if __name__ == "__main__":
+    main()
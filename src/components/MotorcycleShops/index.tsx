@@ -1,8 +1,12 @@
 'use client'
 
-import { useEffect, useState, useMemo } from "react";
+import { useEffect, useState, useMemo, useRef } from "react";
 import dynamic from 'next/dynamic';
-import { fetchCSVData } from "@/utils/csvParser";
+import { fetchCSVData, fetchCleanData } from "@/utils/csvParser";
+import { fetchShardManifest, fetchCountryShard, ShardManifest, ShardShop } from "@/utils/shards";
+import { fetchClusterIndex, ClusterIndex } from "@/utils/clusters";
+import { loadSearchIndex, searchShops, SearchIndex } from "@/utils/search";
+import { fetchOpeningHours, isOpenAt, OpeningHoursFile } from "@/utils/openingHours";
 import CountrySelector from "../CountrySelector";
 import { EU_COUNTRIES } from "@/data/countries";
 
@@ -48,15 +52,59 @@ interface MotorcycleShop {
   shop_tags?: Record<string, string>;
 }
 
+// Stable empty list, so the map doesn't refit its bounds on every render
+const NO_SHOPS: MotorcycleShop[] = [];
+
+// "Open now" / "Closed now"; nothing when the shop's hours are unknown
+function OpenNowBadge({ open }: { open: boolean | null }) {
+  if (open === null) return null;
+  return (
+    <span
+      className={`inline-block mt-2 px-2 py-0.5 rounded-full text-xs font-semibold ${
+        open ? 'bg-green-100 text-green-800' : 'bg-gray-100 text-gray-700'
+      }`}
+    >
+      {open ? 'Open now' : 'Closed now'}
+    </span>
+  );
+}
+
 export default function MotorcycleShops() {
   const [allShops, setAllShops] = useState<MotorcycleShop[]>([]);
   const [loading, setLoading] = useState<boolean>(true);
   const [selectedCountry, setSelectedCountry] = useState<string | null>(null);
   const [searchQuery, setSearchQuery] = useState<string>("");
   const [viewMode, setViewMode] = useState<'map' | 'list'>('map');
+  const [manifest, setManifest] = useState<ShardManifest | null>(null);
+  const [cleanData, setCleanData] = useState<boolean>(false);
+  const shards = useRef(new Map<string, Promise<ShardShop[]>>());
+  const [clusterIndex, setClusterIndex] = useState<ClusterIndex | null>(null);
+  const [searchIndex, setSearchIndex] = useState<SearchIndex | null>(null);
+  const searchIndexRequested = useRef(false);
+  const [openingHours, setOpeningHours] = useState<OpeningHoursFile | null>(null);
+
+  // The search index and opening hours refer to shops by dataset id, which the raw CSV rows don't have
+  const hasDatasetIds = manifest !== null || cleanData;
+
+  // The map of all countries draws precomputed clusters instead of every shop
+  const showClusters = clusterIndex !== null && !selectedCountry && !searchQuery.trim() && viewMode === 'map';
 
   useEffect(() => {
     async function fetchShops() {
+      // Per-country shards when they have been built, then the cleaned CSV, then the raw CSV
+      const [shardManifest, clusters] = await Promise.all([fetchShardManifest(), fetchClusterIndex()]);
+      setClusterIndex(clusters);
+      if (shardManifest) {
+        setManifest(shardManifest);
+        return;
+      }
+      const clean = await fetchCleanData();
+      if (clean) {
+        setAllShops(clean);
+        setCleanData(true);
+        setLoading(false);
+        return;
+      }
       try {
         const data = await fetchCSVData();
         setAllShops(data);
@@ -69,6 +117,42 @@ export default function MotorcycleShops() {
     fetchShops();
   }, []);
 
+  // Load the selected country's shard (every shard for "All Countries"), each only once.
+  // Clusters cover the map of all countries, so shards wait for a list or a search there.
+  useEffect(() => {
+    if (!manifest) return;
+    let cancelled = false;
+
+    const codes = selectedCountry ? [selectedCountry] : showClusters ? [] : Object.keys(manifest.countries);
+    for (const code of codes) {
+      if (manifest.countries[code] && !shards.current.has(code)) {
+        shards.current.set(code, fetchCountryShard(manifest, code));
+      }
+    }
+
+    Promise.all(Array.from(shards.current.values())).then((loaded) => {
+      if (cancelled) return;
+      setAllShops(loaded.flat());
+      setLoading(false);
+    });
+
+    return () => {
+      cancelled = true;
+    };
+  }, [manifest, selectedCountry, showClusters]);
+
+  // Fetch the search index the first time someone types a query
+  useEffect(() => {
+    if (!hasDatasetIds || !searchQuery.trim() || searchIndexRequested.current) return;
+    searchIndexRequested.current = true;
+    loadSearchIndex().then(setSearchIndex);
+  }, [hasDatasetIds, searchQuery]);
+
+  useEffect(() => {
+    if (!hasDatasetIds) return;
+    fetchOpeningHours().then(setOpeningHours);
+  }, [hasDatasetIds]);
+
   // Filter shops based on selected country and search query
   const filteredShops = useMemo(() => {
     let result = allShops;
@@ -78,8 +162,15 @@ export default function MotorcycleShops() {
       result = result.filter(shop => shop.country_code === selectedCountry);
     }
 
-    // Filter by search query
-    if (searchQuery.trim()) {
+    // Filter by search query: ranked index matches (prefixes, small typos) when the index
+    // is loaded, plain substring matching until then
+    if (searchQuery.trim() && searchIndex) {
+      const hits = searchShops(searchIndex, searchQuery);
+      const scores = new Map(hits.map((hit) => [hit.id, hit.score] as [number, number]));
+      result = result
+        .filter(shop => scores.has(shop.id))
+        .sort((a, b) => (scores.get(b.id) ?? 0) - (scores.get(a.id) ?? 0));
+    } else if (searchQuery.trim()) {
       const query = searchQuery.toLowerCase();
       result = result.filter(shop =>
         shop.name?.toLowerCase().includes(query) ||
@@ -90,7 +181,7 @@ export default function MotorcycleShops() {
     }
 
     return result;
-  }, [allShops, selectedCountry, searchQuery]);
+  }, [allShops, selectedCountry, searchQuery, searchIndex]);
 
   // Get country name from code
   const getCountryName = (code?: string) => {
@@ -125,7 +216,9 @@ export default function MotorcycleShops() {
               </p>
             </div>
             <div className="text-right">
-              <p className="text-3xl font-bold text-blue-600">{filteredShops.length}</p>
+              <p className="text-3xl font-bold text-blue-600">
+                {showClusters ? clusterIndex?.total : filteredShops.length}
+              </p>
               <p className="text-sm text-gray-600">
                 {selectedCountry ? 'shops in country' : 'total shops'}
               </p>
@@ -197,7 +290,10 @@ export default function MotorcycleShops() {
         {/* Map View */}
         {viewMode === 'map' && (
           <div className="mb-8">
-            <ShopMap shops={filteredShops} />
+            <ShopMap
+              shops={showClusters ? NO_SHOPS : filteredShops}
+              clusterIndex={showClusters ? clusterIndex : null}
+            />
           </div>
         )}
 
@@ -221,6 +317,7 @@ export default function MotorcycleShops() {
                     <h3 className="text-xl font-bold text-white truncate">
                       {shop.name || 'Motorcycle Shop'}
                     </h3>
+                    {openingHours && <OpenNowBadge open={isOpenAt(openingHours, shop.id)} />}
                   </div>
 
                   {/* Card Body */}
@@ -304,7 +401,11 @@ export default function MotorcycleShops() {
       {/* Footer */}
       <footer className="bg-white mt-12 border-t">
         <div className="max-w-7xl mx-auto px-4 sm:px-6 lg:px-8 py-6 text-center text-gray-600">
-          <p>Data loaded from CSV file</p>
+          <p>
+            {manifest
+              ? `${manifest.total} shops, updated ${new Date(manifest.generated_at).toLocaleDateString()}`
+              : cleanData ? 'Data loaded from the cleaned CSV file' : 'Data loaded from CSV file'}
+          </p>
           <p className="text-sm mt-2">Find the best motorcycle repair shops across Europe</p>
         </div>
       </footer>
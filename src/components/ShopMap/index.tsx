@@ -4,6 +4,7 @@ import React, { useState, useEffect, useMemo } from 'react';
 import { MapContainer, TileLayer, Marker, Popup, useMap } from 'react-leaflet';
 import L from 'leaflet';
 import 'leaflet/dist/leaflet.css';
+import { ClusterIndex, ClusterPoint, fetchClusterTile, tilesForBounds } from '@/utils/clusters';
 
 interface Address {
   city?: string;
@@ -33,6 +34,8 @@ interface MotorcycleShop {
 
 interface ShopMapProps {
   shops: MotorcycleShop[];
+  // Draw precomputed clusters for the visible area instead of one marker per shop
+  clusterIndex?: ClusterIndex | null;
 }
 
 // Custom marker icon
@@ -60,6 +63,105 @@ const createCustomIcon = () => {
   });
 };
 
+// Marker for a group of shops, sized by how many it stands for
+const createClusterIcon = (count: number) => {
+  const size = count < 10 ? 36 : count < 100 ? 44 : 52;
+  return L.divIcon({
+    className: 'custom-marker',
+    html: `
+      <div style="
+        width: ${size}px;
+        height: ${size}px;
+        display: flex;
+        align-items: center;
+        justify-content: center;
+        background: #2563EB;
+        color: white;
+        font-weight: 700;
+        border: 3px solid white;
+        border-radius: 50%;
+        box-shadow: 0 2px 8px rgba(0,0,0,0.3);
+      ">
+        ${count}
+      </div>
+    `,
+    iconSize: [size, size],
+    iconAnchor: [size / 2, size / 2],
+  });
+};
+
+// Loads the cluster tiles of the current view whenever the map stops moving
+function ClusterLayer({ index }: { index: ClusterIndex }) {
+  const map = useMap();
+  const [points, setPoints] = useState<ClusterPoint[]>([]);
+
+  useEffect(() => {
+    let request = 0;
+
+    async function update() {
+      const current = ++request;
+      const bounds = map.getBounds();
+      const tiles = tilesForBounds(
+        index,
+        map.getZoom(),
+        bounds.getSouth(),
+        bounds.getWest(),
+        bounds.getNorth(),
+        bounds.getEast()
+      );
+      const loaded = await Promise.all(tiles.map(([z, x, y]) => fetchClusterTile(z, x, y)));
+      // Ignore answers for a view the map has already left
+      if (current === request) {
+        setPoints(loaded.flat());
+      }
+    }
+
+    update();
+    map.on('moveend', update);
+    return () => {
+      request++;
+      map.off('moveend', update);
+    };
+  }, [map, index]);
+
+  return (
+    <>
+      {points.map((point) =>
+        point.count ? (
+          <Marker
+            key={`${point.lat},${point.lon}`}
+            position={[point.lat, point.lon]}
+            icon={createClusterIcon(point.count)}
+            eventHandlers={{
+              click: () => map.setView([point.lat, point.lon], Math.min(map.getZoom() + 2, index.max_zoom)),
+            }}
+          />
+        ) : (
+          <Marker key={point.id} position={[point.lat, point.lon]} icon={createCustomIcon()}>
+            <Popup maxWidth={300}>
+              <div className="p-2">
+                <h3 className="font-bold text-lg mb-2 text-gray-800">
+                  {point.name || 'Motorcycle Shop'}
+                </h3>
+                {point.city && (
+                  <p className="text-sm text-gray-600 mb-1">
+                    📍 {point.city}
+                  </p>
+                )}
+                {point.country_code && (
+                  <p className="text-sm text-gray-600 mb-2">
+                    🌍 {point.country_code}
+                  </p>
+                )}
+              </div>
+            </Popup>
+          </Marker>
+        )
+      )}
+    </>
+  );
+}
+
 // Component to handle map bounds and center updates
 function MapBoundsHandler({ shops }: { shops: MotorcycleShop[] }) {
   const map = useMap();
@@ -89,7 +191,7 @@ function MapBoundsHandler({ shops }: { shops: MotorcycleShop[] }) {
   return null;
 }
 
-export default function ShopMap({ shops }: ShopMapProps) {
+export default function ShopMap({ shops, clusterIndex }: ShopMapProps) {
   const [isMounted, setIsMounted] = useState(false);
 
   useEffect(() => {
@@ -145,7 +247,9 @@ export default function ShopMap({ shops }: ShopMapProps) {
 
         <MapBoundsHandler shops={shops} />
 
-        {shops.map((shop) => {
+        {clusterIndex && <ClusterLayer index={clusterIndex} />}
+
+        {!clusterIndex && shops.map((shop) => {
           if (!shop.lat || !shop.lon) return null;
 
           return (
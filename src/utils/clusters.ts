@@ -0,0 +1,85 @@
+/**
+ * Precomputed marker clusters built by scripts/build_clusters.py
+ * One JSON tile per z/x/y, so the map only draws the points of the current view
+ */
+
+export interface ClusterIndex {
+  generated_at: string;
+  min_zoom: number;
+  max_zoom: number;
+  radius: number;
+  extent: number;
+  total: number;
+  zooms: Record<string, { points: number; tiles: number }>;
+}
+
+// Either a group of shops (count) or a single shop (id, name, ...)
+export interface ClusterPoint {
+  lat: number;
+  lon: number;
+  count?: number;
+  id?: number;
+  name?: string;
+  city?: string;
+  country_code?: string;
+}
+
+const CLUSTER_BASE = '/data/clusters';
+
+export async function fetchClusterIndex(): Promise<ClusterIndex | null> {
+  try {
+    const response = await fetch(`${CLUSTER_BASE}/index.json`);
+    if (!response.ok) {
+      return null;
+    }
+    return await response.json();
+  } catch (error) {
+    console.error('Error fetching cluster index:', error);
+    return null;
+  }
+}
+
+// z/x/y tiles covering a bounding box, clamped to the zooms that were built
+export function tilesForBounds(
+  index: ClusterIndex,
+  zoom: number,
+  south: number,
+  west: number,
+  north: number,
+  east: number
+): Array<[number, number, number]> {
+  const z = Math.max(index.min_zoom, Math.min(index.max_zoom, Math.round(zoom)));
+  const scale = 2 ** z;
+  const clampLat = (lat: number) => Math.max(-85.05112878, Math.min(85.05112878, lat));
+  const tileX = (lon: number) => Math.min(scale - 1, Math.max(0, Math.floor(((lon + 180) / 360) * scale)));
+  const tileY = (lat: number) => {
+    const rad = (clampLat(lat) * Math.PI) / 180;
+    const y = (1 - Math.log(Math.tan(rad) + 1 / Math.cos(rad)) / Math.PI) / 2;
+    return Math.min(scale - 1, Math.max(0, Math.floor(y * scale)));
+  };
+
+  const tiles: Array<[number, number, number]> = [];
+  for (let x = tileX(west); x <= tileX(east); x++) {
+    for (let y = tileY(north); y <= tileY(south); y++) {
+      tiles.push([z, x, y]);
+    }
+  }
+  return tiles;
+}
+
+export async function fetchClusterTile(z: number, x: number, y: number): Promise<ClusterPoint[]> {
+  try {
+    const response = await fetch(`${CLUSTER_BASE}/${z}/${x}/${y}.json`);
+    // Tiles without any shops are not written
+    if (response.status === 404) {
+      return [];
+    }
+    if (!response.ok) {
+      throw new Error(`Failed to fetch cluster tile: ${response.statusText}`);
+    }
+    return await response.json();
+  } catch (error) {
+    console.error(`Error fetching cluster tile ${z}/${x}/${y}:`, error);
+    return [];
+  }
+}
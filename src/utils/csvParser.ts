@@ -162,3 +162,56 @@ export async function fetchCSVData(csvPath: string = '/data/eu_motorcycle_repair
     return [];
   }
 }
+
+// Row of the typed file written by scripts/normalize_csv.py
+interface CleanShopRow {
+  id: number;
+  place_id: string;
+  name: string | null;
+  city: string | null;
+  country_code: string;
+  address: string | null;
+  lat: number;
+  lon: number;
+  phone: string | null;
+  website: string | null;
+  business_type: string | null;
+  rating: number | null;
+  reviews_count: number | null;
+  hours: Record<string, string> | null;
+  scraped_at: string | null;
+}
+
+// Already cleaned and typed, so no parsing or country lookup in the browser.
+// null when scripts/normalize_csv.py hasn't been run (or the file can't be read).
+export async function fetchCleanData(
+  jsonPath: string = '/data/eu_motorcycle_repairs.clean.json'
+): Promise<MotorcycleShop[] | null> {
+  try {
+    const response = await fetch(jsonPath);
+
+    if (!response.ok) {
+      return null;
+    }
+
+    const rows: CleanShopRow[] = await response.json();
+    return rows.map((row) => ({
+      id: row.id,
+      name: row.name ?? undefined,
+      lat: row.lat,
+      lon: row.lon,
+      country_code: row.country_code,
+      address: {
+        city: row.city ?? undefined,
+        street: row.address ?? undefined,
+      },
+      contact: {
+        phone: row.phone ?? undefined,
+        website: row.website ?? undefined,
+      },
+    }));
+  } catch (error) {
+    console.error('Error fetching clean data:', error);
+    return null;
+  }
+}
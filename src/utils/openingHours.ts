@@ -0,0 +1,61 @@
+/**
+ * Weekly opening-hours bitmaps built by scripts/build_opening_hours.py
+ * 7 x 96 quarter-hour bits per shop, Monday 00:00 first, in the shop's local time
+ */
+
+export interface OpeningHoursFile {
+  slot_minutes: number;
+  // shop id -> [IANA timezone, base64 bitmap]
+  shops: Record<string, [string, string]>;
+}
+
+const OPENING_HOURS_URL = '/data/opening_hours.json';
+const WEEKDAYS: Record<string, number> = { Mon: 0, Tue: 1, Wed: 2, Thu: 3, Fri: 4, Sat: 5, Sun: 6 };
+const formatters = new Map<string, Intl.DateTimeFormat>();
+const decoded = new Map<number, Uint8Array>();
+
+export async function fetchOpeningHours(): Promise<OpeningHoursFile | null> {
+  try {
+    const response = await fetch(OPENING_HOURS_URL);
+    if (!response.ok) {
+      return null;
+    }
+    return await response.json();
+  } catch (error) {
+    console.error('Error fetching opening hours:', error);
+    return null;
+  }
+}
+
+function weekSlot(date: Date, timeZone: string, slotMinutes: number): number {
+  let formatter = formatters.get(timeZone);
+  if (!formatter) {
+    formatter = new Intl.DateTimeFormat('en-US', {
+      timeZone,
+      weekday: 'short',
+      hour: '2-digit',
+      minute: '2-digit',
+      hourCycle: 'h23',
+    });
+    formatters.set(timeZone, formatter);
+  }
+  const parts = Object.fromEntries(formatter.formatToParts(date).map((part) => [part.type, part.value]));
+  const minutes = Number(parts.hour) * 60 + Number(parts.minute);
+  return WEEKDAYS[parts.weekday] * ((24 * 60) / slotMinutes) + Math.floor(minutes / slotMinutes);
+}
+
+// true/false, or null when the shop's hours are unknown
+export function isOpenAt(hours: OpeningHoursFile, shopId: number, date: Date = new Date()): boolean | null {
+  const entry = hours.shops[shopId];
+  if (!entry) {
+    return null;
+  }
+  const [timeZone, bits] = entry;
+  let bytes = decoded.get(shopId);
+  if (!bytes) {
+    bytes = Uint8Array.from(atob(bits), (char) => char.charCodeAt(0));
+    decoded.set(shopId, bytes);
+  }
+  const slot = weekSlot(date, timeZone, hours.slot_minutes);
+  return ((bytes[slot >> 3] >> (slot & 7)) & 1) === 1;
+}
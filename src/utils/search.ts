@@ -0,0 +1,199 @@
+/**
+ * Full-text shop search built by scripts/build_search_index.py
+ * Same matching as scripts/search_index.py: exact, prefix, then typo-tolerant
+ */
+
+interface SearchIndexFile {
+  version: number;
+  fields: string[];
+  ids: number[];
+  terms: string[];
+  postings: number[][];
+}
+
+export interface SearchIndex {
+  fieldCount: number;
+  ids: number[];
+  terms: string[];
+  postings: number[][];
+  trigrams: Map<string, number[]>;
+}
+
+export interface SearchHit {
+  id: number;
+  score: number;
+}
+
+const SEARCH_INDEX_URL = '/data/search_index.json.gz';
+const FIELD_WEIGHTS = [4, 2, 1, 1];
+const EXACT = 1;
+const PREFIX = 0.7;
+const FUZZY = 0.4;
+const MIN_PREFIX = 2;
+const MIN_FUZZY = 4;
+
+// Same folding as Python's casefold() + accent stripping in scripts/dedup.py
+export function tokenize(text: string): string[] {
+  return (
+    text
+      .normalize('NFKD')
+      .replace(/[\u0300-\u036f]/g, '')
+      .toLowerCase()
+      .replace(/ß/g, 'ss')
+      .replace(/ς/g, 'σ')
+      .match(/[\p{L}\p{N}]+/gu) ?? []
+  );
+}
+
+function trigrams(term: string): Set<string> {
+  const padded = `$${term}$`;
+  const grams = new Set<string>();
+  for (let i = 0; i + 3 <= padded.length; i++) {
+    grams.add(padded.slice(i, i + 3));
+  }
+  return grams;
+}
+
+// Edit distance where swapping two neighbouring letters counts as one edit
+function editDistance(a: string, b: string, limit: number): number {
+  if (Math.abs(a.length - b.length) > limit) {
+    return limit + 1;
+  }
+  let before: number[] = [];
+  let previous = Array.from({ length: b.length + 1 }, (_, j) => j);
+  for (let i = 1; i <= a.length; i++) {
+    const current = [i];
+    for (let j = 1; j <= b.length; j++) {
+      let cost = Math.min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a[i - 1] === b[j - 1] ? 0 : 1));
+      if (i > 1 && j > 1 && a[i - 1] === b[j - 2] && a[i - 2] === b[j - 1]) {
+        cost = Math.min(cost, before[j - 2] + 1);
+      }
+      current.push(cost);
+    }
+    if (Math.min(...current) > limit) {
+      return limit + 1;
+    }
+    before = previous;
+    previous = current;
+  }
+  return previous[b.length];
+}
+
+function lowerBound(terms: string[], word: string): number {
+  let low = 0;
+  let high = terms.length;
+  while (low < high) {
+    const mid = (low + high) >> 1;
+    if (terms[mid] < word) {
+      low = mid + 1;
+    } else {
+      high = mid;
+    }
+  }
+  return low;
+}
+
+export async function loadSearchIndex(): Promise<SearchIndex | null> {
+  try {
+    const response = await fetch(SEARCH_INDEX_URL);
+    if (!response.ok || !response.body) {
+      return null;
+    }
+    const stream = response.body.pipeThrough(new DecompressionStream('gzip'));
+    const data: SearchIndexFile = JSON.parse(await new Response(stream).text());
+
+    // Postings are stored delta-encoded
+    const postings = data.postings.map((deltas) => {
+      let total = 0;
+      return deltas.map((delta) => (total += delta));
+    });
+    const grams = new Map<string, number[]>();
+    data.terms.forEach((term, number) => {
+      trigrams(term).forEach((gram) => {
+        const list = grams.get(gram);
+        if (list) {
+          list.push(number);
+        } else {
+          grams.set(gram, [number]);
+        }
+      });
+    });
+    return { fieldCount: data.fields.length, ids: data.ids, terms: data.terms, postings, trigrams: grams };
+  } catch (error) {
+    console.error('Error loading search index:', error);
+    return null;
+  }
+}
+
+function fuzzyTerms(index: SearchIndex, word: string): number[] {
+  const limit = word.length < 8 ? 1 : 2;
+  const grams = trigrams(word);
+  const shared = new Map<number, number>();
+  grams.forEach((gram) => {
+    for (const number of index.trigrams.get(gram) ?? []) {
+      shared.set(number, (shared.get(number) ?? 0) + 1);
+    }
+  });
+  const needed = grams.size - 4 * limit;
+  const result: number[] = [];
+  shared.forEach((count, number) => {
+    if (count >= needed && editDistance(word, index.terms[number], limit) <= limit) {
+      result.push(number);
+    }
+  });
+  return result;
+}
+
+function wordScores(index: SearchIndex, word: string): Map<number, number> {
+  const matches = new Map<number, number>();
+  const start = lowerBound(index.terms, word);
+  if (word.length >= MIN_PREFIX) {
+    for (let number = start; number < index.terms.length && index.terms[number].startsWith(word); number++) {
+      matches.set(number, PREFIX);
+    }
+  }
+  if (index.terms[start] === word) {
+    matches.set(start, EXACT);
+  } else if (word.length >= MIN_FUZZY) {
+    for (const number of fuzzyTerms(index, word)) {
+      if (!matches.has(number)) {
+        matches.set(number, FUZZY);
+      }
+    }
+  }
+
+  const scores = new Map<number, number>();
+  matches.forEach((kind, number) => {
+    for (const posting of index.postings[number]) {
+      const doc = Math.floor(posting / index.fieldCount);
+      const score = kind * FIELD_WEIGHTS[posting % index.fieldCount];
+      if (score > (scores.get(doc) ?? 0)) {
+        scores.set(doc, score);
+      }
+    }
+  });
+  return scores;
+}
+
+// Shops matching every word of the query, best first
+export function searchShops(index: SearchIndex, query: string, limit = 0): SearchHit[] {
+  const words = tokenize(query);
+  if (words.length === 0) {
+    return [];
+  }
+  const perWord = words.map((word) => wordScores(index, word)).sort((a, b) => a.size - b.size);
+  let combined = perWord[0];
+  for (const scores of perWord.slice(1)) {
+    const next = new Map<number, number>();
+    combined.forEach((score, doc) => {
+      const other = scores.get(doc);
+      if (other !== undefined) {
+        next.set(doc, score + other);
+      }
+    });
+    combined = next;
+  }
+
+  const ranked = Array.from(combined.entries()).sort((a, b) => b[1] - a[1] || a[0] - b[0]);
+  return (limit ? ranked.slice(0, limit) : ranked).map(([doc, score]) => ({ id: index.ids[doc], score }));
+}
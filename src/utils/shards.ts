@@ -0,0 +1,76 @@
+/**
+ * Per-country shop shards built by scripts/build_shards.py
+ * Loads only the country that is needed instead of the whole CSV
+ */
+
+export interface ShardManifestEntry {
+  file: string;
+  count: number;
+  bytes: number;
+  raw_bytes: number;
+}
+
+export interface ShardManifest {
+  generated_at: string;
+  total: number;
+  countries: Record<string, ShardManifestEntry>;
+}
+
+export interface ShardShop {
+  id: number;
+  name?: string;
+  lat?: number;
+  lon?: number;
+  country_code?: string;
+  address?: {
+    city?: string;
+    street?: string;
+    housenumber?: string;
+    postcode?: string;
+    suburb?: string;
+  };
+  contact?: {
+    phone?: string;
+    fax?: string;
+    website?: string;
+    email?: string;
+  };
+  shop_tags?: Record<string, string>;
+}
+
+const SHARD_BASE = '/data/shards';
+
+export async function fetchShardManifest(): Promise<ShardManifest | null> {
+  try {
+    const response = await fetch(`${SHARD_BASE}/manifest.json`);
+    if (!response.ok) {
+      return null;
+    }
+    return await response.json();
+  } catch (error) {
+    console.error('Error fetching shard manifest:', error);
+    return null;
+  }
+}
+
+export async function fetchCountryShard(manifest: ShardManifest, countryCode: string): Promise<ShardShop[]> {
+  const entry = manifest.countries[countryCode];
+  if (!entry) {
+    return [];
+  }
+
+  try {
+    const response = await fetch(`${SHARD_BASE}/${entry.file}`);
+    if (!response.ok || !response.body) {
+      throw new Error(`Failed to fetch shard: ${response.statusText}`);
+    }
+
+    // Shards are stored gzipped; decompress in the browser
+    const stream = response.body.pipeThrough(new DecompressionStream('gzip'));
+    const text = await new Response(stream).text();
+    return JSON.parse(text);
+  } catch (error) {
+    console.error(`Error fetching shard for ${countryCode}:`, error);
+    return [];
+  }
+}